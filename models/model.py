@@ -1,5 +1,9 @@
+import os
+import numpy as np
 from ultralytics import YOLO
 
+BACKENDS = ('torch', 'onnx', 'int8')
+
 def get_yolov8_model(
     pretrained: str = 'yolov8s.pt',
     data_yaml: str = 'data.yaml',
@@ -10,30 +14,68 @@ def get_yolov8_model(
     project: str = 'runs/train',
     name: str = 'exp1',
     exist_ok: bool = True,
-    patience: int = 3
+    patience: int = 3,
+    backend: str = 'torch',
+    cache: str = 'auto',
+    cache_budget_gb: float = None,
+    image_store: str = None
 ):
     """
     YOLOv8 학습/추론 API 래퍼
+    backend='onnx'면 predict는 .pt 옆에 캐시된 ONNX(없으면 export)를 onnxruntime(CPU)으로 실행
+    (처음 predict할 때 export·로드, train 후에는 trainer.best 기준으로 다시 만듦)
+    backend='int8'이면 scripts/quantize_int8.py gate를 통과한 INT8 ONNX로 실행 (find_int8_artifact, 없으면 종료)
+    cache: 학습 이미지 캐시 ('auto' | 'ram' | 'disk' | 'none', src.train_cache.resolve_cache)
+    disk는 imgsz로 줄인 .npy를 미리 만들어 두므로 epoch마다 PNG 디코딩을 하지 않음
+    image_store: src.image_store 저장소 폴더 (지정 시 학습 이미지를 memmap에서 읽고 cache는 사용 안 함)
     """
     model = YOLO(pretrained)
+    state = {'weights': pretrained, 'pred_model': None}
+
+    def get_pred_model():
+        # torch는 학습 후 ultralytics가 model을 best 가중치로 바꿔 두므로 그대로 사용
+        if backend == 'torch':
+            return model
+        if state['pred_model'] is None:
+            pred_path = export_onnx(state['weights'], imgsz=imgsz)
+            if backend == 'int8':
+                pred_path = find_int8_artifact(pred_path)
+            state['pred_model'] = load_model(pred_path)
+        return state['pred_model']
 
     def train(resume=False):
-        return model.train(
+        from src.train_cache import prepare_disk_cache, resolve_cache
+
+        extra = {}
+        if image_store:
+            from src.image_store import store_trainer
+            cache_mode, extra['trainer'] = False, store_trainer(image_store)
+        else:
+            cache_mode, sizes = resolve_cache(data_yaml, imgsz, cache, cache_budget_gb)
+            if cache_mode == 'disk':
+                prepare_disk_cache(sizes, imgsz)
+        results = model.train(
             data=data_yaml,
             epochs=epochs,
             batch=batch,
             imgsz=imgsz,
-            cache=False,
+            cache=cache_mode,
             lr0=lr0,
             project=project,
             name=name,
             exist_ok=exist_ok,
             patience=patience,
             resume=resume,
+            **extra
         )
+        # 다음 predict가 학습된 가중치로 ONNX를 다시 export하도록 (int8은 그 ONNX로 만든 INT8 모델이 있어야 함)
+        best = getattr(getattr(model, 'trainer', None), 'best', None)
+        if best and os.path.exists(best):
+            state['weights'], state['pred_model'] = str(best), None
+        return results
 
     def predict(source: str, conf: float = 0.25, iou: float = 0.45, save_dir: str = 'runs/predict'):
-        return model.predict(
+        return get_pred_model().predict(
             source=source,
             imgsz=imgsz,
             conf=conf,
@@ -44,4 +86,215 @@ def get_yolov8_model(
             exist_ok=exist_ok
         )
 
-    return train, predict
\ No newline at end of file
+    return train, predict
+
+def onnx_artifact_path(pt_path: str, imgsz: int = 640, batch: int = 0):
+    """export 결과 캐시 경로: <pt 이름>_<imgsz>_<dyn|b{batch}>.onnx (.pt와 같은 폴더)"""
+    shape = 'dyn' if not batch else f'b{batch}'
+    return f"{os.path.splitext(pt_path)[0]}_{imgsz}_{shape}.onnx"
+
+def export_onnx(pt_path: str, imgsz: int = 640, batch: int = 0, opset: int = None, force: bool = False):
+    """
+    .pt → ONNX export (이미 .pt보다 새로운 export가 있으면 재사용)
+    batch=0이면 batch/높이/너비가 dynamic, batch>0이면 그 크기로 고정 (고정 shape이 CPU에서 보통 더 빠름)
+    """
+    out_path = onnx_artifact_path(pt_path, imgsz, batch)
+    if not force and os.path.exists(out_path) and os.path.getmtime(out_path) >= os.path.getmtime(pt_path):
+        return out_path
+
+    exported = YOLO(pt_path).export(
+        format='onnx',
+        imgsz=imgsz,
+        dynamic=not batch,
+        batch=batch or 1,
+        opset=opset,
+        simplify=True
+    )
+    os.replace(exported, out_path)
+    print(f"[INFO] ONNX export: {pt_path} → {out_path}")
+    return out_path
+
+def load_model(path: str, batch: int = 0):
+    """
+    .pt는 PyTorch, .onnx는 onnxruntime으로 실행되는 YOLO 객체
+    고정 batch ONNX는 static_batch 속성에 크기를 기록 (src.inference.predict_batch가 그 단위로 잘라서 예측)
+    """
+    if path.endswith('.onnx'):
+        model = YOLO(path, task='detect')
+        model.static_batch = batch
+        return model
+    return YOLO(path)
+
+def check_onnx_parity(pt_path: str, onnx_path: str, img_paths, imgsz: int = 640, batch: int = 0,
+                      conf: float = 0.25, iou: float = 0.45, box_tol: float = 2.0, score_tol: float = 0.02):
+    """
+    같은 이미지에 대해 PyTorch / ONNX 검출 결과 비교
+    클래스가 같은 박스끼리 IoU가 가장 큰 것을 짝지어 좌표(px)·score 차이를 보고, 짝이 없는 박스는 unmatched로 셈
+    """
+    torch_model = YOLO(pt_path)
+    onnx_model = load_model(onnx_path, batch)
+    report = {'images': 0, 'torch_boxes': 0, 'onnx_boxes': 0, 'unmatched': 0,
+              'max_box_diff': 0.0, 'max_score_diff': 0.0}
+    for path in img_paths:
+        a = torch_model.predict(path, imgsz=imgsz, conf=conf, iou=iou, verbose=False)[0].boxes.data.cpu().numpy()
+        # 고정 batch ONNX는 입력 개수가 batch와 같아야 하므로 같은 이미지를 채워서 첫 결과만 사용
+        b = onnx_model.predict([path] * max(1, batch), imgsz=imgsz, conf=conf, iou=iou, verbose=False)[0]
+        b = b.boxes.data.cpu().numpy()
+        report['images'] += 1
+        report['torch_boxes'] += len(a)
+        report['onnx_boxes'] += len(b)
+
+        used = np.zeros(len(b), dtype=bool)
+        for det in a:
+            cand = np.where((b[:, 5] == det[5]) & ~used)[0] if len(b) else []
+            if len(cand) == 0:
+                report['unmatched'] += 1
+                continue
+            x1 = np.maximum(det[0], b[cand, 0]); y1 = np.maximum(det[1], b[cand, 1])
+            x2 = np.minimum(det[2], b[cand, 2]); y2 = np.minimum(det[3], b[cand, 3])
+            inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+            union = (det[2] - det[0]) * (det[3] - det[1]) + (b[cand, 2] - b[cand, 0]) * (b[cand, 3] - b[cand, 1]) - inter
+            k = cand[np.argmax(inter / np.maximum(union, 1e-9))]
+            used[k] = True
+            report['max_box_diff'] = max(report['max_box_diff'], float(np.abs(det[:4] - b[k, :4]).max()))
+            report['max_score_diff'] = max(report['max_score_diff'], float(abs(det[4] - b[k, 4])))
+        report['unmatched'] += int((~used).sum())
+
+    report['ok'] = (report['unmatched'] == 0
+                    and report['max_box_diff'] <= box_tol
+                    and report['max_score_diff'] <= score_tol)
+    return report
+
+def int8_artifact_path(onnx_path: str, mode: str = 'static'):
+    """INT8 모델 경로: <onnx 이름>_int8.onnx (static) / _int8dyn.onnx (dynamic)"""
+    suffix = '_int8' if mode == 'static' else '_int8dyn'
+    return f"{os.path.splitext(onnx_path)[0]}{suffix}.onnx"
+
+def int8_sidecar_path(int8_path: str):
+    """INT8 모델 옆의 gate 결과·원본 ONNX 기록 (<int8 이름>.json)"""
+    return os.path.splitext(int8_path)[0] + '.json'
+
+def onnx_fingerprint(onnx_path: str, with_hash: bool = True):
+    """원본 ONNX 식별 정보 (mtime_ns, 크기, sha1) — INT8 모델이 어떤 ONNX에서 만들어졌는지 기록·비교용"""
+    import hashlib
+    st = os.stat(onnx_path)
+    info = {'onnx': os.path.abspath(onnx_path), 'onnx_mtime_ns': st.st_mtime_ns, 'onnx_size': st.st_size}
+    if with_hash:
+        h = hashlib.sha1()
+        with open(onnx_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        info['onnx_sha1'] = h.hexdigest()
+    return info
+
+def _int8_matches(int8_path: str, onnx_path: str):
+    """sidecar에 기록된 원본 ONNX와 지금 ONNX가 같은지 (mtime·크기가 같으면 바로 통과, 다르면 sha1로 확인)"""
+    import json
+    try:
+        with open(int8_sidecar_path(int8_path), 'r', encoding='utf-8') as f:
+            rec = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if 'onnx_sha1' not in rec:
+        return False
+    cur = onnx_fingerprint(onnx_path, with_hash=False)
+    if (cur['onnx_mtime_ns'], cur['onnx_size']) == (rec.get('onnx_mtime_ns'), rec.get('onnx_size')):
+        return True
+    return cur['onnx_size'] == rec.get('onnx_size') and onnx_fingerprint(onnx_path)['onnx_sha1'] == rec['onnx_sha1']
+
+def find_int8_artifact(onnx_path: str):
+    """
+    onnx_path에 대한 INT8 모델 (static 우선, 없으면 dynamic)
+    scripts/quantize_int8.py의 정확도 gate를 통과한 모델만 남아 있으므로, 둘 다 없으면 안내 메시지와 함께 종료
+    sidecar(.json)에 기록된 원본 ONNX와 지금 ONNX가 다르면(.pt가 바뀌어 다시 export됨) 오래된 모델로 보고 종료
+    """
+    stale = []
+    for mode in ('static', 'dynamic'):
+        path = int8_artifact_path(onnx_path, mode)
+        if os.path.exists(path):
+            if _int8_matches(path, onnx_path):
+                return path
+            stale.append(path)
+    if stale:
+        raise SystemExit(f"INT8 모델이 지금 ONNX({onnx_path})에서 만들어진 것이 아닙니다: {', '.join(stale)} "
+                         f"(체크포인트가 바뀌었거나 원본 기록 없음, python -m scripts.quantize_int8 로 다시 생성)")
+    raise SystemExit(f"INT8 모델이 없습니다: {int8_artifact_path(onnx_path)} "
+                     f"(python -m scripts.quantize_int8 로 먼저 생성)")
+
+def letterbox(img, size: int = 640, color=(114, 114, 114)):
+    """비율 유지 resize 후 가운데 정렬 padding (ultralytics LetterBox(auto=False)와 같은 방식)"""
+    import cv2
+    h, w = img.shape[:2]
+    r = min(size / h, size / w)
+    nw, nh = int(round(w * r)), int(round(h * r))
+    if (nw, nh) != (w, h):
+        img = cv2.resize(img, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    dw, dh = (size - nw) / 2, (size - nh) / 2
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    return cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+
+def _head_nodes(onnx_path: str):
+    """YOLO detect head(마지막 /model.N/ 블록) 노드 이름 (INT8로 바꾸면 박스 좌표 정확도가 크게 떨어지는 부분)"""
+    import re
+    import onnx
+    graph = onnx.load(onnx_path).graph
+    idx = [int(m.group(1)) for n in graph.node for m in [re.search(r'/model\.(\d+)/', n.name)] if m]
+    if not idx:
+        return []
+    head = f'/model.{max(idx)}/'
+    return [n.name for n in graph.node if head in n.name]
+
+def quantize_onnx(onnx_path: str, calib_paths=None, imgsz: int = 640, mode: str = 'static',
+                  batch: int = 0, exclude_head: bool = True):
+    """
+    FP32 ONNX → INT8 ONNX (onnxruntime.quantization)
+
+    - static: calib_paths 이미지로 activation 범위를 보정 (QDQ, weight는 per-channel int8), CPU에서 가장 빠름
+    - dynamic: 보정 없이 weight만 int8, activation은 실행 중 양자화
+    - exclude_head: detect head는 FP32로 남겨서 박스 좌표 정확도 손실을 줄임
+    """
+    from onnxruntime.quantization import (
+        CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static
+    )
+
+    out_path = int8_artifact_path(onnx_path, mode)
+    exclude = _head_nodes(onnx_path) if exclude_head else []
+    if mode == 'dynamic':
+        quantize_dynamic(onnx_path, out_path, weight_type=QuantType.QInt8, nodes_to_exclude=exclude)
+        return out_path
+
+    import cv2
+    import onnxruntime as ort
+
+    input_name = ort.InferenceSession(onnx_path, providers=['CPUExecutionProvider']).get_inputs()[0].name
+
+    class _CalibReader(CalibrationDataReader):
+        """보정 이미지를 letterbox → RGB → [0, 1] NCHW float32 로 바꿔서 batch 단위로 전달"""
+
+        def __init__(self):
+            self.paths = list(calib_paths)
+            self.step = max(1, batch)
+            self.pos = 0
+
+        def get_next(self):
+            if self.pos >= len(self.paths):
+                return None
+            chunk = self.paths[self.pos:self.pos + self.step]
+            chunk += [chunk[-1]] * (self.step - len(chunk))
+            self.pos += self.step
+            arr = np.stack([letterbox(cv2.imread(p), imgsz)[:, :, ::-1].transpose(2, 0, 1) for p in chunk])
+            return {input_name: np.ascontiguousarray(arr, dtype=np.float32) / 255.0}
+
+        def rewind(self):
+            self.pos = 0
+
+    quantize_static(
+        onnx_path, out_path, _CalibReader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        nodes_to_exclude=exclude
+    )
+    return out_path
@@ -0,0 +1,98 @@
+import io
+import json
+import time
+import argparse
+import contextlib
+import numpy as np
+from pycocotools.coco import COCO
+from pycocotools.cocoeval import COCOeval
+from src.coco_metrics import coco_evaluate
+
+def make_dataset(rng, n_images, n_classes, objects=4, crowd=0.02):
+    """알약 이미지처럼 이미지마다 객체 몇 개 + 흔들린 예측 / 오검출 / 중복 검출 / 점수 동점이 섞인 가짜 GT·예측"""
+    images = [{"id": i + 1, "file_name": f"{i + 1}.png", "width": 976, "height": 1280} for i in range(n_images)]
+    categories = [{"id": 1000 + k, "name": f"pill_{k}"} for k in range(n_classes)]
+    annotations, results = [], []
+    for img in images:
+        for _ in range(rng.integers(1, objects * 2)):
+            cat = 1000 + int(rng.integers(0, n_classes))
+            w, h = rng.uniform(10, 200, 2)
+            x, y = rng.uniform(0, 700, 2)
+            is_crowd = int(rng.random() < crowd)
+            annotations.append({"id": len(annotations) + 1, "image_id": img["id"], "category_id": cat,
+                                "bbox": [x, y, w, h], "area": w * h, "iscrowd": is_crowd})
+            for _ in range(rng.integers(0, 3)):
+                jitter = rng.normal(0, 0.08, 4) * [w, h, w, h]
+                pred_cat = cat if rng.random() < 0.9 else 1000 + int(rng.integers(0, n_classes))
+                results.append({"image_id": img["id"], "category_id": pred_cat,
+                                "bbox": [x + jitter[0], y + jitter[1], max(w + jitter[2], 1), max(h + jitter[3], 1)],
+                                "score": float(np.round(rng.random(), 2))})
+        for _ in range(rng.integers(0, 2)):
+            results.append({"image_id": img["id"], "category_id": 1000 + int(rng.integers(0, n_classes)),
+                            "bbox": list(rng.uniform(0, 700, 2)) + list(rng.uniform(10, 200, 2)),
+                            "score": float(np.round(rng.random(), 2))})
+    return {"images": images, "annotations": annotations, "categories": categories, "info": {}, "licenses": []}, results
+
+def pycocotools_eval(gt, results):
+    with contextlib.redirect_stdout(io.StringIO()):
+        coco_gt = COCO()
+        coco_gt.dataset = json.loads(json.dumps(gt))
+        coco_gt.createIndex()
+        coco_dt = coco_gt.loadRes(json.loads(json.dumps(results)))
+        evaler = COCOeval(coco_gt, coco_dt, iouType="bbox")
+        evaler.params.imgIds = sorted(coco_gt.getImgIds())
+        evaler.evaluate()
+        evaler.accumulate()
+        evaler.summarize()
+    return evaler
+
+def check_parity(ours, ref, atol=1e-9):
+    """stats / precision / recall 배열 비교 → 최대 차이"""
+    diffs = [
+        np.abs(np.asarray(ours["stats"]) - ref.stats).max(),
+        np.abs(ours["precision"] - ref.eval["precision"]).max(),
+        np.abs(ours["recall"] - ref.eval["recall"]).max(),
+    ]
+    return max(diffs) <= atol, max(diffs)
+
+def main():
+    p = argparse.ArgumentParser("src.coco_metrics parity check & benchmark vs pycocotools COCOeval")
+    p.add_argument('--ann_json',  default=None, help='실제 GT로 비교 (--pred_json과 같이 지정)')
+    p.add_argument('--pred_json', default=None)
+    p.add_argument('--images',    type=int, default=500, help='랜덤 데이터셋 이미지 수')
+    p.add_argument('--classes',   type=int, default=73)
+    p.add_argument('--cases',     type=int, default=5,   help='랜덤 데이터셋 개수')
+    p.add_argument('--seed',      type=int, default=0)
+    args = p.parse_args()
+
+    if args.ann_json:
+        with io.open(args.ann_json, 'r', encoding='utf-8', errors='ignore') as f:
+            gt = json.load(f)
+        with io.open(args.pred_json, 'r', encoding='utf-8') as f:
+            results = json.load(f)
+        cases = [(gt, results)]
+    else:
+        rng = np.random.default_rng(args.seed)
+        cases = [make_dataset(rng, args.images, args.classes) for _ in range(args.cases)]
+
+    fails, t_ref, t_ours = 0, 0.0, 0.0
+    for i, (gt, results) in enumerate(cases):
+        start = time.perf_counter()
+        ref = pycocotools_eval(gt, results)
+        t_ref += time.perf_counter() - start
+        start = time.perf_counter()
+        ours = coco_evaluate(gt, results)
+        t_ours += time.perf_counter() - start
+        ok, diff = check_parity(ours, ref)
+        fails += not ok
+        print(f"[parity] case {i}: {len(results)} dets, mAP50-95 {ours['mAP50-95']:.6f} / {ref.stats[0]:.6f}, "
+              f"max diff {diff:.2e} → {'OK' if ok else 'MISMATCH'}")
+    print(f"[parity] {len(cases) - fails}/{len(cases)} 일치")
+    print(f"[bench] pycocotools: {t_ref / len(cases) * 1000:.1f} ms/case, src.coco_metrics: {t_ours / len(cases) * 1000:.1f} ms/case "
+          f"({t_ref / t_ours:.1f}x)")
+
+    if fails:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
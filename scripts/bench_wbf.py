@@ -0,0 +1,81 @@
+import time
+import argparse
+import numpy as np
+import ensemble_boxes
+from src.wbf import weighted_boxes_fusion, nms
+
+def make_ensemble(rng, n_models, n_objects, n_classes):
+    """같은 객체들을 모델마다 조금씩 흔들어서 만든 가짜 앙상블 예측 (정규화 xyxy)"""
+    centers = rng.uniform(0.1, 0.9, (n_objects, 2))
+    sizes = rng.uniform(0.03, 0.2, (n_objects, 2))
+    classes = rng.integers(0, n_classes, n_objects)
+
+    boxes_list, scores_list, labels_list = [], [], []
+    for _ in range(n_models):
+        seen = rng.random(n_objects) < 0.9
+        jitter = rng.normal(0, 0.01, (n_objects, 4))
+        boxes = np.concatenate([centers - sizes / 2, centers + sizes / 2], axis=1) + jitter
+        labels = np.where(rng.random(n_objects) < 0.05, rng.integers(0, n_classes, n_objects), classes)
+        boxes_list.append(boxes[seen])
+        scores_list.append(rng.uniform(0.05, 1.0, n_objects)[seen])
+        labels_list.append(labels[seen])
+    return boxes_list, scores_list, labels_list
+
+def check_parity(ours, ref, atol=1e-5):
+    """(boxes, scores, labels) 두 결과가 같은지 비교"""
+    if len(ours[0]) != len(ref[0]):
+        return False
+    return (
+        np.allclose(ours[0], ref[0], atol=atol)
+        and np.allclose(ours[1], ref[1], atol=atol)
+        and np.array_equal(np.asarray(ours[2], dtype=int), np.asarray(ref[2], dtype=int))
+    )
+
+def bench(fn, cases, **kwargs):
+    start = time.perf_counter()
+    for boxes, scores, labels in cases:
+        fn(boxes, scores, labels, **kwargs)
+    return (time.perf_counter() - start) / len(cases) * 1000
+
+def main():
+    p = argparse.ArgumentParser("src.wbf parity check & micro-benchmark vs ensemble_boxes")
+    p.add_argument('--models',   type=int,   default=5,   help='앙상블 모델 수 (TTA 포함)')
+    p.add_argument('--objects',  type=int,   default=40,  help='이미지당 객체 수')
+    p.add_argument('--classes',  type=int,   default=73)
+    p.add_argument('--cases',    type=int,   default=200, help='비교할 랜덤 이미지 수')
+    p.add_argument('--iou_thr',  type=float, default=0.55)
+    p.add_argument('--skip_thr', type=float, default=0.1)
+    p.add_argument('--seed',     type=int,   default=0)
+    args = p.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    cases = [make_ensemble(rng, args.models, args.objects, args.classes) for _ in range(args.cases)]
+
+    # 1) parity
+    fails = {'wbf_avg': 0, 'wbf_max': 0, 'nms': 0}
+    for boxes, scores, labels in cases:
+        for conf_type in ('avg', 'max'):
+            ours = weighted_boxes_fusion(boxes, scores, labels, iou_thr=args.iou_thr,
+                                         skip_box_thr=args.skip_thr, conf_type=conf_type)
+            ref = ensemble_boxes.weighted_boxes_fusion(boxes, scores, labels, iou_thr=args.iou_thr,
+                                                       skip_box_thr=args.skip_thr, conf_type=conf_type)
+            fails[f'wbf_{conf_type}'] += not check_parity(ours, ref)
+        fails['nms'] += not check_parity(nms(boxes, scores, labels, iou_thr=args.iou_thr),
+                                         ensemble_boxes.nms(boxes, scores, labels, iou_thr=args.iou_thr))
+    for name, n_fail in fails.items():
+        print(f"[parity] {name:8s}: {args.cases - n_fail}/{args.cases} 일치")
+
+    # 2) micro-benchmark
+    kwargs = dict(iou_thr=args.iou_thr, skip_box_thr=args.skip_thr)
+    t_ref = bench(ensemble_boxes.weighted_boxes_fusion, cases, **kwargs)
+    t_ours = bench(weighted_boxes_fusion, cases, **kwargs)
+    print(f"[bench] WBF ensemble_boxes: {t_ref:.3f} ms/img, src.wbf: {t_ours:.3f} ms/img ({t_ref / t_ours:.1f}x)")
+    t_ref = bench(ensemble_boxes.nms, cases, iou_thr=args.iou_thr)
+    t_ours = bench(nms, cases, iou_thr=args.iou_thr)
+    print(f"[bench] NMS ensemble_boxes: {t_ref:.3f} ms/img, src.wbf: {t_ours:.3f} ms/img ({t_ref / t_ours:.1f}x)")
+
+    if any(fails.values()):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
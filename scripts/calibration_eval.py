@@ -1,110 +1,103 @@
 import io, json, argparse
+from collections import defaultdict
 import numpy as np
-import matplotlib.pyplot as plt
-from pycocotools.coco import COCO
-from pycocotools.cocoeval import COCOeval
 
-def compute_ece(scores, correctness, bins=10):
+from src.calibration import STRATEGIES, CalibrationStats, save_reliability_diagram
+from src.coco_metrics import coco_evaluate, summary_lines
+from src.matching import METHODS, match_coco
+from src.sinks import read_jsonl_rows
+
+def iter_pred_chunks(pred_path, chunk_size):
     """
-    scores: 예측 confidence 배열 (np.ndarray)
-    correctness: TP(1)/FP(0) 배열 (np.ndarray)
-    bins: bin 개수
+    예측을 이미지 경계에서 끊은 chunk(COCO result 리스트)로 순서대로 반환
+    - .jsonl (src.sinks.JsonlSink, inference.py 출력): 파일 전체를 읽지 않고 스트리밍
+      (inference.py처럼 같은 이미지의 행이 연속으로 기록돼 있어야 greedy/hungarian 매칭이 정확)
+    - .json (COCO result 배열): 전체를 읽은 뒤 같은 이미지끼리 모아서 chunk로 자름
     """
-    bin_edges = np.linspace(0,1,bins+1)
-    ece = 0.0
-    for i in range(bins):
-        mask = (scores >= bin_edges[i]) & (scores < bin_edges[i+1])
-        if mask.sum() == 0:
-            continue
-        acc  = correctness[mask].mean()
-        conf = scores[mask].mean()
-        ece += abs(acc - conf) * mask.sum() / len(scores)
-    return ece
+    if pred_path.endswith('.jsonl'):
+        preds = ({"image_id": image_id, "category_id": category_id, "bbox": [x, y, w, h], "score": score}
+                 for _, image_id, category_id, x, y, w, h, score in read_jsonl_rows(pred_path))
+    else:
+        with io.open(pred_path, 'r', encoding='utf-8', errors='ignore') as f:
+            preds = json.load(f)
+        order = defaultdict(list)
+        for pred in preds:
+            order[pred['image_id']].append(pred)
+        preds = (pred for group in order.values() for pred in group)
+
+    chunk = []
+    for pred in preds:
+        if len(chunk) >= chunk_size and pred['image_id'] != chunk[-1]['image_id']:
+            yield chunk
+            chunk = []
+        chunk.append(pred)
+    if chunk:
+        yield chunk
 
 def main():
     p = argparse.ArgumentParser()
     p.add_argument('--ann_json',  required=True, help='GT COCO annotations.json')
-    p.add_argument('--pred_json', required=True, help='your predictions in COCO JSON')
+    p.add_argument('--pred_json', required=True, help='your predictions in COCO JSON (또는 inference.py의 .jsonl)')
     p.add_argument('--iou_thr',   type=float, default=0.5)
     p.add_argument('--bins',      type=int,   default=10)
+    p.add_argument('--strategy',  choices=STRATEGIES, default='uniform',
+                   help='uniform=같은 폭 bin, quantile=bin마다 예측 개수가 같도록 (equal-mass)')
+    p.add_argument('--match',     choices=('best',) + METHODS, default='best',
+                   help='TP 판정: best=같은 클래스 GT와 최대 IoU가 iou_thr 이상, greedy/hungarian=GT와 1:1 매칭')
+    p.add_argument('--per_class', action='store_true', help='클래스별 ECE 출력 (ECE 큰 순)')
+    p.add_argument('--n_boot',    type=int,   default=200, help='부트스트랩 반복 수 (0이면 신뢰구간 계산 안 함)')
+    p.add_argument('--ci',        type=float, default=0.95, help='신뢰구간 수준')
+    p.add_argument('--seed',      type=int,   default=0)
+    p.add_argument('--chunk_size', type=int,  default=50000, help='한 번에 매칭·누적할 예측 수 (이미지 단위로 끊음)')
+    p.add_argument('--plot_path', default='reliability_diagram.png', help='Reliability Diagram PNG 저장 경로 ("" 이면 저장 안 함)')
+    p.add_argument('--no_map',    action='store_true', help='COCO mAP 계산 생략 (.jsonl 입력은 항상 생략)')
     args = p.parse_args()
 
-    # 1) GT 어노테이션을 UTF-8로 열어서 coco.dataset에 직접 주입
+    # 1) GT 어노테이션을 UTF-8로 로드 → 이미지별 GT 인덱스
     with io.open(args.ann_json, 'r', encoding='utf-8', errors='ignore') as f:
         ann = json.load(f)
-    ann.setdefault('info', {})    # info 필드 없으면 빈 dict 채우기
-    coco_gt = COCO()
-    coco_gt.dataset = ann
-    coco_gt.createIndex()
-
-    # 2) prediction JSON load
-    with io.open(args.pred_json, 'r', encoding='utf-8', errors='ignore') as f:
-        preds = json.load(f)
-    coco_dt = coco_gt.loadRes(preds)
-
-    # 3) COCOeval 실행
-    evaluator = COCOeval(coco_gt, coco_dt, iouType='bbox')
-    evaluator.params.imgIds = sorted(coco_gt.getImgIds())
-    evaluator.evaluate(); evaluator.accumulate(); evaluator.summarize()
-
-    # 3-1) ECE 계산을 위한 scores / correct 수집
-    scores = []
-    correct = []
-    for pred in preds:
-        img_id = pred['image_id']
-        cls    = pred['category_id']
-        bbox   = pred['bbox']   # [x,y,w,h]
-        score  = pred['score']
+    gt_by_image = defaultdict(list)
+    for a in ann['annotations']:
+        gt_by_image[a['image_id']].append(a)
+    cat_names = {c['id']: c.get('name', str(c['id'])) for c in ann.get('categories', [])}
 
-        # 같은 이미지·클래스의 GT 박스들
-        gt_boxes = [
-            g['bbox'] for g in ann['annotations']
-            if g['image_id']==img_id and g['category_id']==cls
-        ]
-        # best IoU 계산
-        best_iou = 0
-        for gb in gt_boxes:
-            xa = max(bbox[0], gb[0]); ya = max(bbox[1], gb[1])
-            xb = min(bbox[0]+bbox[2], gb[0]+gb[2])
-            yb = min(bbox[1]+bbox[3], gb[1]+gb[3])
-            inter = max(0, xb-xa) * max(0, yb-ya)
-            union = bbox[2]*bbox[3] + gb[2]*gb[3] - inter
-            best_iou = max(best_iou, inter/union if union>0 else 0)
-        is_tp = best_iou >= args.iou_thr
-        scores.append(score)
-        correct.append(1 if is_tp else 0)
+    # 2) COCO mAP (src.coco_metrics, pycocotools COCOeval과 같은 값) - 전체 예측이 필요하므로 .json 입력만
+    if not args.no_map and not args.pred_json.endswith('.jsonl'):
+        with io.open(args.pred_json, 'r', encoding='utf-8', errors='ignore') as f:
+            preds = json.load(f)
+        print("\n".join(summary_lines(coco_evaluate(ann, preds))))
+        del preds
 
-    scores  = np.array(scores)
-    correct = np.array(correct)
+    # 3) chunk마다 TP 판정 (같은 이미지·클래스끼리 IoU 행렬로 매칭) → bin 통계에 누적
+    stats = CalibrationStats(n_boot=args.n_boot, seed=args.seed)
+    method = 'greedy' if args.match == 'best' else args.match
+    for chunk in iter_pred_chunks(args.pred_json, args.chunk_size):
+        gts = [a for image_id in dict.fromkeys(d['image_id'] for d in chunk) for a in gt_by_image.get(image_id, ())]
+        m = match_coco(gts, chunk, args.iou_thr, method)
+        correct = m['dt_best_iou'] >= args.iou_thr if args.match == 'best' else m['tp']
+        stats.update([d['score'] for d in chunk], correct, [d['category_id'] for d in chunk])
 
     # 4) ECE 계산 및 출력
-    ece = compute_ece(scores, correct, bins=args.bins)
-    print(f"\nECE ({args.bins} bins): {ece:.4f}")
+    res = stats.result(args.bins, args.strategy, args.ci)
+    ci = f" ({args.ci:.0%} CI {res['ece_ci'][0]:.4f} ~ {res['ece_ci'][1]:.4f})" if res['ece_ci'] else ''
+    print(f"\nECE ({args.bins} bins, {args.strategy}): {res['ece']:.4f}{ci}")
+    print(f"MCE: {res['mce']:.4f}  (예측 {res['n']}개)")
+    b = res['bins']
+    for i in range(len(b['count'])):
+        if b['count'][i]:
+            print(f"  [{b['edges'][i]:.3f}, {b['edges'][i + 1]:.3f})  n={b['count'][i]:6d}  "
+                  f"conf={b['conf'][i]:.3f}  acc={b['acc'][i]:.3f}")
 
-    # 5) Reliability Diagram 그리기
-    edges   = np.linspace(0,1,args.bins+1)
-    centers = (edges[:-1] + edges[1:]) / 2
-    avg_conf, avg_acc = [], []
-    for i in range(args.bins):
-        m = (scores >= edges[i]) & (scores < edges[i+1])
-        if m.sum() > 0:
-            avg_conf.append(scores[m].mean())
-            avg_acc.append(correct[m].mean())
-        else:
-            avg_conf.append(np.nan)
-            avg_acc.append(np.nan)
+    if args.per_class:
+        print("\n[클래스별 ECE]")
+        for cid, r in sorted(res['per_class'].items(), key=lambda kv: -kv[1]['ece']):
+            print(f"  {cid:>6} {cat_names.get(cid, '')[:30]:30s} n={r['n']:6d}  ECE={r['ece']:.4f}  MCE={r['mce']:.4f}")
 
-    plt.figure()
-    plt.plot(centers, avg_conf, label='avg_conf', marker='o')
-    plt.plot(centers, avg_acc,  label='avg_acc',  marker='x')
-    plt.plot([0,1],[0,1],'--',    label='ideal')
-    plt.xlabel('Confidence bin')
-    plt.ylabel('Value')
-    plt.title('Reliability Diagram')
-    plt.legend()
-    plt.tight_layout()
-    plt.show()
+    # 5) Reliability Diagram 저장 (화면 없이 PNG로)
+    if args.plot_path:
+        save_reliability_diagram(res, args.plot_path)
+        print(f"\nReliability Diagram → {args.plot_path}")
 
 
 if __name__=='__main__':
-    main()
\ No newline at end of file
+    main()
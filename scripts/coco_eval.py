@@ -1,6 +1,38 @@
-import io, json, argparse, yaml
-from pycocotools.coco import COCO
-from pycocotools.cocoeval import COCOeval
+import io, json, argparse
+import numpy as np
+from src.coco_metrics import coco_evaluate, load_coco_gt, summary_lines, per_class_lines
+
+def evaluate(gt, pred_json, iou_type="bbox", per_class=False):
+    """
+    COCOeval summarize와 같은 출력 후 stats 반환 (stats[0]=mAP50-95, stats[1]=mAP50)
+    bbox는 src.coco_metrics (pycocotools와 같은 값), segm은 pycocotools COCOeval
+    """
+    with io.open(pred_json, 'r', encoding='utf-8') as f:
+        preds = json.load(f)
+    if iou_type == "bbox":
+        res = coco_evaluate(gt, preds)
+        print("\n".join(summary_lines(res)))
+        if per_class:
+            print("\n".join(per_class_lines(res)))
+        return np.array(res["stats"])
+
+    from pycocotools.coco import COCO
+    from pycocotools.cocoeval import COCOeval
+    coco_gt = COCO()
+    coco_gt.dataset = gt
+    coco_gt.createIndex()
+    coco_dt = coco_gt.loadRes(preds)
+    evaler = COCOeval(coco_gt, coco_dt, iouType=iou_type)
+    evaler.params.imgIds = sorted(coco_gt.getImgIds())
+    evaler.evaluate()
+    evaler.accumulate()
+    evaler.summarize()
+    return evaler.stats
+
+def accuracy_gate(stats, baseline_stats, max_drop):
+    """baseline 대비 mAP50-95 하락 폭이 max_drop(절대값) 이하인지 (통과 여부, 하락 폭)"""
+    drop = float(baseline_stats[0] - stats[0])
+    return drop <= max_drop, drop
 
 def main():
     p = argparse.ArgumentParser()
@@ -8,36 +40,22 @@ def main():
     p.add_argument("--pred_json", required=True)
     p.add_argument("--data_yaml", default="data.yaml")
     p.add_argument("--iou_type",  choices=["bbox","segm"], default="bbox")
+    p.add_argument("--baseline_json", default=None, help="비교할 기준 예측 (예: fp32 모델), 지정 시 정확도 gate 수행")
+    p.add_argument("--max_drop",  type=float, default=0.01, help="허용하는 mAP50-95 하락 폭 (절대값)")
+    p.add_argument("--per_class", action="store_true", help="클래스별 AP50-95 / AP50 / AP75 표 출력 (bbox)")
     args = p.parse_args()
 
-    # 1) GT load + 필드 보강
-    with io.open(args.ann_json, 'r', encoding='utf-8', errors='ignore') as f:
-        ann = json.load(f)
-    ann.setdefault("info", {})
-    ann.setdefault("licenses", [])
-    if "categories" not in ann:
-        names = yaml.safe_load(open(args.data_yaml))["names"]
-        ann["categories"] = [
-            {"id": int(k), "name": names[k], "supercategory": ""}
-            for k in names
-        ]
+    gt = load_coco_gt(args.ann_json, args.data_yaml)
+    stats = evaluate(gt, args.pred_json, args.iou_type, args.per_class)
 
-    # 2) COCO 인덱스 생성
-    coco_gt = COCO()
-    coco_gt.dataset = ann
-    coco_gt.createIndex()
-
-    # 3) 예측 load
-    with io.open(args.pred_json, 'r', encoding='utf-8') as f:
-        preds = json.load(f)
-    coco_dt = coco_gt.loadRes(preds)
-
-    # 4) eval
-    evaler = COCOeval(coco_gt, coco_dt, iouType=args.iou_type)
-    evaler.params.imgIds = sorted(coco_gt.getImgIds())
-    evaler.evaluate()
-    evaler.accumulate()
-    evaler.summarize()
+    if args.baseline_json:
+        print("\n[baseline]")
+        baseline_stats = evaluate(gt, args.baseline_json, args.iou_type)
+        ok, drop = accuracy_gate(stats, baseline_stats, args.max_drop)
+        print(f"\n[gate] mAP50-95 {baseline_stats[0]:.4f} (baseline) → {stats[0]:.4f}, "
+              f"drop={drop:.4f} (max {args.max_drop}) → {'PASS' if ok else 'REJECT'}")
+        if not ok:
+            raise SystemExit(1)
 
 if __name__=="__main__":
-    main()
\ No newline at end of file
+    main()
@@ -4,17 +4,7 @@ import cv2
 import numpy as np
 from tqdm import tqdm
 
-def iou(boxA, boxB):
-    # box = [x, y, w, h]
-    xA = max(boxA[0], boxB[0])
-    yA = max(boxA[1], boxB[1])
-    xB = min(boxA[0]+boxA[2], boxB[0]+boxB[2])
-    yB = min(boxA[1]+boxA[3], boxB[1]+boxB[3])
-    interW = max(0, xB - xA)
-    interH = max(0, yB - yA)
-    inter = interW * interH
-    union = boxA[2]*boxA[3] + boxB[2]*boxB[3] - inter
-    return inter/union if union>0 else 0
+from src.matching import METHODS, match_coco
 
 def main():
     import argparse
@@ -24,6 +14,8 @@ def main():
     p.add_argument('--img_dir',   required=True, help='data/processed/val/images')
     p.add_argument('--out_dir',   default='fn_examples', help='저장할 폴더')
     p.add_argument('--iou_thr',   type=float, default=0.5, help='IoU FN 판정 임계')
+    p.add_argument('--match',     choices=('best',) + METHODS, default='best',
+                   help='FN 판정: best=같은 클래스 예측 중 IoU가 iou_thr 이상인 게 없음, greedy/hungarian=1:1 매칭에서 남은 GT')
     args = p.parse_args()
 
     os.makedirs(args.out_dir, exist_ok=True)
@@ -34,18 +26,16 @@ def main():
 
     # 이미지 메타
     id2file = {img['id']: img['file_name'] for img in coco['images']}
-    # GT 어노테이션
-    gt_by_img = {}
-    for ann in coco['annotations']:
-        gt_by_img.setdefault(ann['image_id'], []).append(ann)
-
-    # Pred by image
-    pred_by_img = {}
-    for d in preds:
-        pred_by_img.setdefault(d['image_id'], []).append(d)
+    # 같은 이미지·클래스끼리 묶어서 IoU 행렬로 한 번에 매칭 → FN GT만 이미지별로 모음
+    m = match_coco(coco['annotations'], preds, args.iou_thr, 'greedy' if args.match == 'best' else args.match)
+    is_fn = m['gt_best_iou'] < args.iou_thr if args.match == 'best' else m['fn']
+    fn_by_img = {}
+    for ann, fn in zip(coco['annotations'], is_fn.tolist()):
+        if fn:
+            fn_by_img.setdefault(ann['image_id'], []).append(ann)
 
     fn_count = 0
-    for img_id, gt_anns in tqdm(gt_by_img.items()):
+    for img_id, fn_anns in tqdm(fn_by_img.items()):
         file_name = id2file[img_id]
         img_path = os.path.join(args.img_dir, file_name)
         img = cv2.imread(img_path)
@@ -53,17 +43,10 @@ def main():
             print(f"[WARN] 이미지를 못 읽음: {img_path}")
             continue
 
-        preds_this = pred_by_img.get(img_id, [])
-        for ann in gt_anns:
+        for ann in fn_anns:
             gt_box = ann['bbox']      # [x,y,w,h]
             gt_cat = ann['category_id']
 
-            # 같은 이미지 same class 예측 중 IoU>thr 인 게 있는지 찾기
-            hits = [p for p in preds_this if p['category_id']==gt_cat
-                                        and iou(gt_box, p['bbox'])>=args.iou_thr]
-            if hits:
-                continue  # FN 아님
-
             # 누락된 FN
             fn_count += 1
             # 저장할 폴더: fn_examples/{category_id}/
@@ -1,27 +1,28 @@
 import csv
-import json
+from src.sinks import CocoResultsSink
 
-def csv_to_coco_res(csv_path, json_path):
-    results = []
-    with open(csv_path, newline='') as f:
+def csv_to_coco_res(csv_path, json_path, chunk_size=10000):
+    """
+    예측 CSV → COCO result JSON
+    CSV를 한 줄씩 읽어서 청크 단위로 흘려 쓰므로 파일 크기와 상관없이 메모리 일정
+    (inference.py에서 --extra_outputs preds.json 으로 바로 만들면 이 변환은 필요 없음)
+    """
+    with open(csv_path, newline='', encoding='utf-8-sig') as f, CocoResultsSink(json_path, chunk_size) as sink:
         reader = csv.DictReader(f)
         for row in reader:
             # COCO result 포맷:
             # { "image_id": int, "category_id": int, "bbox": [x,y,w,h], "score": float }
-            x = float(row['bbox_x'])
-            y = float(row['bbox_y'])
-            w = float(row['bbox_w'])
-            h = float(row['bbox_h'])
-            results.append({
-                "image_id":    int(row['image_id']),
-                "category_id": int(row['category_id']),
-                "bbox":        [x, y, w, h],
-                "score":       float(row['score'])
-            })
-    # JSON으로 저장
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
-    print(f"{json_path} 생성 완료 ({len(results)} items)")
+            sink.write((
+                None,
+                int(row['image_id']),
+                int(row['category_id']),
+                float(row['bbox_x']),
+                float(row['bbox_y']),
+                float(row['bbox_w']),
+                float(row['bbox_h']),
+                float(row['score'])
+            ))
+    print(f"{json_path} 생성 완료 ({sink.count} items)")
 
 if __name__ == "__main__":
     import argparse
@@ -29,4 +30,4 @@ if __name__ == "__main__":
     p.add_argument('--csv',    default='holdout_preds.csv', help='입력 CSV 파일')
     p.add_argument('--output', default='holdout_preds.json', help='생성할 JSON 파일')
     args = p.parse_args()
-    csv_to_coco_res(args.csv, args.output)
\ No newline at end of file
+    csv_to_coco_res(args.csv, args.output)
@@ -1,10 +1,13 @@
 import os
 import json
 import argparse
-from tqdm import tqdm
 import yaml
+import numpy as np
 
-def yolo2coco(img_dir, label_dir, data_yaml, out_json):
+from src.coco_yolo import read_yolo_labels, yolo_to_coco_annotations
+from src.imgsize import CACHE_NAME, image_sizes
+
+def yolo2coco(img_dir, label_dir, data_yaml, out_json, workers=16, size_cache=None):
     # --- 0) 빈 리스트 미리 선언 ---
     images = []
     annotations = []
@@ -24,43 +27,37 @@ def yolo2coco(img_dir, label_dir, data_yaml, out_json):
       for cid in names
     ]
 
-    # 2) images 리스트 채우기
-    for fname in sorted(os.listdir(img_dir)):
-        if not fname.lower().endswith(('.jpg', '.png', '.jpeg')):
+    # 2) images 리스트 채우기 (픽셀 디코딩 없이 PNG/JPEG 헤더에서 실제 크기를 읽음, 결과는 캐시에 저장)
+    fnames = [fn for fn in sorted(os.listdir(img_dir)) if fn.lower().endswith(('.jpg', '.png', '.jpeg'))]
+    if size_cache is None:
+        size_cache = os.path.join(img_dir, CACHE_NAME)
+    path_sizes = image_sizes([os.path.join(img_dir, fn) for fn in fnames], cache_path=size_cache, workers=workers)
+    sizes = {}
+    for fname in fnames:
+        wh = path_sizes.get(os.path.join(img_dir, fname))
+        if wh is None:
+            print(f"[WARN] 이미지 크기를 읽지 못해 건너뜀: {fname}")
             continue
         img_id = os.path.splitext(fname)[0]
+        sizes[img_id] = wh
         images.append({
           "id": img_id,
           "file_name": fname,
-          "width": 640,   # 실제라면 cv2.imread한 후 shape으로 대체
-          "height": 512
+          "width": wh[0],
+          "height": wh[1]
         })
 
-    # 3) annotations 리스트 채우기
-    for fname in tqdm(sorted(os.listdir(label_dir))):
-        if not fname.lower().endswith('.txt'):
-            continue
-        img_id = os.path.splitext(fname)[0]
-        with open(os.path.join(label_dir, fname)) as f:
-            for line in f:
-                cls, xc, yc, w, h = map(float, line.split())
-                cls = int(cls)
-                # YOLO normalized -> COCO absolute
-                iw, ih = 640, 512
-                bx = (xc - w/2) * iw
-                by = (yc - h/2) * ih
-                bw = w * iw
-                bh = h * ih
-
-                annotations.append({
-                  "id": ann_id,
-                  "image_id": img_id,
-                  "category_id": int(name2cat(cls)),
-                  "bbox": [bx, by, bw, bh],
-                  "area": bw*bh,
-                  "iscrowd": 0
-                })
-                ann_id += 1
+    # 3) annotations 리스트 채우기 (라벨 파일은 스레드 풀로 읽고 좌표 변환은 NumPy로 한 번에)
+    labels = read_yolo_labels(label_dir, workers=workers)
+    orphans = [stem for stem, _ in labels if stem not in sizes]
+    if orphans:
+        print(f"[WARN] 이미지가 없는 라벨 {len(orphans)}개 건너뜀 (예: {orphans[0]}.txt)")
+        labels = [(stem, arr) for stem, arr in labels if stem in sizes]
+    # YOLO normalized -> COCO absolute
+    cls_ids = {int(c) for _, arr in labels for c in np.unique(arr[:, 0])}
+    annotations = yolo_to_coco_annotations(
+        labels, sizes, {c: int(name2cat(c)) for c in cls_ids}, start_id=ann_id
+    )
 
     coco = {
       "images": images,
@@ -78,10 +75,14 @@ if __name__ == "__main__":
     p.add_argument('--label_dir', required=True)
     p.add_argument('--data_yaml', required=True)
     p.add_argument('--out_json',  required=True)
+    p.add_argument('--workers',   type=int, default=16, help='이미지 헤더 / 라벨 읽기 스레드 수')
+    p.add_argument('--size_cache', default=None, help=f'이미지 크기 캐시 경로 (기본: <img_dir>/{CACHE_NAME})')
     args = p.parse_args()
     yolo2coco(
       args.img_dir,
       args.label_dir,
       args.data_yaml,
-      args.out_json
+      args.out_json,
+      workers=args.workers,
+      size_cache=args.size_cache
     )
\ No newline at end of file
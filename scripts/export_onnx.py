@@ -0,0 +1,44 @@
+import os
+import argparse
+from models.model import export_onnx, check_onnx_parity
+
+IMG_EXTS = (".png", ".jpg", ".jpeg")
+
+def main():
+    p = argparse.ArgumentParser("Export .pt to ONNX (cached next to the .pt) and check parity with PyTorch")
+    p.add_argument('--weights',    required=True, nargs='+', help='.pt 체크포인트 (여러 개 가능)')
+    p.add_argument('--imgsz',      type=int,   default=640)
+    p.add_argument('--batch',      type=int,   default=0, help='0: dynamic batch/shape, N: batch N 고정')
+    p.add_argument('--opset',      type=int,   default=None)
+    p.add_argument('--force',      action='store_true', help='캐시된 export가 있어도 다시 export')
+    p.add_argument('--check_dir',  default=None, help='parity 확인용 이미지 폴더 (예: data/images/val_images)')
+    p.add_argument('--n_check',    type=int,   default=20)
+    p.add_argument('--box_tol',    type=float, default=2.0, help='허용 좌표 차이 (px)')
+    p.add_argument('--score_tol',  type=float, default=0.02)
+    args = p.parse_args()
+
+    img_paths = []
+    if args.check_dir:
+        img_paths = sorted(
+            os.path.join(args.check_dir, fn) for fn in os.listdir(args.check_dir)
+            if fn.lower().endswith(IMG_EXTS)
+        )[:args.n_check]
+
+    failed = False
+    for pt_path in args.weights:
+        onnx_path = export_onnx(pt_path, imgsz=args.imgsz, batch=args.batch, opset=args.opset, force=args.force)
+        print(f"{pt_path} → {onnx_path}")
+        if not img_paths:
+            continue
+        r = check_onnx_parity(pt_path, onnx_path, img_paths, imgsz=args.imgsz, batch=args.batch,
+                              box_tol=args.box_tol, score_tol=args.score_tol)
+        print(f"  [parity] {r['images']} images, boxes torch={r['torch_boxes']} onnx={r['onnx_boxes']}, "
+              f"unmatched={r['unmatched']}, max box diff={r['max_box_diff']:.3f}px, "
+              f"max score diff={r['max_score_diff']:.4f} → {'OK' if r['ok'] else 'FAIL'}")
+        failed |= not r['ok']
+
+    if failed:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import time
+import argparse
+from collections import defaultdict
+import numpy as np
+
+from models.model import BACKENDS
+from src.calibration import CALIB_METHODS, CalibrationStats, ScoreCalibrator, calibration_artifact_path
+from src.inference import load_cat_id_map, list_images, open_cache, resolve_model_paths, load_models
+from src.matching import match_coco
+from src.coco_metrics import load_coco_gt
+from src.sweep import collect_raw, map_file_to_id
+
+def model_detections(raw, m, gt_by_image, cat_id_map, file_to_id, iou_thr):
+    """
+    m번째 모델의 raw 검출(WBF 전)을 GT와 greedy 1:1 매칭 → (점수, TP 여부, 클래스 인덱스) 배열
+    클래스는 모델 클래스 인덱스 그대로 (inference.py에서 WBF 전에 보정할 때 쓰는 값)
+    """
+    scores, tp, classes = [], [], []
+    for img_name, _, _, dets in raw:
+        image_id = file_to_id[img_name]
+        data = dets[m]
+        if not len(data):
+            continue
+        cls_idx = data[:, 5].astype(int)
+        preds = [{"image_id": image_id, "category_id": cat_id_map.get(c, c),
+                  "bbox": [x1, y1, x2 - x1, y2 - y1], "score": s}
+                 for (x1, y1, x2, y2, s), c in zip(data[:, :5].tolist(), cls_idx.tolist())]
+        scores.append(data[:, 4])
+        tp.append(match_coco(gt_by_image.get(image_id, []), preds, iou_thr, 'greedy')['tp'])
+        classes.append(cls_idx)
+    if not scores:
+        return np.zeros(0), np.zeros(0, dtype=bool), np.zeros(0, dtype=int)
+    return np.concatenate(scores), np.concatenate(tp), np.concatenate(classes)
+
+def main():
+    p = argparse.ArgumentParser("holdout 예측으로 클래스별 score 보정(temperature / isotonic) 학습 → <ckpt>_calib.json")
+    p.add_argument("--checkpoint", type=str, required=True)
+    p.add_argument("--ensemble_ckpts", nargs='+', default=[], help="체크포인트마다 따로 보정 매핑을 만듦")
+    p.add_argument("--img_folder", type=str, required=True, help="holdout 이미지 폴더 (학습에 안 쓴 이미지)")
+    p.add_argument("--ann_json", type=str, required=True, help="holdout COCO GT json")
+    p.add_argument("--data_yaml", type=str, default="data.yaml")
+    p.add_argument("--method", choices=CALIB_METHODS, default="temperature")
+    p.add_argument("--min_count", type=int, default=50, help="클래스별 매핑을 따로 맞출 최소 검출 수 (미만이면 전체 매핑 사용)")
+    p.add_argument("--iou_thr", type=float, default=0.5, help="TP 판정 IoU")
+    p.add_argument("--resolution", type=int, default=1000, help="LUT 구간 수")
+    p.add_argument("--bins", type=int, default=10, help="보정 전후 ECE 출력용 bin 수")
+    p.add_argument("--tta", action="store_true")
+    p.add_argument("--conf_floor", type=float, default=0.001, help="holdout 예측 최저 conf")
+    p.add_argument("--nms_iou", type=float, default=0.45, help="모델 내부 NMS IoU (inference.py --nms_iou, 없으면 --iou_thresh와 같게)")
+    p.add_argument("--backend", choices=BACKENDS, default="torch", help="inference.py --backend와 같게 (점수 분포가 backend마다 다름)")
+    p.add_argument("--imgsz", type=int, default=None)
+    p.add_argument("--onnx_batch", type=int, default=0)
+    p.add_argument("--batch_size", type=int, default=16)
+    p.add_argument("--num_workers", type=int, default=4)
+    p.add_argument("--queue_depth", type=int, default=4)
+    p.add_argument("--cache_dir", type=str, default=None, help="raw 예측 캐시 폴더 (inference.py / sweep.py와 공유)")
+    p.add_argument("--cache_max_mb", type=float, default=2048)
+    args = p.parse_args()
+
+    cat_id_map = load_cat_id_map(args.data_yaml)
+    coco_gt = load_coco_gt(args.ann_json, args.data_yaml)
+    img_files = list_images(args.img_folder)
+    file_to_id = map_file_to_id(coco_gt, img_files)
+    print(f"[INFO] {len(file_to_id)}/{len(img_files)} images matched to GT.")
+    gt_by_image = defaultdict(list)
+    for a in coco_gt["annotations"]:
+        gt_by_image[a["image_id"]].append(a)
+
+    start = time.perf_counter()
+    ckpt_paths = [args.checkpoint] + args.ensemble_ckpts
+    model_paths = resolve_model_paths(args, ckpt_paths)
+    models = load_models(args, model_paths)
+    cache, ckpt_hashes = open_cache(args, model_paths)
+    raw = collect_raw(models, args, [fn for fn in img_files if fn in file_to_id], cache, ckpt_hashes)
+    print(f"[INFO] raw detections collected in {time.perf_counter() - start:.1f}s")
+
+    for m, ckpt in enumerate(ckpt_paths):
+        scores, tp, classes = model_detections(raw, m, gt_by_image, cat_id_map, file_to_id, args.iou_thr)
+        before = CalibrationStats(resolution=args.resolution)
+        before.update(scores, tp, classes)
+        calibrator = ScoreCalibrator.fit(before, args.method, args.min_count)
+
+        # 같은 holdout에서 잰 보정 후 ECE라 실제보다 낙관적인 값
+        after = CalibrationStats(resolution=args.resolution)
+        after.update(calibrator.apply(scores, classes), tp)
+        out_path = calibration_artifact_path(ckpt)
+        calibrator.save(out_path)
+        print(f"[{ckpt}] {len(scores)} dets, TP {int(tp.sum())}, class-specific mappings {len(calibrator.classes)} ({args.method})")
+        print(f"  ECE ({args.bins} bins): {before.result(args.bins)['ece']:.4f} → {after.result(args.bins)['ece']:.4f}")
+        print(f"  raw conf for --conf_thresh 0.25: {calibrator.raw_threshold(0.25):.3f} → {out_path}")
+
+if __name__ == "__main__":
+    main()
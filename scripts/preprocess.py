@@ -1,44 +1,126 @@
+import os
+import bisect
 import argparse
-import random
-import shutil
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def split_dataset(img_src, lbl_src, out_dir, ratio=0.8, seed=42):
+import numpy as np
+from tqdm import tqdm
+
+from src.build_manifest import BuildManifest
+from src.materialize import MODES, image_list_text
+
+def _walk_json(root, rel_dir=""):
+    """rel_dir 아래 JSON 파일 (파일 이름, 상대경로) 목록 (scandir 한 번씩만)"""
+    found = []
+    stack = [rel_dir]
+    while stack:
+        cur = stack.pop()
+        with os.scandir(os.path.join(root, cur)) as it:
+            for entry in it:
+                rel = f"{cur}/{entry.name}" if cur else entry.name
+                if entry.is_dir():
+                    stack.append(rel)
+                elif entry.name.endswith(".json"):
+                    found.append((entry.name, rel))
+    return found
+
+def build_json_index(lbl_src, workers=8):
+    """
+    어노테이션 트리를 한 번만 순회해서 (파일 이름, 상대경로) 목록을 이름순으로 반환
+    최상위 폴더별로 스레드 풀에서 나눠 순회
+    """
+    lbl_src = str(lbl_src)
+    with os.scandir(lbl_src) as it:
+        entries = list(it)
+    found = [(e.name, e.name) for e in entries if not e.is_dir() and e.name.endswith(".json")]
+    tops = [e.name for e in entries if e.is_dir()]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for part in pool.map(lambda d: _walk_json(lbl_src, d), tops):
+            found.extend(part)
+    found.sort()
+    return found
+
+def match_jsons(index, base):
+    """이름이 base로 시작하는 JSON 상대경로 목록 (rglob(f"{base}*.json")과 같은 결과, 이진 탐색)"""
+    i = bisect.bisect_left(index, (base,))
+    matched = []
+    while i < len(index) and index[i][0].startswith(base):
+        matched.append(index[i][1])
+        i += 1
+    return matched
+
+def drug_counts(names, jsons):
+    """이미지별 JSON의 약품 폴더(K-xxxxxx) → (이미지 수, 약품 수) 알약 개수 행렬 (JSON 하나 = 알약 하나)"""
+    drugs = [[Path(rel).parent.name for rel in jsons[name]] for name in names]
+    codes = sorted({d for ds in drugs for d in ds if d.startswith("K-")})
+    col = {code: j for j, code in enumerate(codes)}
+    counts = np.zeros((len(names), len(codes)), dtype=np.int64)
+    for i, ds in enumerate(drugs):
+        for d in ds:
+            if d in col:
+                counts[i, col[d]] += 1
+    return counts
+
+def split_dataset(img_src, lbl_src, out_dir, ratio=0.8, seed=42, incremental=False, materialize="copy",
+                  stratify=False, workers=8):
+    """
+    materialize: 이미지·JSON 배치 방식 (src.materialize.MODES)
+    'manifest'면 이미지는 복사하지 않고 out_dir/train.txt, val.txt에 원본 이미지 경로 목록만 기록 (JSON은 복사)
+    stratify: 약품별 알약 수가 train/val에 ratio 비율로 나뉘도록 반복 층화 분할 (src.splitting)
+    """
     img_src = Path(img_src)
     lbl_src = Path(lbl_src)
     out_dir = Path(out_dir)
 
     # 폴더 생성
     for split in ("train", "val"):
-        (out_dir / split / "images").mkdir(parents=True, exist_ok=True)
+        if materialize != "manifest":
+            (out_dir / split / "images").mkdir(parents=True, exist_ok=True)
         (out_dir / split / "labels").mkdir(parents=True, exist_ok=True)
 
-    # 이미지 목록 수집
-    imgs = [p.name for p in img_src.iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png")]
-    random.seed(seed)
-    random.shuffle(imgs)
+    # 증분 빌드 기록 (incremental이면 원본이 바뀐 파일만 다시 복사하고 기존 train/val 배정 유지, 이전 빌드의 orphan은 항상 삭제)
+    params = {"tool": "preprocess", "ratio": ratio, "seed": seed}
+    if stratify:
+        params["stratify"] = "iterative"
+    manifest = BuildManifest(out_dir, params, incremental=incremental)
+
+    # 이미지 목록 수집 (디렉터리 나열 순서와 무관하게 같은 split이 나오도록 정렬)
+    imgs = sorted(p.name for p in img_src.iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+
+    # 이미지별 JSON 매칭 (어노테이션 트리는 한 번만 순회)
+    index = build_json_index(lbl_src, workers)
+    jsons = {name: match_jsons(index, Path(name).stem) for name in imgs}
+    assigned = manifest.assign_split(imgs, ratio, seed, drug_counts(imgs, jsons) if stratify else None)
 
     # split
-    n_train = int(len(imgs) * ratio)
-    train_imgs = imgs[:n_train]
-    val_imgs   = imgs[n_train:]
+    train_imgs = [name for name in imgs if assigned[name] == "train"]
+    val_imgs   = [name for name in imgs if assigned[name] == "val"]
 
+    # 배치 작업 목록 (원본, 출력 상대경로, 방식)
+    json_mode = "copy" if materialize == "manifest" else materialize
+    jobs = []
     for split, subset in (("train", train_imgs), ("val", val_imgs)):
+        if materialize == "manifest":
+            manifest.write_text(f"{split}.txt", image_list_text(img_src / name for name in subset))
         for img_name in subset:
-            # 이미지 복사
-            src_img = img_src / img_name
-            dst_img = out_dir / split / "images" / img_name
-            shutil.copy(src_img, dst_img)
+            # 이미지 배치 (copy / hardlink / symlink / reflink)
+            if materialize != "manifest":
+                jobs.append((img_src / img_name, f"{split}/images/{img_name}", materialize))
+            # 해당 이미지와 매칭되는 JSON 어노테이션 전부
+            for rel in jsons[img_name]:
+                jobs.append((lbl_src / rel, f"{split}/labels/{rel}", json_mode))
 
-            # 해당 이미지와 매칭되는 JSON 어노테이션 전부 복사
-            base = Path(img_name).stem
-            for json_path in lbl_src.rglob(f"{base}*.json"):
-                rel_dir = json_path.relative_to(lbl_src).parent
-                dst_lbl_dir = out_dir / split / "labels" / rel_dir
-                dst_lbl_dir.mkdir(parents=True, exist_ok=True)
-                shutil.copy(json_path, dst_lbl_dir / json_path.name)
+    # 복사 / 링크는 I/O 대기라서 스레드 풀로 병렬 처리
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(manifest.place_file, *job) for job in jobs]
+        for fut in tqdm(as_completed(futures), total=len(futures), desc="files", unit="file"):
+            fut.result()
 
-    print(f"✔ Split complete: {len(train_imgs)} train / {len(val_imgs)} val images")
+    removed = manifest.prune()
+    manifest.save()
+    print(f"✔ Split complete: {len(train_imgs)} train / {len(val_imgs)} val images "
+          f"({materialize}, {manifest.summary(removed)})")
 
 def main():
     parser = argparse.ArgumentParser(
@@ -49,9 +131,16 @@ def main():
     parser.add_argument("--out-dir",   required=True, help="결과를 저장할 베이스 폴더")
     parser.add_argument("--ratio",     type=float, default=0.8, help="train 비율 (기본: 0.8)")
     parser.add_argument("--seed",      type=int,   default=42,  help="랜덤 시드")
+    parser.add_argument("--incremental", action="store_true",
+                        help="이전 빌드 manifest 기준으로 바뀐 이미지/JSON만 다시 복사, 없어진 파일 삭제, 기존 split 유지")
+    parser.add_argument("--materialize", choices=MODES, default="copy",
+                        help="이미지 배치 방식 (hardlink/symlink/reflink: 추가 용량 거의 없음, manifest: train.txt/val.txt 목록만 생성)")
+    parser.add_argument("--stratify",  action="store_true", help="약품(K- 폴더)별 알약 수가 train/val에 같은 비율로 나뉘도록 반복 층화 분할")
+    parser.add_argument("--workers",   type=int, default=8, help="어노테이션 순회 / 복사 스레드 수")
     args = parser.parse_args()
 
-    split_dataset(args.img_dir, args.label_dir, args.out_dir, args.ratio, args.seed)
+    split_dataset(args.img_dir, args.label_dir, args.out_dir, args.ratio, args.seed, args.incremental, args.materialize,
+                  args.stratify, args.workers)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,95 @@
+import os
+import json
+import time
+import random
+import argparse
+from models.model import export_onnx, int8_sidecar_path, onnx_fingerprint, quantize_onnx
+from src.inference import build_parser, list_images, load_cat_id_map, load_models, run_inference
+from src.sinks import CocoResultsSink
+from scripts.coco_eval import evaluate, accuracy_gate
+from src.coco_metrics import load_coco_gt
+
+def predict_to_json(model_path, args, img_files, json_path):
+    """inference.py와 같은 후처리(WBF 포함)로 COCO result JSON 생성, 걸린 시간(초) 반환"""
+    inf_args = build_parser().parse_args([
+        '--checkpoint', model_path,
+        '--img_folder', args.val_dir,
+        '--data_yaml', args.data_yaml,
+        '--conf_thresh', str(args.conf),
+        '--iou_thresh', str(args.iou),
+        '--imgsz', str(args.imgsz),
+        '--onnx_batch', str(args.batch),
+    ])
+    models = load_models(inf_args, [model_path])
+    cat_id_map = load_cat_id_map(args.data_yaml)
+    start = time.perf_counter()
+    with CocoResultsSink(json_path) as sink:
+        run_inference(models, inf_args, img_files, cat_id_map, sink)
+    return time.perf_counter() - start
+
+def main():
+    p = argparse.ArgumentParser("INT8 quantization (onnxruntime) with mAP gate against the fp32 ONNX model")
+    p.add_argument('--weights',   required=True, help='.pt 체크포인트')
+    p.add_argument('--val_dir',   default='data/images/val_images', help='보정·평가용 이미지 폴더')
+    p.add_argument('--ann_json',  required=True, help='val_dir의 COCO GT json')
+    p.add_argument('--data_yaml', default='data.yaml')
+    p.add_argument('--imgsz',     type=int,   default=640)
+    p.add_argument('--batch',     type=int,   default=0, help='ONNX 고정 batch 크기 (0: dynamic)')
+    p.add_argument('--mode',      choices=['static', 'dynamic'], default='static')
+    p.add_argument('--n_calib',   type=int,   default=100, help='static 보정에 쓸 이미지 수')
+    p.add_argument('--seed',      type=int,   default=0)
+    p.add_argument('--keep_head_int8', action='store_true', help='detect head까지 INT8로 양자화')
+    p.add_argument('--conf',      type=float, default=0.25, help='평가 시 inference.py --conf_thresh')
+    p.add_argument('--iou',       type=float, default=0.45, help='평가 시 inference.py --iou_thresh')
+    p.add_argument('--max_drop',  type=float, default=0.01, help='허용하는 mAP50-95 하락 폭 (절대값)')
+    p.add_argument('--out_dir',   default='runs/quantize')
+    args = p.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    img_files = list_images(args.val_dir)
+
+    # 1) fp32 ONNX export (캐시) → INT8
+    fp32_path = export_onnx(args.weights, imgsz=args.imgsz, batch=args.batch)
+    calib = sorted(random.Random(args.seed).sample(img_files, min(args.n_calib, len(img_files))))
+    print(f"[INFO] quantizing {fp32_path} ({args.mode}, {len(calib) if args.mode == 'static' else 0} calibration images)")
+    int8_path = quantize_onnx(
+        fp32_path, [os.path.join(args.val_dir, fn) for fn in calib],
+        imgsz=args.imgsz, mode=args.mode, batch=args.batch, exclude_head=not args.keep_head_int8
+    )
+
+    # 2) 같은 후처리로 예측 → COCO 평가
+    fp32_json = os.path.join(args.out_dir, 'fp32_preds.json')
+    int8_json = os.path.join(args.out_dir, 'int8_preds.json')
+    t_fp32 = predict_to_json(fp32_path, args, img_files, fp32_json)
+    t_int8 = predict_to_json(int8_path, args, img_files, int8_json)
+
+    coco_gt = load_coco_gt(args.ann_json, args.data_yaml)
+    print("\n[fp32]")
+    fp32_stats = evaluate(coco_gt, fp32_json)
+    print("\n[int8]")
+    int8_stats = evaluate(coco_gt, int8_json)
+    ok, drop = accuracy_gate(int8_stats, fp32_stats, args.max_drop)
+
+    n = max(len(img_files), 1)
+    print(f"\n[speed] fp32 {n / t_fp32:.2f} img/s, int8 {n / t_int8:.2f} img/s ({t_fp32 / t_int8:.2f}x)")
+    print(f"[gate] mAP50-95 {fp32_stats[0]:.4f} (fp32) → {int8_stats[0]:.4f} (int8), "
+          f"drop={drop:.4f} (max {args.max_drop}) → {'PASS' if ok else 'REJECT'}")
+
+    if not ok:
+        # gate를 통과 못 한 모델은 남기지 않음 (inference.py --backend int8에서 실수로 쓰지 않도록)
+        os.remove(int8_path)
+        raise SystemExit(1)
+
+    # 원본 ONNX 기록: .pt가 바뀌어 ONNX가 다시 export되면 find_int8_artifact가 이 모델을 거부함
+    with open(int8_sidecar_path(int8_path), 'w', encoding='utf-8') as f:
+        json.dump({
+            'weights': args.weights, 'mode': args.mode, 'imgsz': args.imgsz, 'batch': args.batch,
+            **onnx_fingerprint(fp32_path),
+            'fp32_map50_95': float(fp32_stats[0]), 'int8_map50_95': float(int8_stats[0]),
+            'fp32_map50': float(fp32_stats[1]), 'int8_map50': float(int8_stats[1]),
+            'speedup': t_fp32 / t_int8,
+        }, f, indent=2)
+    print(f"INT8 모델 저장: {int8_path}")
+
+if __name__ == "__main__":
+    main()
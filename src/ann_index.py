@@ -0,0 +1,292 @@
+import os
+import json
+import pickle
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+ANN_ROOT = 'data/raw_data/train_annotations'
+INDEX_NAME = '.ann_index.pkl'
+INDEX_VERSION = 1
+
+# 이 개수보다 적게 바뀌었으면 프로세스를 띄우는 비용이 더 커서 그냥 순서대로 파싱
+_PARALLEL_MIN_FILES = 64
+
+def _scan(root):
+    """
+    root 아래 JSON 파일 (상대경로, mtime_ns, size) 목록과 (폴더, 하위 폴더) 목록을 한 번의 순회로 수집
+    하위 폴더 목록에는 JSON이 없는 빈 K- 폴더도 포함됨 (커버리지 분석용)
+    """
+    files, dirs = [], []
+    stack = ['']
+    while stack:
+        rel_dir = stack.pop()
+        with os.scandir(os.path.join(root, rel_dir)) as it:
+            for entry in it:
+                rel = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                if entry.is_dir():
+                    stack.append(rel)
+                    if not rel_dir:
+                        dirs.append((entry.name, ''))
+                    elif os.sep not in rel_dir:
+                        dirs.append((rel_dir, entry.name))
+                elif entry.name.endswith('.json'):
+                    st = entry.stat()
+                    files.append((rel, st.st_mtime_ns, st.st_size))
+    files.sort()
+    dirs.sort()
+    return files, dirs
+
+def _scalars(d):
+    return {k: v for k, v in d.items() if not isinstance(v, (list, dict))}
+
+def _parse_file(args):
+    """JSON 하나 → (상대경로, images, boxes, categories, 오류 메시지)"""
+    root, rel = args
+    try:
+        with open(os.path.join(root, rel), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception as e:
+        return rel, [], [], [], str(e)
+
+    images = [dict(_scalars(img), json=rel) for img in data.get('images', [])]
+    boxes = []
+    for ann in data.get('annotations', []):
+        rec = dict(_scalars(ann), json=rel)
+        bbox = ann.get('bbox') or [None] * 4
+        rec['x'], rec['y'], rec['w'], rec['h'] = bbox[:4]
+        boxes.append(rec)
+    cats = [dict(_scalars(c), json=rel) for c in data.get('categories', [])]
+    return rel, images, boxes, cats, None
+
+def _folder_of(rel):
+    """상대경로 → (최상위 폴더, 약품 폴더) (없으면 '')"""
+    parts = rel.split(os.sep)
+    return (parts[0] if len(parts) > 1 else '', parts[1] if len(parts) > 2 else '')
+
+def _row_dict(row):
+    """DataFrame 행 → 원래 JSON과 같은 dict (비어 있는 컬럼 제외, numpy 값은 파이썬 값으로)"""
+    out = {}
+    for k, v in row.items():
+        if k == 'json' or v is None or v is pd.NA or (isinstance(v, float) and v != v):
+            continue
+        out[k] = v.item() if hasattr(v, 'item') else v
+    return out
+
+class AnnotationIndex:
+    """
+    train_annotations 트리 전체를 파싱한 컬럼형 인덱스
+
+    - files:      json, folder, drug_dir, mtime_ns, size (JSON 파일당 1행)
+    - images:     json + images[] 항목의 스칼라 필드 (file_name, width, height, camera_la, ...)
+    - boxes:      json + annotations[] 항목의 스칼라 필드 + bbox를 펼친 x, y, w, h
+    - categories: json + categories[] 항목 (id, name, ...)
+    - dirs:       folder, sub (최상위 폴더와 그 아래의 모든 하위 폴더, 빈 폴더 포함, 최상위 폴더 자체는 sub='')
+    json은 root 기준 상대경로라서 모든 테이블이 이 컬럼으로 연결됨
+    """
+
+    def __init__(self, root, files, images, boxes, categories, dirs, errors=None, index_path=None):
+        self.root = root
+        self.index_path = index_path
+        self.files = files
+        self.images = images
+        self.boxes = boxes
+        self.categories = categories
+        self.dirs = dirs
+        self.errors = errors or {}
+
+    def _state(self):
+        return {
+            'version': INDEX_VERSION,
+            'files': self.files, 'images': self.images, 'boxes': self.boxes,
+            'categories': self.categories, 'errors': self.errors,
+        }
+
+    def refresh(self, verbose=False):
+        """디스크에서 바뀐 JSON만 다시 파싱한 새 인덱스 (GUI에서 저장한 수정 사항 반영용)"""
+        return build_index(self.root, self.index_path, verbose=verbose, base=self)
+
+    def abspath(self, rel):
+        return os.path.join(self.root, rel)
+
+    def category_map(self):
+        """{category_id: name} (같은 id가 여러 번 나오면 마지막 이름)"""
+        if self.categories.empty:
+            return {}
+        cats = self.categories.drop_duplicates('id', keep='last').sort_values('id')
+        return dict(zip(cats['id'].tolist(), cats['name'].tolist()))
+
+    def coco(self):
+        """모든 JSON을 합친 COCO dict (image / annotation / category id 기준 중복 제거)"""
+        images = self.images.drop_duplicates('id', keep='first')
+        boxes = self.boxes.drop_duplicates('id', keep='first')
+        cats = self.categories.drop_duplicates('id', keep='last')
+        anns = []
+        for row in boxes.to_dict('records'):
+            ann = _row_dict(row)
+            ann['bbox'] = [ann.pop(k) for k in ('x', 'y', 'w', 'h')]
+            anns.append(ann)
+        return {
+            'images': [_row_dict(r) for r in images.to_dict('records')],
+            'annotations': anns,
+            'categories': [_row_dict(r) for r in cats.to_dict('records')],
+        }
+
+    def folder_drugs(self, suffix='_json', prefix='K-'):
+        """{어노테이션 폴더: [약품 코드, ...]} (K- 하위 폴더 기준, JSON이 없는 폴더도 포함)"""
+        mapping = {}
+        for folder, sub in self.dirs.itertuples(index=False):
+            if folder.endswith(suffix):
+                codes = mapping.setdefault(folder, [])
+                if sub.startswith(prefix):
+                    codes.append(sub[len(prefix):])
+        return mapping
+
+    def records(self, folder=None, drug_code=None):
+        """
+        JSON 파일당 하나씩 첫 번째 image / annotation / category를 묶은 dict 목록
+        (기존 도구들이 data['images'][0] 등으로 쓰던 형태)
+        """
+        files = self.files
+        if folder is not None:
+            files = files[files['folder'] == folder]
+        if drug_code is not None:
+            files = files[files['drug_dir'] == f'K-{drug_code}']
+        # 행 단위 .loc은 컬럼 dtype이 섞이면 float로 바뀌므로 records dict로 조회
+        first = lambda df: {r['json']: r for r in
+                            df[df['json'].isin(files['json'])].drop_duplicates('json').to_dict('records')}
+        images, boxes, cats = first(self.images), first(self.boxes), first(self.categories)
+
+        out = []
+        for rel, fold, drug_dir in zip(files['json'], files['folder'], files['drug_dir']):
+            if rel not in images or rel not in boxes:
+                continue
+            ann = _row_dict(boxes[rel])
+            ann['bbox'] = [ann.pop(k) for k in ('x', 'y', 'w', 'h')]
+            out.append({
+                'json_file': self.abspath(rel),
+                'folder': fold,
+                'drug_code': drug_dir[2:] if drug_dir.startswith('K-') else drug_dir,
+                'image_info': _row_dict(images[rel]),
+                'annotation': ann,
+                'category': _row_dict(cats[rel]) if rel in cats else None,
+            })
+        return out
+
+def _frame(rows, old, keep, columns):
+    """유지할 기존 행 + 새로 파싱한 행 → json 순으로 정렬된 DataFrame (비어 있으면 기본 컬럼만)"""
+    parts = []
+    if old is not None and len(old):
+        parts.append(old[old['json'].isin(keep)])
+    if rows:
+        parts.append(pd.DataFrame(rows))
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    df = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+    return df.sort_values('json', kind='stable').reset_index(drop=True).convert_dtypes()
+
+def build_index(root=ANN_ROOT, index_path=None, workers=None, rebuild=False, verbose=True, base=None):
+    """
+    인덱스를 읽어서 mtime/size가 바뀐 JSON만 다시 파싱하고 저장 (처음이면 전체를 병렬 파싱)
+    index_path 기본값은 <root>/.ann_index.pkl
+    base: 이미 메모리에 있는 AnnotationIndex (주면 파일 대신 이것과 비교)
+    """
+    index_path = index_path or os.path.join(root, INDEX_NAME)
+    old = None
+    if base is not None and not rebuild:
+        old = base._state()
+    elif not rebuild and os.path.exists(index_path):
+        try:
+            with open(index_path, 'rb') as f:
+                old = pickle.load(f)
+            if old.get('version') != INDEX_VERSION:
+                old = None
+        except Exception:
+            old = None
+
+    files, dirs = _scan(root)
+    seen = {}
+    if old is not None:
+        seen = dict(zip(old['files']['json'], zip(old['files']['mtime_ns'], old['files']['size'])))
+    todo = [rel for rel, mtime, size in files if seen.get(rel) != (mtime, size)]
+    current = {rel for rel, _, _ in files}
+    todo_set = set(todo)
+    keep = [rel for rel in seen if rel in current and rel not in todo_set]
+    removed = sum(1 for rel in seen if rel not in current)
+
+    if not todo and not removed and old is not None:
+        index = AnnotationIndex(root, old['files'], old['images'], old['boxes'], old['categories'],
+                                pd.DataFrame(dirs, columns=['folder', 'sub']), old['errors'], index_path)
+        if verbose:
+            print(f"[INFO] 어노테이션 인덱스: {len(files)}개 JSON (변경 없음)")
+        return index
+
+    jobs = [(root, rel) for rel in todo]
+    if len(jobs) >= _PARALLEL_MIN_FILES and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(_parse_file, jobs, chunksize=max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))))
+    else:
+        parsed = [_parse_file(job) for job in jobs]
+
+    errors = {rel: err for rel, err in (old['errors'].items() if old else []) if rel in keep}
+    images, boxes, cats = [], [], []
+    for rel, img_rows, box_rows, cat_rows, err in parsed:
+        if err:
+            errors[rel] = err
+        images += img_rows
+        boxes += box_rows
+        cats += cat_rows
+
+    file_df = pd.DataFrame(files, columns=['json', 'mtime_ns', 'size'])
+    folders = [_folder_of(rel) for rel in file_df['json']]
+    file_df.insert(1, 'folder', [f for f, _ in folders])
+    file_df.insert(2, 'drug_dir', [d for _, d in folders])
+
+    index = AnnotationIndex(
+        root, file_df,
+        _frame(images, old and old['images'], keep, ['json', 'id', 'file_name', 'width', 'height']),
+        _frame(boxes, old and old['boxes'], keep, ['json', 'id', 'image_id', 'category_id', 'x', 'y', 'w', 'h']),
+        _frame(cats, old and old['categories'], keep, ['json', 'id', 'name']),
+        pd.DataFrame(dirs, columns=['folder', 'sub']),
+        errors, index_path
+    )
+    _save(index, index_path)
+    if verbose:
+        print(f"[INFO] 어노테이션 인덱스: {len(files)}개 JSON (다시 파싱 {len(todo)}, 삭제 {removed}, 오류 {len(errors)}) → {index_path}")
+    return index
+
+def _save(index, index_path):
+    state = index._state()
+    out_dir = os.path.dirname(index_path) or '.'
+    os.makedirs(out_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=out_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, index_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def load_index(root=ANN_ROOT, **kwargs):
+    """도구들이 쓰는 진입점 (항상 최신 상태로 갱신된 인덱스)"""
+    return build_index(root, **kwargs)
+
+def main():
+    parser = argparse.ArgumentParser("Build/refresh the train annotation index")
+    parser.add_argument('--root', default=ANN_ROOT)
+    parser.add_argument('--index_path', default=None, help='기본: <root>/.ann_index.pkl')
+    parser.add_argument('--workers', type=int, default=None, help='파싱 프로세스 수 (기본: CPU 수)')
+    parser.add_argument('--rebuild', action='store_true', help='기존 인덱스를 무시하고 전체 다시 파싱')
+    args = parser.parse_args()
+
+    index = build_index(args.root, args.index_path, args.workers, args.rebuild)
+    print(f"  images={len(index.images)}, boxes={len(index.boxes)}, categories={len(index.category_map())}, "
+          f"folders={len(index.folder_drugs())}")
+    for rel, err in list(index.errors.items())[:10]:
+        print(f"  [오류] {rel}: {err}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+import os
+import io
+import json
+import time
+import zlib
+import argparse
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import cv2
+import numpy as np
+from tqdm import tqdm
+
+MANIFEST_NAME = '.augment_manifest.json'
+MANIFEST_VERSION = 1
+DEFAULT_ANGLES = (70, 75, 90)
+
+def rotation_matrix(w, h, angle):
+    """이미지 중앙((w // 2, h // 2), 기존 증강 코드와 같은 중심) 기준 회전 행렬 (2, 3)"""
+    return cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+
+def transform_boxes(boxes, matrix, w, h):
+    """
+    xywh 박스 (K, 4)의 네 꼭짓점을 affine 행렬로 한 번에 변환 → 꼭짓점을 감싸는 xywh (이미지 경계로 자름)
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    x1, y1 = boxes[:, 0], boxes[:, 1]
+    x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+    corners = np.stack([np.stack([x1, y1], 1), np.stack([x2, y1], 1),
+                        np.stack([x2, y2], 1), np.stack([x1, y2], 1)], 1)      # (K, 4, 2)
+    pts = corners @ matrix[:, :2].T + matrix[:, 2]
+    min_x = np.maximum(pts[..., 0].min(1), 0)
+    max_x = np.minimum(pts[..., 0].max(1), w)
+    min_y = np.maximum(pts[..., 1].min(1), 0)
+    max_y = np.minimum(pts[..., 1].max(1), h)
+    return np.stack([min_x, min_y, max_x - min_x, max_y - min_y], 1)
+
+def rotate_with_boxes(image, angle, boxes):
+    """디코딩된 이미지를 회전하고 박스 (K, 4) xywh도 같은 행렬로 변환 → (회전 이미지, 박스)"""
+    h, w = image.shape[:2]
+    matrix = rotation_matrix(w, h, angle)
+    return cv2.warpAffine(image, matrix, (w, h)), transform_boxes(boxes, matrix, w, h)
+
+def _write_image(path, img, params):
+    """확장자를 유지한 임시 파일에 쓰고 os.replace (중단돼도 반쯤 쓴 결과 파일이 남지 않음)"""
+    root, ext = os.path.splitext(path)
+    tmp = f"{root}.tmp{ext}"
+    if not cv2.imwrite(tmp, img, params):
+        raise IOError(f"이미지 저장 실패: {path}")
+    os.replace(tmp, path)
+
+def augment_one(src, out_dir, stem, angles, boxes, cats, fmt='png', jpeg_quality=95, min_size=1.0):
+    """
+    이미지 하나를 한 번만 디코딩해서 각도별로 회전·저장
+    반환: 출력별 {file_name, width, height, angle, anns: [[category_id, x, y, w, h], ...]} (디코딩 실패 시 None)
+    경계 밖으로 나가서 가로·세로가 min_size 미만이 된 박스는 버림
+    """
+    image = cv2.imread(src)
+    if image is None:
+        return None
+    h, w = image.shape[:2]
+    params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality] if fmt == 'jpg' else []
+    outputs = []
+    for angle in angles:
+        if angle == 0:
+            out_img, out_boxes = image, np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        else:
+            out_img, out_boxes = rotate_with_boxes(image, angle, boxes)
+        keep = (out_boxes[:, 2] >= min_size) & (out_boxes[:, 3] >= min_size)
+        file_name = f"{stem}_{angle}.{fmt}"
+        _write_image(os.path.join(out_dir, file_name), out_img, params)
+        outputs.append({
+            'file_name': file_name, 'width': w, 'height': h, 'angle': angle,
+            'anns': [[c] + np.round(b, 2).tolist() for c, b, k in zip(cats, out_boxes, keep) if k],
+        })
+    return outputs
+
+class AugmentManifest:
+    """
+    증강 진행 기록 (<out_dir>/.augment_manifest.json)
+    원본별 key (mtime_ns, 크기, 박스 목록 해시)와 출력 정보를 저장해서, 다시 실행하면
+    key가 같고 출력 파일이 모두 있는 원본은 건너뜀 (params(각도·형식·JPEG 품질)가 바뀌면 처음부터)
+    """
+
+    def __init__(self, out_dir, params):
+        self.path = os.path.join(out_dir, MANIFEST_NAME)
+        self.params = params
+        self.done = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') == MANIFEST_VERSION and state.get('params') == params:
+                self.done = state.get('done', {})
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def source_key(src, boxes, cats):
+        st = os.stat(src)
+        box_hash = zlib.crc32(json.dumps([cats, np.asarray(boxes).tolist()]).encode('utf-8'))
+        return [st.st_mtime_ns, st.st_size, box_hash]
+
+    def is_done(self, name, key, out_dir):
+        rec = self.done.get(name)
+        return (rec is not None and rec['key'] == key
+                and all(os.path.exists(os.path.join(out_dir, o['file_name'])) for o in rec['outputs']))
+
+    def save(self):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': MANIFEST_VERSION, 'params': self.params, 'done': self.done}, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+def run_augmentation(coco, img_dir, out_dir, angles=DEFAULT_ANGLES, workers=8, fmt='png', jpeg_quality=95,
+                     save_every=200):
+    """
+    coco(images / annotations)의 이미지마다 augment_one을 스레드 풀에서 실행 (한 이미지의 모든 박스·각도를 한 작업으로)
+    진행 상황은 save_every개마다 manifest에 저장하므로 중간에 멈춰도 다음 실행에서 남은 이미지만 처리
+    끝나면 <out_dir>/annotations.json (COCO, 원본 categories 유지) 생성
+    반환: (새로 만든 원본 수, 건너뛴 원본 수)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    angles = [int(a) for a in angles]
+    params = {'angles': angles, 'fmt': fmt}
+    if fmt == 'jpg':
+        params['jpeg_quality'] = int(jpeg_quality)
+    manifest = AugmentManifest(out_dir, params)
+
+    # 같은 파일에 image 항목이 여러 개여도(알약별 JSON) 파일 이름 기준으로 박스를 모두 모음
+    id_to_name = {img['id']: os.path.basename(img['file_name']) for img in coco['images']}
+    anns_by_name = defaultdict(list)
+    for ann in coco['annotations']:
+        if ann['image_id'] in id_to_name:
+            anns_by_name[id_to_name[ann['image_id']]].append(ann)
+    names = list(dict.fromkeys(id_to_name.values()))
+    current = set(names)
+    manifest.done = {name: rec for name, rec in manifest.done.items() if name in current}
+
+    jobs, skipped = [], 0
+    for name in names:
+        src = os.path.join(img_dir, name)
+        if not os.path.exists(src):
+            print(f"[WARN] 원본 이미지 없음: {src}")
+            continue
+        boxes = [a['bbox'] for a in anns_by_name[name]]
+        cats = [a['category_id'] for a in anns_by_name[name]]
+        key = manifest.source_key(src, boxes, cats)
+        if manifest.is_done(name, key, out_dir):
+            skipped += 1
+            continue
+        jobs.append((name, src, key, boxes, cats))
+
+    built = 0
+    workers = max(1, workers)
+    # 작업 하나가 예외로 끝나도 그때까지 끝난 원본은 manifest에 남김
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool, \
+                tqdm(total=len(jobs), desc="augment", unit="img") as bar:
+            pending = {}
+            it = iter(jobs)
+            # 제출은 worker 수의 몇 배까지만 (디코딩·회전된 이미지가 메모리에 쌓이지 않도록)
+            while True:
+                while len(pending) < workers * 4:
+                    job = next(it, None)
+                    if job is None:
+                        break
+                    name, src, key, boxes, cats = job
+                    stem = os.path.splitext(name)[0]
+                    fut = pool.submit(augment_one, src, out_dir, stem, angles, boxes, cats, fmt, jpeg_quality)
+                    pending[fut] = (name, key)
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    name, key = pending.pop(fut)
+                    outputs = fut.result()
+                    if outputs is None:
+                        print(f"[WARN] 디코딩 실패: {name}")
+                    else:
+                        manifest.done[name] = {'key': key, 'outputs': outputs}
+                        built += 1
+                        if built % save_every == 0:
+                            manifest.save()
+                    bar.update(1)
+    finally:
+        manifest.save()
+
+    write_coco(manifest, coco.get('categories', []), os.path.join(out_dir, 'annotations.json'))
+    return built, skipped
+
+def write_coco(manifest, categories, path):
+    """manifest에 기록된 출력 → COCO dict (이미지·annotation id는 파일 이름 순서로 1부터)"""
+    outputs = sorted((o for rec in manifest.done.values() for o in rec['outputs']), key=lambda o: o['file_name'])
+    images, annotations = [], []
+    for image_id, o in enumerate(outputs, 1):
+        images.append({'id': image_id, 'file_name': o['file_name'], 'width': o['width'], 'height': o['height'],
+                       'angle': o['angle']})
+        for cat, x, y, w, h in o['anns']:
+            annotations.append({'id': len(annotations) + 1, 'image_id': image_id, 'category_id': cat,
+                                'bbox': [x, y, w, h], 'area': round(w * h, 2), 'iscrowd': 0})
+    with io.open(path, 'w', encoding='utf-8') as f:
+        json.dump({'images': images, 'annotations': annotations, 'categories': categories}, f, ensure_ascii=False)
+
+def main():
+    parser = argparse.ArgumentParser("학습 이미지 전체 회전 증강 (이미지당 한 번 디코딩, 모든 박스 변환, 이어서 실행 가능)")
+    parser.add_argument('--img_dir',  default='data/raw_data/train_images')
+    parser.add_argument('--ann_root', default='data/raw_data/train_annotations', help='train_annotations 폴더 (src.ann_index)')
+    parser.add_argument('--ann_json', default=None, help='COCO annotations.json (지정 시 --ann_root 대신 사용)')
+    parser.add_argument('--out_dir',  default='data/augmented_images')
+    parser.add_argument('--angles',   type=int,   nargs='+', default=list(DEFAULT_ANGLES))
+    parser.add_argument('--workers',  type=int, default=8)
+    parser.add_argument('--format',   choices=['png', 'jpg'], default='png')
+    parser.add_argument('--jpeg_quality', type=int, default=95)
+    args = parser.parse_args()
+
+    if args.ann_json:
+        with io.open(args.ann_json, 'r', encoding='utf-8', errors='ignore') as f:
+            coco = json.load(f)
+    else:
+        from src.ann_index import load_index
+        coco = load_index(args.ann_root).coco()
+
+    start = time.perf_counter()
+    built, skipped = run_augmentation(coco, args.img_dir, args.out_dir, args.angles, args.workers,
+                                      args.format, args.jpeg_quality)
+    print(f"[INFO] 새로 처리 {built}, 이전 결과 재사용 {skipped} (각도 {args.angles}) "
+          f"→ {args.out_dir}/annotations.json ({time.perf_counter() - start:.1f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import os
+import json
+import zlib
+import random
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+
+from src.pred_cache import hash_file
+from src.materialize import materialize
+from src.splitting import stratified_split
+
+MANIFEST_NAME = '.build_manifest.json'
+MANIFEST_VERSION = 1
+
+class BuildManifest:
+    """
+    train/val 데이터셋 증분 빌드 기록 (<out_root>/.build_manifest.json)
+
+    - outputs: 만든 파일별 key (원본 경로·mtime·크기 또는 라벨 텍스트 해시) → key가 같고 파일이 있으면 다시 쓰지 않음
+    - split:   이미지 이름별 train/val (같은 params로 다시 빌드하면 기존 배정 유지)
+    incremental=False면 기록을 재사용하지 않고 모두 다시 쓰지만, 이전 기록의 outputs는 prune 대상으로 읽음
+    → 어느 쪽이든 이번 빌드에서 만들지 않은 이전 결과 파일(orphan)은 prune()으로 삭제
+      (manifest에 기록된 파일만 지우므로 manifest 도입 전에 만든 파일이나 직접 넣은 파일은 남음)
+    """
+
+    def __init__(self, out_root, params=None, incremental=True):
+        self.out_root = Path(out_root)
+        self.path = self.out_root / MANIFEST_NAME
+        self.params = params or {}
+        self.incremental = incremental
+        state = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                state = {}
+            if state.get('version') != MANIFEST_VERSION:
+                state = {}
+        # split 파라미터(비율·시드 등)가 바뀌면 기존 split은 버리고 새로 나눔
+        self.split_map = state.get('split', {}) if incremental and state.get('params') == self.params else {}
+        self._prev_outputs = state.get('outputs', {})                     # prune 대상
+        self._old_outputs = self._prev_outputs if incremental else {}     # 다시 쓰지 않고 건너뛸 기준
+        self.outputs = {}
+        self.written = 0
+        self.skipped = 0
+        self._lock = threading.Lock()  # place_file / write_text를 스레드 풀에서 호출해도 되도록
+
+    def emit(self, out_rel, key, write_fn, same_fn=None):
+        """
+        out_rel이 같은 key로 이미 만들어져 있으면 건너뛰고, 아니면 write_fn(출력 경로) 호출 (썼으면 True)
+        same_fn(출력 경로)를 주면 key가 바뀌었어도 이전 출력이 있을 때 내용이 같은지 확인해서 같으면 건너뜀
+        """
+        out_rel = Path(out_rel).as_posix()
+        out = self.out_root / out_rel
+        with self._lock:
+            self.outputs[out_rel] = key
+        old_key = self._old_outputs.get(out_rel)
+        if old_key is not None and out.exists() and (old_key == key or (same_fn is not None and same_fn(out))):
+            with self._lock:
+                self.skipped += 1
+            return False
+        out.parent.mkdir(parents=True, exist_ok=True)
+        write_fn(out)
+        with self._lock:
+            self.written += 1
+        return True
+
+    def place_file(self, src, out_rel, mode='copy'):
+        """
+        src를 out_rel에 materialize(mode) 방식으로 배치
+        key는 원본 경로 (symlink) 또는 원본 경로·mtime·크기 (hardlink / copy / reflink)라서 보통은 원본을 읽지 않음
+        copy / reflink는 incremental 빌드에서 mtime·크기만 바뀐 경우에만 원본과 이전 출력의 내용 해시를 비교해서
+        같으면 다시 쓰지 않음 (touch만 된 파일)
+        """
+        if mode == 'symlink':
+            return self.emit(out_rel, f"symlink:{os.path.abspath(src)}", lambda out: materialize(src, out, mode))
+        st = os.stat(src)
+        key = f"{mode}:{os.path.abspath(src)}:{st.st_mtime_ns}:{st.st_size}"
+        same_fn = None
+        old_key = self._old_outputs.get(Path(out_rel).as_posix(), '')
+        if mode != 'hardlink' and old_key.startswith(f"{mode}:"):  # 배치 방식이 바뀌었으면 내용과 무관하게 다시 씀
+            same_fn = lambda out: out.stat().st_size == st.st_size and hash_file(out) == hash_file(src)
+        return self.emit(out_rel, key, lambda out: materialize(src, out, mode), same_fn)
+
+    def write_text(self, out_rel, text):
+        key = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        return self.emit(out_rel, key, lambda out: out.write_text(text))
+
+    def assign_split(self, names, ratio, seed, counts=None):
+        """
+        이름 → 'train' | 'val'
+        기록된 split이 없으면 기존 도구와 같은 random.seed(seed) + shuffle 결과를 그대로 사용하고,
+        있으면 기존 이미지는 이전 배정을 유지하고 새 이미지만 (seed, 이름) 해시로 ratio 비율에 맞춰 배정
+        counts: names 순서의 (이미지 수, 클래스 수) 박스 개수 행렬을 주면 src.splitting 반복 층화 분할
+        """
+        names = list(names)
+        if not self.split_map and counts is not None:
+            split = stratified_split(names, counts, ratio, seed)
+        elif not self.split_map:
+            shuffled = names[:]
+            random.seed(seed)
+            random.shuffle(shuffled)
+            n = int(len(shuffled) * ratio)
+            split = {name: 'train' if i < n else 'val' for i, name in enumerate(shuffled)}
+        else:
+            split = {}
+            for name in names:
+                subset = self.split_map.get(name)
+                if subset is None:
+                    subset = 'train' if zlib.crc32(f"{seed}:{name}".encode('utf-8')) / 2 ** 32 < ratio else 'val'
+                split[name] = subset
+        self.split_map = split
+        return split
+
+    def prune(self):
+        """이전 빌드가 만들었지만 이번 빌드에는 없는 파일 삭제 → 삭제한 개수"""
+        removed = 0
+        for out_rel in self._prev_outputs.keys() - self.outputs.keys():
+            out = self.out_root / out_rel
+            if os.path.lexists(out):  # 원본이 사라진 symlink도 삭제
+                out.unlink()
+                removed += 1
+        return removed
+
+    def save(self):
+        state = {
+            'version': MANIFEST_VERSION,
+            'params': self.params,
+            'split': self.split_map,
+            'outputs': self.outputs,
+        }
+        self.out_root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.out_root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def summary(self, removed=0):
+        return f"새로 씀 {self.written}, 변경 없음 {self.skipped}, 삭제 {removed}"
@@ -0,0 +1,351 @@
+import os
+import json
+import tempfile
+import numpy as np
+
+STRATEGIES = ('uniform', 'quantile')
+CALIB_METHODS = ('temperature', 'isotonic')
+
+# 부트스트랩 가중치 행렬 (반복 수 × 샘플 수) 크기 상한 → 한 번에 처리하는 샘플 수를 여기에 맞춰 나눔
+_BOOT_CELLS = 4_000_000
+
+class CalibrationStats:
+    """
+    confidence / 정답 여부를 배치 단위로 누적하는 streaming reliability 통계
+
+    - 점수를 resolution 개의 고정 구간(fine bin)으로 나눠서 개수·confidence 합·정답 합만 보관
+      → 예측 전체를 메모리에 두지 않고, bin 경계(균등 폭 / 같은 개수)는 result()에서 fine bin을 합쳐서 결정
+    - classes를 주면 클래스별 fine bin도 같이 누적 (클래스별 ECE)
+    - n_boot > 0이면 Poisson 부트스트랩 (샘플마다 반복별 가중치 ~ Poisson(1))을 누적하면서 같이 계산
+      → 두 번째 패스 없이 ECE / bin 정확도의 신뢰구간
+    """
+
+    def __init__(self, resolution=1000, n_boot=0, seed=0):
+        self.resolution = resolution
+        self.n_boot = n_boot
+        self._rng = np.random.default_rng(seed)
+        self._fine_edges = np.linspace(0, 1, resolution + 1)
+        self._hist = np.zeros((3, resolution))               # 개수, confidence 합, 정답 합
+        self._class_ids = {}
+        self._class_hist = np.zeros((0, 3, resolution))
+        self._boot = np.zeros((n_boot, 3, resolution)) if n_boot else None
+
+    def _fine_index(self, scores):
+        # 기존 compute_ece와 같은 score >= edge 규칙, 1.0(이상)은 마지막 구간에 포함
+        idx = np.searchsorted(self._fine_edges, scores, side='right') - 1
+        return np.clip(idx, 0, self.resolution - 1)
+
+    def _bincount3(self, idx, scores, correct, weights, size):
+        return np.stack([
+            np.bincount(idx, weights=weights, minlength=size),
+            np.bincount(idx, weights=weights * scores, minlength=size),
+            np.bincount(idx, weights=weights * correct, minlength=size),
+        ])
+
+    def update(self, scores, correct, classes=None):
+        """scores: (N,) confidence, correct: (N,) TP 여부 (bool / 0·1), classes: (N,) 클래스 id (선택)"""
+        scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+        correct = np.asarray(correct, dtype=np.float64).reshape(-1)
+        if not len(scores):
+            return
+        res = self.resolution
+        idx = self._fine_index(scores)
+        ones = np.ones(len(scores))
+        self._hist += self._bincount3(idx, scores, correct, ones, res)
+
+        if classes is not None:
+            uniq, inv = np.unique(np.asarray(classes).reshape(-1), return_inverse=True)
+            rows = np.array([self._class_ids.setdefault(c.item() if hasattr(c, 'item') else c, len(self._class_ids))
+                             for c in uniq], dtype=np.int64)
+            if len(self._class_ids) > len(self._class_hist):
+                grow = np.zeros((len(self._class_ids) - len(self._class_hist), 3, res))
+                self._class_hist = np.concatenate([self._class_hist, grow])
+            flat = rows[inv] * res + idx
+            size = len(self._class_hist) * res
+            self._class_hist += self._bincount3(flat, scores, correct, ones, size).reshape(3, -1, res).transpose(1, 0, 2)
+
+        if self.n_boot:
+            step = max(1, _BOOT_CELLS // self.n_boot)
+            offs = (np.arange(self.n_boot) * res)[:, None]
+            for s in range(0, len(scores), step):
+                sl = slice(s, s + step)
+                w = self._rng.poisson(1.0, (self.n_boot, len(idx[sl]))).astype(np.float64)
+                flat = (offs + idx[sl][None, :]).ravel()
+                tiled = [np.broadcast_to(v[sl], w.shape).ravel() for v in (scores, correct)]
+                self._boot += self._bincount3(flat, *tiled, w.ravel(), self.n_boot * res) \
+                    .reshape(3, self.n_boot, res).transpose(1, 0, 2)
+
+    @property
+    def count(self):
+        return int(self._hist[0].sum())
+
+    def bin_starts(self, bins=10, strategy='uniform', hist=None):
+        """
+        bin마다 시작 fine bin 인덱스
+        - uniform:  [0, 1/bins), [1/bins, 2/bins), ... (resolution이 bins의 배수여야 경계가 정확)
+        - quantile: 각 bin에 예측 개수가 비슷하게 (경계는 1/resolution 단위, 한 값에 몰려 있으면 bin 수가 줄어듦)
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"지원하지 않는 binning 방식: {strategy}")
+        if strategy == 'uniform':
+            if self.resolution % bins:
+                raise ValueError(f"uniform binning은 resolution({self.resolution})이 bins({bins})의 배수여야 합니다.")
+            return np.arange(bins) * (self.resolution // bins)
+        counts = (self._hist if hist is None else hist)[0]
+        cum = np.cumsum(counts)
+        if cum[-1] == 0:
+            return np.zeros(1, dtype=np.int64)
+        cuts = np.searchsorted(cum, cum[-1] * np.arange(1, bins) / bins, side='left') + 1
+        return np.unique(np.concatenate([[0], cuts[cuts < self.resolution]]))
+
+    def _reduce(self, hist, starts):
+        return np.add.reduceat(hist, starts, axis=-1)
+
+    @staticmethod
+    def _ece(binned):
+        """binned: (..., 3, B) → (ECE, MCE) (빈 bin 제외, ECE = Σ|정답 합 - confidence 합| / N)"""
+        n, conf, corr = binned[..., 0, :], binned[..., 1, :], binned[..., 2, :]
+        total = n.sum(axis=-1)
+        gap = np.abs(corr - conf)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ece = np.where(total > 0, gap.sum(axis=-1) / total, np.nan)
+            mce = np.where(n > 0, gap / n, 0.0).max(axis=-1)
+        return ece, mce
+
+    def result(self, bins=10, strategy='uniform', ci=0.95):
+        """
+        반환 dict:
+          n, ece, mce, ece_ci ((하한, 상한), 부트스트랩 안 했으면 None)
+          bins: edges (B+1), count, conf (평균 confidence), acc (정확도), acc_lo / acc_hi (부트스트랩 구간)
+          per_class: {클래스: {n, ece, mce}} (같은 strategy로 클래스마다 bin을 따로 잡음)
+        """
+        starts = self.bin_starts(bins, strategy)
+        binned = self._reduce(self._hist, starts)
+        ece, mce = self._ece(binned)
+        n = binned[0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            conf = np.where(n > 0, binned[1] / n, np.nan)
+            acc = np.where(n > 0, binned[2] / n, np.nan)
+        out = {
+            'n': int(n.sum()), 'ece': float(ece), 'mce': float(mce), 'ece_ci': None,
+            'bins': {
+                'edges': np.append(starts, self.resolution) / self.resolution,
+                'count': n.astype(np.int64), 'conf': conf, 'acc': acc,
+                'acc_lo': np.full(len(n), np.nan), 'acc_hi': np.full(len(n), np.nan),
+            },
+        }
+
+        if self.n_boot:
+            alpha = (1 - ci) / 2 * 100
+            boot = self._reduce(self._boot, starts)          # (R, 3, B)
+            boot_ece, _ = self._ece(boot)
+            out['ece_ci'] = tuple(float(v) for v in np.nanpercentile(boot_ece, [alpha, 100 - alpha]))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                boot_acc = np.where(boot[:, 0] > 0, boot[:, 2] / boot[:, 0], np.nan)
+            valid = (~np.isnan(boot_acc)).any(axis=0)
+            if valid.any():
+                lo, hi = np.nanpercentile(boot_acc[:, valid], [alpha, 100 - alpha], axis=0)
+                out['bins']['acc_lo'][valid] = lo
+                out['bins']['acc_hi'][valid] = hi
+
+        per_class = {}
+        for cls, row in self._class_ids.items():
+            hist = self._class_hist[row]
+            c_ece, c_mce = self._ece(self._reduce(hist, self.bin_starts(bins, strategy, hist)))
+            per_class[cls] = {'n': int(hist[0].sum()), 'ece': float(c_ece), 'mce': float(c_mce)}
+        out['per_class'] = per_class
+        return out
+
+def save_reliability_diagram(res, path, title='Reliability Diagram'):
+    """result() 결과를 PNG로 저장 (Agg 백엔드라 화면 없이 동작, plt.show() 없음)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    b = res['bins']
+    edges = b['edges']
+    fig, (ax, ax_hist) = plt.subplots(2, 1, figsize=(6, 7), sharex=True, gridspec_kw={'height_ratios': [3, 1]})
+    ax.plot([0, 1], [0, 1], '--', color='gray', label='ideal')
+    ok = b['count'] > 0
+    if np.isnan(b['acc_lo']).all():
+        ax.plot(b['conf'][ok], b['acc'][ok], marker='o', label='accuracy')
+    else:
+        err = np.stack([b['acc'][ok] - b['acc_lo'][ok], b['acc_hi'][ok] - b['acc'][ok]])
+        ax.errorbar(b['conf'][ok], b['acc'][ok], yerr=err, marker='o', capsize=3, label='accuracy (bootstrap CI)')
+    ci = res['ece_ci']
+    ece_str = f"ECE={res['ece']:.4f}" + (f" [{ci[0]:.4f}, {ci[1]:.4f}]" if ci else '')
+    ax.set_ylabel('Accuracy')
+    ax.set_title(f"{title} ({ece_str})")
+    ax.legend(loc='upper left')
+    ax_hist.bar(edges[:-1], b['count'], width=np.diff(edges), align='edge', edgecolor='black')
+    ax_hist.set_xlabel('Confidence')
+    ax_hist.set_ylabel('Count')
+    ax_hist.set_xlim(0, 1)
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+
+def calibration_artifact_path(ckpt_path):
+    """보정 매핑 경로: <체크포인트 이름>_calib.json (체크포인트와 같은 폴더)"""
+    return f"{os.path.splitext(ckpt_path)[0]}_calib.json"
+
+def _logit(p):
+    p = np.clip(p, 1e-6, 1 - 1e-6)
+    return np.log(p) - np.log1p(-p)
+
+def _fit_temperature(hist):
+    """
+    fine bin 통계 (3, R)로 sigmoid(logit(s) / T)의 NLL을 최소화하는 T
+    bin 평균 confidence를 대표값으로 쓰고, log T 구간을 golden-section 탐색
+    """
+    n, conf, corr = hist
+    ok = n > 0
+    z = _logit(conf[ok] / n[ok])
+    pos, neg = corr[ok], n[ok] - corr[ok]
+
+    def nll(log_t):
+        zt = z / np.exp(log_t)
+        # -log sigmoid(x) = logaddexp(0, -x)
+        return float((pos * np.logaddexp(0, -zt) + neg * np.logaddexp(0, zt)).sum())
+
+    lo, hi = np.log(0.05), np.log(20.0)
+    ratio = (np.sqrt(5) - 1) / 2
+    a, b = hi - ratio * (hi - lo), lo + ratio * (hi - lo)
+    fa, fb = nll(a), nll(b)
+    for _ in range(60):
+        if fa < fb:
+            hi, b, fb = b, a, fa
+            a = hi - ratio * (hi - lo)
+            fa = nll(a)
+        else:
+            lo, a, fa = a, b, fb
+            b = lo + ratio * (hi - lo)
+            fb = nll(b)
+    return float(np.exp((lo + hi) / 2))
+
+def _temperature_lut(grid, t):
+    return 1 / (1 + np.exp(-_logit(grid) / t))
+
+def _pav(y, w):
+    """가중 isotonic regression (pool adjacent violators) → y와 같은 길이의 비감소 값"""
+    vals, wts, sizes = [], [], []
+    for yi, wi in zip(y.tolist(), w.tolist()):
+        vals.append(yi)
+        wts.append(wi)
+        sizes.append(1)
+        while len(vals) > 1 and vals[-2] > vals[-1]:
+            v, wt, sz = vals.pop(), wts.pop(), sizes.pop()
+            vals[-1] = (vals[-1] * wts[-1] + v * wt) / (wts[-1] + wt)
+            wts[-1] += wt
+            sizes[-1] += sz
+    return np.repeat(vals, sizes)
+
+def _isotonic_knots(hist):
+    """
+    fine bin별 (평균 confidence, 정확도)에 isotonic 회귀 → 보간 기준점 (x, y)
+    값이 같은 구간은 양 끝점만 남김 (np.interp 결과는 같고 저장 크기만 줄어듦)
+    """
+    n, conf, corr = hist
+    ok = n > 0
+    x = conf[ok] / n[ok]
+    y = _pav(corr[ok] / n[ok], n[ok])
+    keep = np.ones(len(y), dtype=bool)
+    keep[1:-1] = (y[1:-1] != y[:-2]) | (y[1:-1] != y[2:])
+    return x[keep], y[keep]
+
+class ScoreCalibrator:
+    """
+    클래스별 score 보정 매핑 (temperature 또는 isotonic)을 lookup table로 보관
+    - lut: (클래스 수 + 1, resolution + 1), 마지막 행은 전체 데이터로 맞춘 매핑 (샘플이 적거나 처음 보는 클래스용)
+    - apply()는 점수 위치의 LUT 값을 선형 보간 (클래스별 행을 인덱싱해서 한 번에 계산)
+    - 두 방법 모두 단조 증가라 raw_threshold()로 보정 후 threshold에 해당하는 raw 점수를 구할 수 있음
+    """
+
+    def __init__(self, lut, classes, method='temperature', meta=None):
+        self.lut = np.asarray(lut, dtype=np.float64)
+        self.classes = [int(c) for c in classes]
+        self.method = method
+        self.meta = meta or {}
+        self._default_row = len(self.classes)
+        size = max(self.classes) + 1 if self.classes else 0
+        self._row_of = np.full(size, self._default_row, dtype=np.int64)
+        self._row_of[self.classes] = np.arange(len(self.classes))
+
+    @classmethod
+    def fit(cls, stats, method='temperature', min_count=50):
+        """CalibrationStats (classes = 모델 클래스 인덱스로 누적)에서 클래스별 매핑 학습"""
+        if method not in CALIB_METHODS:
+            raise ValueError(f"지원하지 않는 보정 방식: {method}")
+        if stats.count == 0:
+            raise ValueError("보정에 사용할 예측이 없습니다.")
+        grid = np.linspace(0, 1, stats.resolution + 1)
+
+        def fit_one(hist):
+            if method == 'temperature':
+                t = _fit_temperature(hist)
+                return _temperature_lut(grid, t), t
+            x, y = _isotonic_knots(hist)
+            return np.interp(grid, x, y), [x.tolist(), y.tolist()]
+
+        rows, classes, params = [], [], []
+        for c, row in sorted(stats._class_ids.items()):
+            hist = stats._class_hist[row]
+            if hist[0].sum() < min_count:
+                continue
+            lut, param = fit_one(hist)
+            rows.append(lut)
+            classes.append(int(c))
+            params.append(param)
+        lut, param = fit_one(stats._hist)
+        rows.append(lut)
+        params.append(param)
+        # 행마다 매핑 파라미터 (temperature: T, isotonic: 보간 기준점 [x, y]) → 저장은 이것만
+        meta = {'n': stats.count, 'min_count': min_count, 'resolution': stats.resolution, 'params': params}
+        return cls(np.stack(rows), classes, method, meta)
+
+    def _rows(self, classes):
+        classes = np.asarray(classes, dtype=np.int64)
+        known = (classes >= 0) & (classes < len(self._row_of))
+        return np.where(known, self._row_of[np.where(known, classes, 0)], self._default_row)
+
+    def apply(self, scores, classes):
+        """raw 점수 (N,), 클래스 인덱스 (N,) → 보정된 점수 (N,)"""
+        scores = np.clip(np.asarray(scores, dtype=np.float64), 0, 1)
+        pos = scores * (self.lut.shape[1] - 1)
+        lo = np.minimum(pos.astype(np.int64), self.lut.shape[1] - 2)
+        frac = pos - lo
+        rows = self._rows(classes)
+        return self.lut[rows, lo] * (1 - frac) + self.lut[rows, lo + 1] * frac
+
+    def raw_threshold(self, conf):
+        """어떤 클래스든 보정 후 conf 이상이 될 수 있는 최소 raw 점수 (모델 predict의 conf로 사용, 한 칸 여유)"""
+        reach = self.lut >= conf
+        if not reach.any():
+            return 1.0
+        first = np.where(reach.any(axis=1), reach.argmax(axis=1), self.lut.shape[1]).min()
+        return max(first - 1, 0) / (self.lut.shape[1] - 1)
+
+    def save(self, path):
+        """LUT 대신 행별 파라미터(meta['params'])만 저장하고 load 때 LUT를 다시 계산"""
+        state = {'method': self.method, 'classes': self.classes, 'meta': self.meta}
+        out_dir = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=out_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        meta = state['meta']
+        grid = np.linspace(0, 1, meta['resolution'] + 1)
+        if state['method'] == 'temperature':
+            lut = [_temperature_lut(grid, t) for t in meta['params']]
+        else:
+            lut = [np.interp(grid, x, y) for x, y in meta['params']]
+        return cls(np.stack(lut), state['classes'], state['method'], meta)
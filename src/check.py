@@ -1,15 +1,33 @@
 import cv2
 import os
-from ultralytics import YOLO
+import argparse
+from src.loader import decode_bytes
+from src.pred_cache import PredictionCache, hash_bytes
 
 # 설정
 IMG_DIR = "data/processed/val/images"
 MODEL_PATH = "runs/train/pill_exp_20250722_154859/weights/best.pt"
+CACHE_DIR = None  # 예: "cache/predictions" (지정하면 같은 이미지를 다시 볼 때 예측 재사용)
+
+parser = argparse.ArgumentParser("Validation image viewer")
+parser.add_argument("--server", type=str, default=None, help="추론 서버 URL (지정 시 모델을 로드하지 않고 서버의 첫 번째 모델 사용)")
+args = parser.parse_args()
+
 image_list = sorted([f for f in os.listdir(IMG_DIR) if f.endswith(".png")])
 print(f"총 이미지 수: {len(image_list)}")
 
-# 모델 로드
-model = YOLO(MODEL_PATH)
+# 모델 로드 (서버를 쓰면 생략)
+if args.server:
+    from src.server import InferenceClient
+    client = InferenceClient(args.server)
+    client.check_checkpoints([MODEL_PATH], first_only=True)
+else:
+    from ultralytics import YOLO
+    from src.inference import predict_batch
+    client = None
+    model = YOLO(MODEL_PATH)
+    cache = PredictionCache(CACHE_DIR) if CACHE_DIR else None
+    ckpt_hashes = [cache.checkpoint_hash(MODEL_PATH)] if cache else None
 
 # 전역 인덱스
 idx = 0
@@ -17,19 +35,26 @@ idx = 0
 def show_image(index):
     file_name = image_list[index]
     image_path = os.path.join(IMG_DIR, file_name)
-    img = cv2.imread(image_path)
-
-    # 예측 수행
-    results = model.predict(image_path, conf=0.1, iou=0.6)[0]
-    for box in results.boxes:
-        x1, y1, x2, y2 = map(int, box.xyxy[0])
-        cls_id = int(box.cls[0])
-        conf = float(box.conf[0])
+    with open(image_path, 'rb') as f:
+        buf = f.read()
+    img = decode_bytes(buf)
+
+    # 예측 수행 (x1, y1, x2, y2, score, cls)
+    if client:
+        dets = client.predict_raw(buf, conf=0.1, iou=0.6)['dets'][0]
+    else:
+        img_hashes = [hash_bytes(buf)] if cache else None
+        dets = predict_batch([model], [img], conf=0.1, iou=0.6, augment=False,
+                             cache=cache, ckpt_hashes=ckpt_hashes, img_hashes=img_hashes)[0][0]
+    for det in dets:
+        x1, y1, x2, y2 = map(int, det[:4])
+        cls_id = int(det[5])
+        conf = float(det[4])
         label = f"{cls_id} ({conf:.2f})"
         cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
         cv2.putText(img, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
 
-    print(f"\n {file_name} / 탐지된 알약 수: {len(results.boxes)}")
+    print(f"\n {file_name} / 탐지된 알약 수: {len(dets)}")
     resized = cv2.resize(img, (min(img.shape[1], 960), min(img.shape[0], 720)))  # 보기 편하게 리사이즈
     cv2.imshow("Prediction", resized)
 
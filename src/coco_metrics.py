@@ -0,0 +1,246 @@
+import io
+import json
+import yaml
+import numpy as np
+
+# pycocotools COCOeval Params(iouType='bbox')와 같은 값 (같은 식으로 만들어야 부동소수점까지 일치)
+IOU_THRS = np.linspace(.5, 0.95, int(np.round((0.95 - .5) / .05)) + 1, endpoint=True)
+REC_THRS = np.linspace(.0, 1.00, int(np.round((1.00 - .0) / .01)) + 1, endpoint=True)
+MAX_DETS = (1, 10, 100)
+AREA_RNGS = (('all', 0 ** 2, 1e5 ** 2), ('small', 0 ** 2, 32 ** 2), ('medium', 32 ** 2, 96 ** 2), ('large', 96 ** 2, 1e5 ** 2))
+
+# stats 순서 (COCOeval.stats와 같음): (이름, AP/AR, IoU 임계 인덱스, 영역 인덱스, maxDets 인덱스)
+_STATS = (
+    ('mAP50-95', 'ap', None, 0, 2), ('mAP50', 'ap', 0, 0, 2), ('mAP75', 'ap', 5, 0, 2),
+    ('AP_small', 'ap', None, 1, 2), ('AP_medium', 'ap', None, 2, 2), ('AP_large', 'ap', None, 3, 2),
+    ('AR1', 'ar', None, 0, 0), ('AR10', 'ar', None, 0, 1), ('AR100', 'ar', None, 0, 2),
+    ('AR_small', 'ar', None, 1, 2), ('AR_medium', 'ar', None, 2, 2), ('AR_large', 'ar', None, 3, 2),
+)
+
+def load_coco_gt(ann_json, data_yaml="data.yaml"):
+    """GT json load + 필드 보강 (info / licenses, categories가 없으면 data.yaml names로 생성) → COCO dict"""
+    with io.open(ann_json, 'r', encoding='utf-8', errors='ignore') as f:
+        ann = json.load(f)
+    ann.setdefault("info", {})
+    ann.setdefault("licenses", [])
+    if "categories" not in ann:
+        with open(data_yaml, 'r', encoding='utf-8') as f:
+            names = yaml.safe_load(f)["names"]
+        ann["categories"] = [
+            {"id": int(k), "name": names[k], "supercategory": ""}
+            for k in names
+        ]
+    return ann
+
+def _iou(d, g, crowd):
+    """
+    xywh 박스 IoU (d, g, crowd는 브로드캐스트, crowd GT는 예측 넓이로 나눔 → pycocotools maskUtils.iou와 같은 규칙)
+    행렬은 _iou(d[:, None], g[None], crowd[None]), 같은 길이 쌍은 _iou(d, g, crowd)
+    """
+    iw = np.minimum(d[..., 0] + d[..., 2], g[..., 0] + g[..., 2]) - np.maximum(d[..., 0], g[..., 0])
+    ih = np.minimum(d[..., 1] + d[..., 3], g[..., 1] + g[..., 3]) - np.maximum(d[..., 1], g[..., 1])
+    inter = np.where((iw > 0) & (ih > 0), iw * ih, 0.0)
+    da = d[..., 2] * d[..., 3]
+    union = np.where(crowd, da, da + g[..., 2] * g[..., 3] - inter)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(union > 0, inter / union, 0.0)
+
+def _last_argmax(score):
+    """행별로 최댓값의 마지막 위치 (COCOeval은 IoU가 같으면 뒤쪽 GT와 매칭)"""
+    return score.shape[1] - 1 - np.argmax(score[:, ::-1], axis=1)
+
+def _match_group(iou, g_ig, g_crowd, thrs):
+    """
+    GT 여러 개인 (이미지, 클래스) 하나의 COCOeval 매칭 (예측은 점수 순, 모든 IoU 임계를 한 번에)
+    ignore가 아닌 GT 중 IoU 최대(thr 이상)를 먼저 찾고, 없을 때만 ignore GT와 매칭
+    반환: 예측별 (T, D) 매칭된 GT 인덱스 (-1이면 매칭 없음)
+    """
+    n_dt, n_gt = iou.shape
+    taken = np.zeros((len(thrs), n_gt), dtype=bool)
+    match = np.full((len(thrs), n_dt), -1, dtype=np.int64)
+    rows = np.arange(len(thrs))
+    for d in range(n_dt):
+        cand = (~taken | g_crowd[None, :]) & (iou[d][None, :] >= thrs[:, None])
+        best = np.full(len(thrs), -1, dtype=np.int64)
+        for ig in (False, True):
+            score = np.where(cand & (g_ig == ig)[None, :], iou[d][None, :], -1.0)
+            m = _last_argmax(score)
+            found = (best < 0) & (score[rows, m] >= 0)
+            best[found] = m[found]
+        hit = best >= 0
+        match[hit, d] = best[hit]
+        taken[rows[hit], best[hit]] = True
+    return match
+
+def coco_evaluate(gt, results, img_ids=None):
+    """
+    pycocotools COCOeval(iouType='bbox') evaluate + accumulate + summarize와 같은 결과를 NumPy로 계산
+
+    - gt: COCO dict (images / annotations / categories), results: [{image_id, category_id, bbox, score}]
+    - img_ids: 평가할 이미지 id (기본: gt의 모든 이미지, coco_eval.py / sweep.py와 같음)
+    반환 dict:
+      stats (COCOeval.stats와 같은 12개), mAP50-95 / mAP50 / mAP75 / AP_small / AP_medium / AP_large / AR1 / AR10 / AR100 / AR_small / ...
+      per_class: {category_id: {name, n_gt, AP, AP50, AP75, AP_small, AP_medium, AP_large}} (GT가 없으면 -1)
+      precision (T, R, K, A, M), recall (T, K, A, M) (COCOeval.eval과 같은 배열)
+    """
+    img_ids = sorted(img['id'] for img in gt['images']) if img_ids is None else list(img_ids)
+    cats = sorted(gt['categories'], key=lambda c: c['id'])
+    cat_ids = [c['id'] for c in cats]
+    img_pos = {iid: i for i, iid in enumerate(img_ids)}
+    cat_pos = {cid: k for k, cid in enumerate(cat_ids)}
+    gt_img_ids = {img['id'] for img in gt['images']}
+    if any(r['image_id'] not in gt_img_ids for r in results):
+        raise ValueError("결과에 GT에 없는 image_id가 있습니다.")
+    n_cat, n_thr, n_rec = len(cat_ids), len(IOU_THRS), len(REC_THRS)
+    n_area, n_md = len(AREA_RNGS), len(MAX_DETS)
+    thrs = np.minimum(IOU_THRS, 1 - 1e-10)
+
+    # GT: 평가 대상 이미지·클래스만, 그룹(이미지 × 클래스) → 원래 순서
+    gts = [a for a in gt['annotations'] if a['image_id'] in img_pos and a['category_id'] in cat_pos]
+    g_group = np.array([img_pos[a['image_id']] * n_cat + cat_pos[a['category_id']] for a in gts], dtype=np.int64)
+    order = np.argsort(g_group, kind='stable')
+    g_group = g_group[order]
+    g_box = np.array([gts[i]['bbox'] for i in order], dtype=np.float64).reshape(-1, 4)
+    g_area = np.array([gts[i].get('area', gts[i]['bbox'][2] * gts[i]['bbox'][3]) for i in order], dtype=np.float64)
+    g_crowd = np.array([bool(gts[i].get('iscrowd', 0)) for i in order], dtype=bool)
+
+    # 예측: 그룹 → 점수 내림차순 (동점이면 입력 순서), 그룹마다 maxDets[-1]개까지
+    dts = [r for r in results if r['image_id'] in img_pos and r['category_id'] in cat_pos]
+    d_group = np.array([img_pos[r['image_id']] * n_cat + cat_pos[r['category_id']] for r in dts], dtype=np.int64)
+    d_score = np.array([r['score'] for r in dts], dtype=np.float64)
+    order = np.lexsort((np.arange(len(dts)), -d_score, d_group))
+    d_group, d_score = d_group[order], d_score[order]
+    d_box = np.array([dts[i]['bbox'] for i in order], dtype=np.float64).reshape(-1, 4)
+    d_rank = np.arange(len(d_group)) - np.searchsorted(d_group, d_group, 'left')
+    keep = d_rank < MAX_DETS[-1]
+    d_group, d_score, d_box, d_rank = d_group[keep], d_score[keep], d_box[keep], d_rank[keep]
+    starts = np.searchsorted(d_group, d_group, 'left')
+    d_area = d_box[:, 2] * d_box[:, 3]
+    n_dt = len(d_group)
+
+    # GT ignore (crowd 또는 영역 밖, 경계 포함): (A, G) / 매칭 안 된 예측 중 영역 밖은 무시: (A, D)
+    g_ig = np.stack([g_crowd | (g_area < lo) | (g_area > hi) for _, lo, hi in AREA_RNGS]).reshape(n_area, -1)
+    d_out = np.stack([(d_area < lo) | (d_area > hi) for _, lo, hi in AREA_RNGS]).reshape(n_area, -1)
+
+    # 예측별 매칭 GT 인덱스 (A, T, D), GT 영역 판정에 따라 우선순위가 달라질 수 있어서 영역별로 계산
+    d_match = np.full((n_area, n_thr, n_dt), -1, dtype=np.int64)
+    g_lo = np.searchsorted(g_group, d_group, 'left')
+    g_cnt = np.searchsorted(g_group, d_group, 'right') - g_lo
+
+    # GT가 1개인 그룹: 점수 순으로 처음 IoU ≥ thr인 예측이 매칭 (crowd면 모두), 영역과 무관
+    one = np.flatnonzero(g_cnt == 1)
+    if len(one):
+        gi = g_lo[one]
+        iou = _iou(d_box[one], g_box[gi], g_crowd[gi])
+        hit = iou[None, :] >= thrs[:, None]
+        first = np.searchsorted(one, starts[one], 'left')  # 같은 그룹 첫 예측의 one 안 위치
+        cum = np.cumsum(hit, axis=1)
+        before = cum[:, first] - hit[:, first]
+        win = hit & ((cum - before == 1) | g_crowd[gi][None, :])
+        d_match[:, :, one] = np.where(win, gi[None, :], -1)[None]
+
+    # GT가 여러 개인 그룹: 예측을 하나씩 (IoU 임계는 한꺼번에)
+    multi = np.flatnonzero(g_cnt > 1)
+    if len(multi):
+        grp = d_group[multi]
+        bounds = np.flatnonzero(np.diff(grp)) + 1
+        for rows in np.split(multi, bounds):
+            g0, g1 = g_lo[rows[0]], g_lo[rows[0]] + g_cnt[rows[0]]
+            iou = _iou(d_box[rows][:, None], g_box[None, g0:g1], g_crowd[None, g0:g1])
+            cache = {}
+            for a in range(n_area):
+                key = g_ig[a, g0:g1].tobytes()
+                if key not in cache:
+                    cache[key] = _match_group(iou, g_ig[a, g0:g1], g_crowd[g0:g1], thrs)
+                m = cache[key]
+                d_match[a][:, rows] = np.where(m >= 0, m + g0, -1)
+
+    # 매칭된 예측은 GT의 ignore를 따르고, 매칭 안 된 예측은 영역 밖이면 무시 (A, T, D)
+    matched = d_match >= 0
+    if len(g_group):
+        d_ig = np.where(matched, g_ig[np.arange(n_area)[:, None, None], np.maximum(d_match, 0)], d_out[:, None, :])
+    else:
+        d_ig = np.broadcast_to(d_out[:, None, :], matched.shape)
+    d_cat = d_group % n_cat
+    d_img = d_group // n_cat
+    g_cat = g_group % n_cat
+
+    precision = -np.ones((n_thr, n_rec, n_cat, n_area, n_md))
+    recall = -np.ones((n_thr, n_cat, n_area, n_md))
+    # 카테고리 → 점수 내림차순 (동점이면 이미지 순서 → 이미지 안 순서, COCOeval accumulate의 mergesort와 같음)
+    cat_order = np.lexsort((d_rank, d_img, -d_score, d_cat))
+    cat_bounds = np.searchsorted(d_cat[cat_order], np.arange(n_cat + 1), 'left')
+    for k in range(n_cat):
+        idx_k = cat_order[cat_bounds[k]:cat_bounds[k + 1]]
+        for a in range(n_area):
+            npig = int(np.count_nonzero((g_cat == k) & ~g_ig[a]))
+            if npig == 0:
+                continue
+            for mi, max_det in enumerate(MAX_DETS):
+                idx = idx_k[d_rank[idx_k] < max_det]
+                tm, ig = matched[a][:, idx], d_ig[a][:, idx]
+                tp = np.cumsum(tm & ~ig, axis=1).astype(float)
+                fp = np.cumsum(~tm & ~ig, axis=1).astype(float)
+                nd = tp.shape[1]
+                if not nd:
+                    recall[:, k, a, mi] = 0
+                    precision[:, :, k, a, mi] = 0
+                    continue
+                rc = tp / npig
+                pr = tp / (fp + tp + np.spacing(1))
+                recall[:, k, a, mi] = rc[:, -1]
+                # 뒤에서부터 누적 최댓값 (precision envelope), recall 임계마다 rc가 처음 그 값 이상이 되는 위치
+                pr = np.maximum.accumulate(pr[:, ::-1], axis=1)[:, ::-1]
+                inds = (rc[:, :, None] < REC_THRS[None, None, :]).sum(axis=1)  # 행별 searchsorted(side='left')
+                valid = inds < nd
+                q = np.take_along_axis(pr, np.minimum(inds, nd - 1), axis=1)
+                precision[:, :, k, a, mi] = np.where(valid, q, 0.0)
+
+    def summarize(kind, t, a, mi, k=None):
+        s = precision[:, :, :, a, mi] if kind == 'ap' else recall[:, :, a, mi]
+        if t is not None:
+            s = s[t:t + 1]
+        if k is not None:
+            s = s[..., k]
+        s = s[s > -1]
+        return float(np.mean(s)) if s.size else -1.0
+
+    out = {'stats': [summarize(kind, t, a, mi) for _, kind, t, a, mi in _STATS]}
+    for (name, *_), value in zip(_STATS, out['stats']):
+        out[name] = value
+    n_gt = np.bincount(g_cat[~g_crowd], minlength=n_cat) if len(g_group) else np.zeros(n_cat, dtype=np.int64)
+    out['per_class'] = {
+        c['id']: {
+            'name': c.get('name', str(c['id'])), 'n_gt': int(n_gt[k]),
+            'AP': summarize('ap', None, 0, 2, k), 'AP50': summarize('ap', 0, 0, 2, k), 'AP75': summarize('ap', 5, 0, 2, k),
+            'AP_small': summarize('ap', None, 1, 2, k), 'AP_medium': summarize('ap', None, 2, 2, k),
+            'AP_large': summarize('ap', None, 3, 2, k),
+        }
+        for k, c in enumerate(cats)
+    }
+    out['precision'] = precision
+    out['recall'] = recall
+    return out
+
+def summary_lines(res):
+    """COCOeval.summarize()와 같은 형식의 12줄"""
+    labels = (
+        ('Average Precision', '0.50:0.95', 'all', 100), ('Average Precision', '0.50', 'all', 100),
+        ('Average Precision', '0.75', 'all', 100), ('Average Precision', '0.50:0.95', 'small', 100),
+        ('Average Precision', '0.50:0.95', 'medium', 100), ('Average Precision', '0.50:0.95', 'large', 100),
+        ('Average Recall', '0.50:0.95', 'all', 1), ('Average Recall', '0.50:0.95', 'all', 10),
+        ('Average Recall', '0.50:0.95', 'all', 100), ('Average Recall', '0.50:0.95', 'small', 100),
+        ('Average Recall', '0.50:0.95', 'medium', 100), ('Average Recall', '0.50:0.95', 'large', 100),
+    )
+    return [
+        f" {title:<18} {'(AP)' if title.endswith('Precision') else '(AR)'} @[ IoU={iou:<9} | area={area:>6s} | maxDets={md:>3d} ] = {v:0.3f}"
+        for (title, iou, area, md), v in zip(labels, res['stats'])
+    ]
+
+def per_class_lines(res):
+    """클래스별 AP 표 (AP50-95 낮은 순)"""
+    rows = sorted(res['per_class'].items(), key=lambda kv: kv[1]['AP'])
+    lines = [f"{'category':>10} {'n_gt':>6} {'AP50-95':>8} {'AP50':>7} {'AP75':>7}  name"]
+    for cid, r in rows:
+        lines.append(f"{cid!s:>10} {r['n_gt']:6d} {r['AP']:8.4f} {r['AP50']:7.4f} {r['AP75']:7.4f}  {r['name']}")
+    return lines
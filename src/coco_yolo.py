@@ -0,0 +1,107 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+def coco_to_yolo_texts(images, annotations, cat_to_cls=None):
+    """
+    COCO images / annotations → {image_id: YOLO 라벨 텍스트}
+    좌표 변환은 전체 annotation을 한 번에 NumPy로 계산하고 image_id별로 한 번만 묶음
+    (annotation이 없는 이미지는 빈 문자열, images에 없는 image_id의 annotation은 무시)
+    cat_to_cls: category_id → YOLO class (None이면 category_id 그대로)
+    """
+    pos = {img['id']: i for i, img in enumerate(images)}
+    anns = [a for a in annotations if a['image_id'] in pos]
+    texts = {img['id']: '' for img in images}
+    if not anns:
+        return texts
+
+    img_idx = np.fromiter((pos[a['image_id']] for a in anns), dtype=np.int64, count=len(anns))
+    sizes = np.array([(img['width'], img['height']) for img in images], dtype=np.float64)[img_idx]
+    xywh = np.array([a['bbox'] for a in anns], dtype=np.float64).reshape(-1, 4)
+    norm = np.empty_like(xywh)
+    norm[:, 0] = (xywh[:, 0] + xywh[:, 2] / 2) / sizes[:, 0]
+    norm[:, 1] = (xywh[:, 1] + xywh[:, 3] / 2) / sizes[:, 1]
+    norm[:, 2] = xywh[:, 2] / sizes[:, 0]
+    norm[:, 3] = xywh[:, 3] / sizes[:, 1]
+    cls = [a['category_id'] if cat_to_cls is None else cat_to_cls[a['category_id']] for a in anns]
+
+    # 같은 이미지 안에서는 원래 annotation 순서 유지
+    order = np.argsort(img_idx, kind='stable')
+    bounds = np.flatnonzero(np.diff(img_idx[order])) + 1
+    for group in np.split(order, bounds):
+        image_id = images[img_idx[group[0]]]['id']
+        texts[image_id] = ''.join(
+            f"{cls[k]} {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}\n" for k, (cx, cy, w, h) in zip(group, norm[group].tolist())
+        )
+    return texts
+
+def write_labels(texts, out_dir=None, workers=8, write_fn=None):
+    """
+    {상대경로: 텍스트} 라벨 파일을 스레드 풀로 병렬 저장 → 저장한 개수
+    write_fn(상대경로, 텍스트)를 주면 직접 쓰는 대신 호출 (예: BuildManifest.write_text)
+    """
+    if write_fn is None:
+        def write_fn(rel, text):
+            path = os.path.join(out_dir, rel)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+    items = list(texts.items())
+    if workers <= 1 or len(items) < 2:
+        for rel, text in items:
+            write_fn(rel, text)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda item: write_fn(*item), items))
+    return len(items)
+
+def _read_label(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return np.array(f.read().split(), dtype=np.float64).reshape(-1, 5)
+
+def read_yolo_labels(label_dir, workers=8):
+    """label_dir의 *.txt → [(파일 stem, (N, 5) 배열 cls, xc, yc, w, h)] (파일 이름 순)"""
+    names = sorted(fn for fn in os.listdir(label_dir) if fn.lower().endswith('.txt'))
+    paths = [os.path.join(label_dir, fn) for fn in names]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        arrays = list(pool.map(_read_label, paths))
+    return [(os.path.splitext(fn)[0], arr) for fn, arr in zip(names, arrays)]
+
+def yolo_to_coco_annotations(labels, sizes, cls_to_cat=None, start_id=1):
+    """
+    read_yolo_labels 결과 → COCO annotation 목록 (image_id는 라벨 파일 stem)
+    sizes: {stem: (width, height)} 또는 모든 이미지에 쓸 (width, height) 하나
+    cls_to_cat: {YOLO class: category_id} (None이면 class 그대로)
+    """
+    stems = [stem for stem, arr in labels for _ in range(len(arr))]
+    if not stems:
+        return []
+    rows = np.concatenate([arr for _, arr in labels if len(arr)])
+    if isinstance(sizes, dict):
+        # 파일 단위 크기를 박스 개수만큼 반복 (박스마다 dict 조회하지 않음)
+        counts = np.array([len(arr) for _, arr in labels], dtype=np.int64)
+        per_file = np.array([sizes[stem] for stem, _ in labels], dtype=np.float64).reshape(-1, 2)
+        wh = np.repeat(per_file, counts, axis=0)
+    else:
+        wh = np.broadcast_to(np.asarray(sizes, dtype=np.float64), (len(stems), 2))
+    xc, yc, w, h = rows[:, 1], rows[:, 2], rows[:, 3], rows[:, 4]
+    bx = (xc - w / 2) * wh[:, 0]
+    by = (yc - h / 2) * wh[:, 1]
+    bw = w * wh[:, 0]
+    bh = h * wh[:, 1]
+    area = bw * bh
+
+    cls = rows[:, 0].astype(np.int64).tolist()
+    cats = cls if cls_to_cat is None else [cls_to_cat[c] for c in cls]
+    return [
+        {
+            "id": start_id + i,
+            "image_id": stem,
+            "category_id": cat,
+            "bbox": [x, y, bw_, bh_],
+            "area": a,
+            "iscrowd": 0
+        }
+        for i, (stem, cat, x, y, bw_, bh_, a) in enumerate(
+            zip(stems, cats, bx.tolist(), by.tolist(), bw.tolist(), bh.tolist(), area.tolist()))
+    ]
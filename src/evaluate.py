@@ -1,5 +1,29 @@
+import os
 import argparse
-from models.model import get_yolov8_model
+from src.loader import read_bytes, decode_bytes
+from src.render import AsyncImageWriter
+
+def evaluate_with_server(args, chunk=64):
+    """추론 서버(src.server)의 첫 번째 모델로 예측해서 박스 그린 이미지를 save_dir/pill_eval/에 저장"""
+    from src.server import InferenceClient
+    from src.inference import list_images
+
+    client = InferenceClient(args.server)
+    client.check_checkpoints([args.weights], first_only=True)
+    img_files = list_images(args.source)
+    with AsyncImageWriter(os.path.join(args.save_dir, 'pill_eval')) as image_writer:
+        for start in range(0, len(img_files), chunk):
+            names = img_files[start:start + chunk]
+            bufs = [read_bytes(os.path.join(args.source, fn)) for fn in names]
+            for fn, buf in zip(names, bufs):
+                if buf is None:
+                    print(f"[WARN] 이미지를 못 읽음: {fn}")
+            names = [fn for fn, buf in zip(names, bufs) if buf is not None]
+            bufs = [buf for buf in bufs if buf is not None]
+            resps = client.predict_many(bufs, conf=args.conf, iou=args.iou, imgsz=args.imgsz)
+            for fn, buf, resp in zip(names, bufs, resps):
+                dets = [(int(d[0]), int(d[1]), int(d[2]), int(d[3]), int(d[5]), float(d[4])) for d in resp['dets'][0]]
+                image_writer.submit(fn, decode_bytes(buf), dets)
 
 def main():
     parser = argparse.ArgumentParser("Evaluate images with trained model")
@@ -9,8 +33,16 @@ def main():
     parser.add_argument('--conf',    type=float, default=0.25)
     parser.add_argument('--iou',     type=float, default=0.45)
     parser.add_argument('--save_dir', type=str, default='runs/evaluate')
+    parser.add_argument('--server', type=str, default=None, help="추론 서버 URL (지정 시 모델을 로드하지 않음)")
     args = parser.parse_args()
 
+    if args.server:
+        evaluate_with_server(args)
+        print(f"Evaluation 완료 → 결과는 {args.save_dir}/pill_eval/")
+        return
+
+    from models.model import get_yolov8_model
+
     _, predict_fn = get_yolov8_model(
         pretrained=args.weights,
         imgsz=args.imgsz,
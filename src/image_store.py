@@ -0,0 +1,301 @@
+import os
+import time
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from src.imgsize import CACHE_NAME, image_sizes, probe_size
+from src.train_cache import IMG_EXTS, resized_shape
+
+DATA_NAME = 'images.u8'
+INDEX_NAME = 'index.npz'
+STORE_VERSION = 2
+
+def _atomic_path(path):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    os.close(fd)
+    return tmp
+
+def compile_store(img_dir, out_dir, sizes=(640,), coco=None, workers=8):
+    """
+    img_dir 이미지를 크기별로 줄여서 하나의 uint8 파일(images.u8)에 이어 붙이고 index.npz에 위치·박스 기록
+
+    - 이미지는 한 번만 디코딩하고, 원본에서 바로 각 크기로 축소 (긴 변 = size, ultralytics load_image와 같은 규칙)
+    - 헤더로 미리 읽은 크기(src.imgsize)로 전체 파일 크기와 offset을 먼저 정하고, 스레드 풀이 서로 다른 구간에 씀
+    - coco (images / annotations, bbox xywh)를 주면 file_name 기준 박스를 원본 좌표와 크기별 좌표(xyxy)로 저장
+    - 원본 폴더와 이미지별 (mtime_ns, 파일 크기)를 기록 → ImageStore가 바뀐 원본·다른 이미지를 걸러냄
+    - 디코딩에 실패한 이미지는 index에서 뺌 (images.u8의 해당 구간은 쓰이지 않는 빈 공간으로 남음)
+    반환: 저장한 이미지 수
+    """
+    sizes = sorted(set(int(s) for s in sizes), reverse=True)
+    fnames = sorted(fn for fn in os.listdir(img_dir) if fn.lower().endswith(IMG_EXTS))
+    paths = [os.path.join(img_dir, fn) for fn in fnames]
+    found = image_sizes(paths, cache_path=os.path.join(img_dir, CACHE_NAME), workers=workers * 2)
+    for path in paths:
+        if path not in found:
+            print(f"[WARN] 크기를 읽을 수 없는 이미지 건너뜀: {path}")
+    paths = [p for p in paths if p in found]
+    names = np.array([os.path.basename(p) for p in paths])
+    orig = np.array([found[p] for p in paths], dtype=np.int32).reshape(-1, 2)   # (w, h)
+    stats = [os.stat(p) for p in paths]
+    mtime_ns = np.array([st.st_mtime_ns for st in stats], dtype=np.int64)
+    file_size = np.array([st.st_size for st in stats], dtype=np.int64)
+
+    # 크기별 (h, w)와 offset (크기 순서대로, 그 안에서는 이미지 순서대로)
+    shapes = {s: np.array([resized_shape(w, h, s) for w, h in orig.tolist()], dtype=np.int64).reshape(-1, 2)
+              for s in sizes}
+    offsets, total = {}, 0
+    for s in sizes:
+        nbytes = shapes[s][:, 0] * shapes[s][:, 1] * 3
+        offsets[s] = total + np.concatenate([[0], np.cumsum(nbytes)[:-1]]).astype(np.int64)
+        total += int(nbytes.sum())
+
+    os.makedirs(out_dir, exist_ok=True)
+    data_path = os.path.join(out_dir, DATA_NAME)
+    tmp_data = _atomic_path(data_path)
+    failed = []
+    try:
+        data = np.memmap(tmp_data, dtype=np.uint8, mode='w+', shape=(max(total, 1),))
+
+        def write(i):
+            img = cv2.imread(paths[i])
+            if img is None:
+                failed.append(paths[i])
+                return
+            for s in sizes:
+                h, w = shapes[s][i]
+                out = img if img.shape[:2] == (h, w) else cv2.resize(img, (int(w), int(h)), interpolation=cv2.INTER_LINEAR)
+                data[offsets[s][i]:offsets[s][i] + h * w * 3] = out.reshape(-1)
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            list(pool.map(write, range(len(paths))))
+        data.flush()
+        del data
+        os.replace(tmp_data, data_path)
+    finally:
+        if os.path.exists(tmp_data):
+            os.remove(tmp_data)
+    for path in failed:
+        print(f"[WARN] 디코딩 실패 → 저장소에서 제외: {path}")
+    failed = set(failed)
+    keep = np.array([p not in failed for p in paths], dtype=bool)
+    paths = [p for p, k in zip(paths, keep) if k]
+    names, orig, mtime_ns, file_size = names[keep], orig[keep], mtime_ns[keep], file_size[keep]
+    shapes = {s: shapes[s][keep] for s in sizes}
+    offsets = {s: offsets[s][keep] for s in sizes}
+
+    # 박스: file_name → 이미지 번호, xywh → xyxy, 크기별로 (축소 w / 원본 w, 축소 h / 원본 h) 배율 적용
+    box_image, box_cat, boxes = [], [], []
+    if coco is not None:
+        pos = {name: i for i, name in enumerate(names.tolist())}
+        id_to_pos = {img['id']: pos.get(os.path.basename(img['file_name'])) for img in coco['images']}
+        for ann in coco['annotations']:
+            i = id_to_pos.get(ann['image_id'])
+            if i is not None:
+                box_image.append(i)
+                box_cat.append(ann['category_id'])
+                boxes.append(ann['bbox'])
+    box_image = np.array(box_image, dtype=np.int64)
+    boxes = np.array(boxes, dtype=np.float64).reshape(-1, 4)
+    boxes[:, 2:] += boxes[:, :2]
+
+    arrays = {
+        'version': np.array(STORE_VERSION), 'names': names, 'orig_wh': orig, 'sizes': np.array(sizes, dtype=np.int64),
+        'src_dir': np.array(os.path.abspath(img_dir)), 'mtime_ns': mtime_ns, 'file_size': file_size,
+        'box_image': box_image, 'box_cat': np.array(box_cat, dtype=np.int64), 'boxes': boxes.astype(np.float32),
+    }
+    for s in sizes:
+        scale = (shapes[s][:, ::-1] / np.maximum(orig, 1))[box_image]          # (M, 2) = (sx, sy)
+        arrays[f'shape_{s}'] = shapes[s]
+        arrays[f'offset_{s}'] = offsets[s]
+        arrays[f'boxes_{s}'] = (boxes * np.tile(scale, 2)).astype(np.float32)
+    index_path = os.path.join(out_dir, INDEX_NAME)
+    tmp_index = _atomic_path(index_path)
+    try:
+        with open(tmp_index, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_index, index_path)
+    finally:
+        if os.path.exists(tmp_index):
+            os.remove(tmp_index)
+    return len(paths)
+
+class ImageStore:
+    """
+    compile_store 결과 읽기
+    image()는 images.u8 memmap의 구간을 (h, w, 3)으로 reshape한 view라서 복사·디코딩 없음
+    mode='c'(copy-on-write)면 view를 수정해도 파일은 그대로 (ultralytics 증강처럼 제자리 수정하는 경우)
+    pickle할 때는 memmap을 빼고 보내서 DataLoader worker가 각자 다시 엶
+    index()는 저장 당시 기록한 원본 (mtime, 크기)와 다르면(원본이 바뀜) 또는 요청한 파일 크기가 다르면(다른 이미지)
+    None을 반환해서 호출하는 쪽이 원본을 디코딩하도록 함
+    """
+
+    def __init__(self, root, mode='r'):
+        self.root = root
+        self.mode = mode
+        with np.load(os.path.join(root, INDEX_NAME), allow_pickle=False) as z:
+            if int(z['version']) != STORE_VERSION:
+                raise ValueError(f"이미지 저장소 버전이 다릅니다: {root} (python -m src.image_store 로 다시 생성)")
+            idx = {k: z[k] for k in z.files}
+        self.names = idx['names'].tolist()
+        self.sizes = idx['sizes'].tolist()
+        self.orig_wh = idx['orig_wh']
+        self.src_dir = str(idx['src_dir'])
+        self._idx = idx
+        self._pos = {name: i for i, name in enumerate(self.names)}
+        self._checked = {}      # 경로 → 사용 가능 여부 (경로마다 stat 한 번)
+        self._warned = set()
+        # 이미지별 박스 구간 (box_image는 이미지 순서대로 정렬돼 있지 않을 수 있음)
+        order = np.argsort(idx['box_image'], kind='stable')
+        self._box_order = order
+        self._box_lo = np.searchsorted(idx['box_image'][order], np.arange(len(self.names)), 'left')
+        self._box_hi = np.searchsorted(idx['box_image'][order], np.arange(len(self.names)), 'right')
+        self._data = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_data'] = None
+        return state
+
+    def _mm(self):
+        if self._data is None:
+            self._data = np.memmap(os.path.join(self.root, DATA_NAME), dtype=np.uint8, mode=self.mode)
+        return self._data
+
+    def _warn(self, kind, path):
+        if kind not in self._warned:
+            self._warned.add(kind)
+            print(f"[WARN] 이미지 저장소 {self.root}: {kind} ({path} 등) → 원본에서 읽음 "
+                  f"(python -m src.image_store 로 다시 생성)")
+
+    def _usable(self, path, i):
+        # 원본이 저장 후 바뀌었는지 (원본 폴더의 같은 이름 파일, 없으면 확인 생략)
+        src = os.path.join(self.src_dir, self.names[i])
+        try:
+            st = os.stat(src)
+            if (st.st_mtime_ns, st.st_size) != (int(self._idx['mtime_ns'][i]), int(self._idx['file_size'][i])):
+                self._warn("저장 후 바뀐 원본", path)
+                return False
+        except OSError:
+            pass
+        # 요청한 파일(복사본일 수 있음, 복사하면 mtime이 바뀜)이 저장한 이미지와 같은지 (파일 크기 + 헤더 해상도)
+        if not os.path.exists(path) or os.path.abspath(path) == src:
+            return True
+        wh = probe_size(path)
+        if os.path.getsize(path) != int(self._idx['file_size'][i]) or \
+                (wh is not None and tuple(wh) != tuple(self.orig_wh[i].tolist())):
+            self._warn("이름만 같은 다른 이미지", path)
+            return False
+        return True
+
+    def index(self, path):
+        """파일 경로(또는 이름) → 이미지 번호 (없거나 원본과 맞지 않으면 None, 파일 이름으로 찾음)"""
+        path = str(path)
+        i = self._pos.get(os.path.basename(path))
+        if i is None:
+            return None
+        ok = self._checked.get(path)
+        if ok is None:
+            ok = self._checked[path] = self._usable(path, i)
+        return i if ok else None
+
+    def pick_size(self, imgsz):
+        """imgsz 이상인 저장 크기 중 가장 작은 것 (없으면 가장 큰 것)"""
+        larger = [s for s in self.sizes if s >= imgsz]
+        return min(larger) if larger else max(self.sizes)
+
+    def image(self, i, size):
+        h, w = self._idx[f'shape_{size}'][i]
+        off = self._idx[f'offset_{size}'][i]
+        return self._mm()[off:off + h * w * 3].reshape(h, w, 3)
+
+    def get(self, path, size):
+        """경로 → 저장된 BGR 이미지 view (저장소에 없으면 None)"""
+        i = self.index(path)
+        return None if i is None else self.image(i, size)
+
+    def boxes(self, i, size=None):
+        """이미지 i의 (박스 xyxy (K, 4), category_id (K,)), size=None이면 원본 좌표"""
+        sel = self._box_order[self._box_lo[i]:self._box_hi[i]]
+        key = 'boxes' if size is None else f'boxes_{size}'
+        return self._idx[key][sel], self._idx['box_cat'][sel]
+
+class _StoreImageLoader:
+    """
+    ultralytics BaseDataset.load_image 대체 (저장소에 있는 이미지는 PNG 디코딩 없이 memmap view 사용)
+    반환 형식·mosaic buffer 처리는 원래 load_image와 같고, 저장소에 없는 이미지는 원래 함수로 처리
+    """
+
+    def __init__(self, dataset, store):
+        self.dataset = dataset
+        self.store = store
+        self.size = store.pick_size(dataset.imgsz)
+
+    def __call__(self, i, rect_mode=True):
+        ds = self.dataset
+        if ds.ims[i] is not None:
+            return ds.ims[i], ds.im_hw0[i], ds.im_hw[i]
+        k = self.store.index(ds.im_files[i])
+        if k is None:
+            return type(ds).load_image(ds, i, rect_mode)
+        im = self.store.image(k, self.size)
+        w0, h0 = self.store.orig_wh[k].tolist()
+        if rect_mode:
+            h, w = resized_shape(w0, h0, ds.imgsz)
+            if im.shape[:2] != (h, w):
+                im = cv2.resize(im, (w, h), interpolation=cv2.INTER_LINEAR)
+        elif im.shape[:2] != (ds.imgsz, ds.imgsz):
+            im = cv2.resize(im, (ds.imgsz, ds.imgsz), interpolation=cv2.INTER_LINEAR)
+        if ds.augment:
+            ds.ims[i], ds.im_hw0[i], ds.im_hw[i] = im, (h0, w0), im.shape[:2]
+            ds.buffer.append(i)
+            if 1 < len(ds.buffer) >= ds.max_buffer_length:
+                j = ds.buffer.pop(0)
+                if ds.cache != 'ram':
+                    ds.ims[j], ds.im_hw0[j], ds.im_hw[j] = None, None, None
+        return im, (h0, w0), im.shape[:2]
+
+def store_trainer(store_root):
+    """
+    model.train(trainer=...)에 넘길 DetectionTrainer 하위 클래스
+    train / val 데이터셋의 load_image를 저장소 읽기로 바꿈 (라벨은 기존 YOLO txt 그대로)
+    """
+    from ultralytics.models.yolo.detect import DetectionTrainer
+
+    class StoreTrainer(DetectionTrainer):
+        def build_dataset(self, img_path, mode='train', batch=None):
+            dataset = super().build_dataset(img_path, mode, batch)
+            dataset.load_image = _StoreImageLoader(dataset, ImageStore(store_root, mode='c'))
+            return dataset
+
+    return StoreTrainer
+
+def main():
+    parser = argparse.ArgumentParser("raw 이미지 → 크기별로 줄인 memory-mapped uint8 이미지 저장소 (+ 박스 index)")
+    parser.add_argument('--img_dir',  default='data/raw_data/train_images')
+    parser.add_argument('--ann_root', default=None, help='train_annotations 폴더 (지정 시 src.ann_index로 박스도 저장)')
+    parser.add_argument('--out_dir',  default='data/image_store')
+    parser.add_argument('--sizes',    type=int, nargs='+', default=[640], help='저장할 긴 변 크기 (예: 640 512)')
+    parser.add_argument('--workers',  type=int, default=8)
+    args = parser.parse_args()
+
+    coco = None
+    if args.ann_root:
+        from src.ann_index import load_index
+        coco = load_index(args.ann_root).coco()
+
+    start = time.perf_counter()
+    n = compile_store(args.img_dir, args.out_dir, args.sizes, coco, args.workers)
+    store = ImageStore(args.out_dir)
+    size_mb = os.path.getsize(os.path.join(args.out_dir, DATA_NAME)) / 1024 ** 2
+    print(f"[INFO] {n} images × sizes {store.sizes} → {args.out_dir} ({size_mb:.1f} MB, 박스 {len(store._idx['boxes'])}개, "
+          f"{time.perf_counter() - start:.1f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import os
+import json
+import struct
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+CACHE_NAME = '.imgsize_cache.json'
+CACHE_VERSION = 1
+
+_PNG_SIG = b'\x89PNG\r\n\x1a\n'
+# 크기 정보가 있는 JPEG SOF 마커 (DHT C4, JPG C8, DAC CC 제외)
+_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# 길이 필드가 없는 단독 마커 (TEM, RST0~7, SOI)
+_STANDALONE = {0x01, *range(0xD0, 0xD9)}
+
+def _exif_orientation(seg):
+    """APP1 Exif 세그먼트 내용 → Orientation 태그 값 (없으면 1)"""
+    if seg[:6] != b'Exif\x00\x00':
+        return 1
+    tiff = seg[6:]
+    if tiff[:2] == b'II':
+        end = '<'
+    elif tiff[:2] == b'MM':
+        end = '>'
+    else:
+        return 1
+    try:
+        ifd = struct.unpack(end + 'I', tiff[4:8])[0]
+        count = struct.unpack(end + 'H', tiff[ifd:ifd + 2])[0]
+        for i in range(count):
+            off = ifd + 2 + i * 12
+            tag, typ = struct.unpack(end + 'HH', tiff[off:off + 4])
+            if tag == 0x0112 and typ == 3:
+                return struct.unpack(end + 'H', tiff[off + 8:off + 10])[0]
+    except struct.error:
+        pass
+    return 1
+
+def _jpeg_size(f):
+    """SOI 다음부터 마커를 따라가며 SOF의 크기를 읽음 (EXIF 회전 5~8이면 가로·세로를 바꿈)"""
+    orientation = 1
+    while True:
+        b = f.read(1)
+        while b and b != b'\xff':  # 마커 사이 쓰레기 바이트 건너뜀
+            b = f.read(1)
+        while b == b'\xff':  # fill 바이트
+            b = f.read(1)
+        if not b:
+            return None
+        marker = b[0]
+        if marker in _STANDALONE:
+            continue
+        if marker in (0xD9, 0xDA):  # EOI / SOS 전에 SOF가 없으면 실패
+            return None
+        raw = f.read(2)
+        if len(raw) < 2:
+            return None
+        length = struct.unpack('>H', raw)[0] - 2
+        if marker in _SOF:
+            data = f.read(5)
+            if len(data) < 5:
+                return None
+            h, w = struct.unpack('>HH', data[1:5])
+            return (h, w) if orientation in (5, 6, 7, 8) else (w, h)
+        if marker == 0xE1 and orientation == 1:
+            orientation = _exif_orientation(f.read(length))
+        else:
+            f.seek(length, os.SEEK_CUR)
+
+def probe_size(path):
+    """
+    픽셀을 디코딩하지 않고 PNG / JPEG 헤더만 읽어서 (width, height) 반환
+    다른 형식이거나 헤더가 깨졌으면 cv2로 디코딩해서 확인 (읽기 실패 시 None)
+    JPEG EXIF 회전은 cv2.imread와 같게 적용
+    """
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(24)
+            if head[:8] == _PNG_SIG and head[12:16] == b'IHDR':
+                return struct.unpack('>II', head[16:24])
+            if head[:2] == b'\xff\xd8':
+                f.seek(2)
+                size = _jpeg_size(f)
+                if size is not None:
+                    return size
+    except OSError:
+        return None
+    from src.loader import decode_image
+    img = decode_image(path)
+    return None if img is None else (img.shape[1], img.shape[0])
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state.get('entries', {}) if state.get('version') == CACHE_VERSION else {}
+
+def _save_cache(cache_path, entries):
+    cache_dir = os.path.dirname(os.path.abspath(cache_path))
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'entries': entries}, f)
+        os.replace(tmp, cache_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def image_sizes(paths, cache_path=None, workers=16):
+    """
+    이미지 경로 목록 → {경로: (width, height)} (크기를 못 읽은 이미지는 빠짐)
+    cache_path를 주면 (mtime_ns, size)가 같은 파일은 다시 읽지 않고, 새로 읽은 결과를 기존 캐시에 합쳐서 저장
+    (폴더 일부만 넘겨도 다른 이미지 항목은 유지, 이번에 못 읽은 이미지 항목만 삭제)
+    헤더 읽기는 I/O 대기라서 스레드 풀로 병렬 처리
+    """
+    paths = [str(p) for p in paths]
+    cache_dir = os.path.dirname(os.path.abspath(cache_path)) if cache_path else None
+    old = _load_cache(cache_path) if cache_path else {}
+
+    def probe(path):
+        key = os.path.relpath(os.path.abspath(path), cache_dir) if cache_dir else path
+        try:
+            st = os.stat(path)
+        except OSError:
+            return key, None
+        rec = old.get(key)
+        if rec and rec[0] == st.st_mtime_ns and rec[1] == st.st_size:
+            return key, rec
+        size = probe_size(path)
+        return key, None if size is None else [st.st_mtime_ns, st.st_size, int(size[0]), int(size[1])]
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(probe, paths))
+
+    sizes, entries = {}, dict(old)
+    for path, (key, rec) in zip(paths, results):
+        if rec is None:
+            entries.pop(key, None)
+        else:
+            sizes[path] = (rec[2], rec[3])
+            entries[key] = rec
+    if cache_path and entries != old:
+        _save_cache(cache_path, entries)
+    return sizes
@@ -1,11 +1,21 @@
 import os
+import time
 import argparse
-import csv
-import cv2
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import json
 import yaml
-from ensemble_boxes import weighted_boxes_fusion
-from ultralytics import YOLO
+import numpy as np
+from models.model import BACKENDS, export_onnx, load_model, find_int8_artifact
+from src.loader import PrefetchLoader, group_by_shape, decode_image, read_bytes, decode_bytes
+from src.pred_cache import PredictionCache, decode_with_hash
+from src.wbf import weighted_boxes_fusion, nms
+from src.render import RENDER_MODES, AsyncImageWriter, should_render
+from src.sinks import JsonlSink, MultiSink, open_sink, read_jsonl_rows
+from src.calibration import ScoreCalibrator, calibration_artifact_path
+from src.image_store import ImageStore
+
+IMG_EXTS = (".png", ".jpg", ".jpeg")
 
 def load_cat_id_map(data_yaml_path):
     with open(data_yaml_path, 'r', encoding='utf-8') as f:  # ← 여기 중요
@@ -18,89 +28,380 @@ def load_cat_id_map(data_yaml_path):
     else:
         raise TypeError("data.yaml의 names 필드 형식이 잘못되었습니다.")
 
-def main():
-    parser = argparse.ArgumentParser("YOLOv8 inference")
-    parser.add_argument("--checkpoint", type=str, required=True)
-    parser.add_argument("--img_folder", type=str, required=True)
-    parser.add_argument("--output_folder", type=str, default="output")
-    parser.add_argument("--csv_file", type=str, default="predictions.csv")
-    parser.add_argument("--data_yaml", type=str, default="data.yaml")
-    parser.add_argument("--conf_thresh", type=float, default=0.25)
-    parser.add_argument("--iou_thresh", type=float, default=0.45)
-    parser.add_argument("--tta", action="store_true")
-    parser.add_argument("--ensemble_ckpts", nargs='+', default=[])
-    args = parser.parse_args()
+def list_images(img_folder):
+    return sorted([
+        fn for fn in os.listdir(img_folder)
+        if fn.lower().endswith(IMG_EXTS)
+    ])
 
-    os.makedirs(args.output_folder, exist_ok=True)
-    cat_id_map = load_cat_id_map(args.data_yaml)
+def predict_batch(models, imgs, conf, iou, augment, cache=None, ckpt_hashes=None, img_hashes=None, **predict_kwargs):
+    """
+    배치 전체를 모델마다 한 번의 predict 호출로 처리
+    cache를 주면 (체크포인트 해시, 이미지 해시, 예측 파라미터) 키로 저장된 결과는 재사용하고 나머지만 예측
+    반환: 이미지별로 [모델별 (N, 6) 배열(x1, y1, x2, y2, score, cls)] 리스트
+    """
+    per_image = [[None] * len(models) for _ in imgs]
+    params = dict(conf=conf, iou=iou, augment=augment, imgsz=predict_kwargs.get('imgsz'))
+    for m, model in enumerate(models):
+        todo = list(range(len(imgs)))
+        keys = None
+        if cache is not None:
+            keys = [cache.make_key(ckpt_hashes[m], img_hash, **params) for img_hash in img_hashes]
+            todo = []
+            for i, key in enumerate(keys):
+                dets = cache.get(key)
+                if dets is None:
+                    todo.append(i)
+                else:
+                    per_image[i][m] = dets
 
-    ckpt_paths = [args.checkpoint] + args.ensemble_ckpts
-    models = [YOLO(ckpt) for ckpt in ckpt_paths]
-    print(f"[INFO] {len(models)} model(s) loaded.")
+        # 고정 batch ONNX 모델은 그 크기 단위로만 예측 가능 (torch / dynamic ONNX는 그룹 전체를 한 번에)
+        static_batch = getattr(model, 'static_batch', 0)
+        for group in group_by_shape([imgs[i] for i in todo]):
+            group = [todo[k] for k in group]
+            step = static_batch or len(group)
+            for start in range(0, len(group), step):
+                idxs = group[start:start + step]
+                source = [imgs[i] for i in idxs]
+                source += [source[-1]] * (step - len(source))  # 모자라는 자리는 마지막 이미지로 채우고 결과는 버림
+                preds = model.predict(
+                    source=source,
+                    conf=conf,
+                    iou=iou,
+                    augment=augment,
+                    save=False,
+                    verbose=False,
+                    **predict_kwargs
+                )
+                for i, pred in zip(idxs, preds):
+                    dets = pred.boxes.data.cpu().numpy()
+                    per_image[i][m] = dets
+                    if cache is not None:
+                        cache.put(keys[i], dets)
+    return per_image
 
-    img_files = sorted([
-        fn for fn in os.listdir(args.img_folder)
-        if fn.lower().endswith((".png", ".jpg", ".jpeg"))
-    ])
+def predict_kwargs(args):
+    """--imgsz가 있을 때만 predict에 넘김 (없으면 ultralytics 기본값, 기존 동작과 동일)"""
+    return {'imgsz': args.imgsz} if args.imgsz else {}
+
+def resolve_model_paths(args, ckpt_paths):
+    """
+    --backend onnx면 체크포인트마다 ONNX export(.pt 옆에 캐시)를 준비해서 그 경로 목록을 반환
+    shard 워커가 동시에 export하지 않도록 메인 프로세스에서 한 번만 호출
+    """
+    if args.backend == "torch":
+        return list(ckpt_paths)
+    imgsz = args.imgsz or 640
+    onnx_paths = [export_onnx(ckpt, imgsz=imgsz, batch=args.onnx_batch) for ckpt in ckpt_paths]
+    if args.backend == "onnx":
+        return onnx_paths
+
+    # int8: scripts/quantize_int8.py의 정확도 gate를 통과한 모델만 남아 있음
+    return [find_int8_artifact(onnx_path) for onnx_path in onnx_paths]
+
+def nms_iou(args):
+    """모델 내부 NMS IoU (--nms_iou가 없으면 WBF와 같은 --iou_thresh, 기존 동작)"""
+    return args.iou_thresh if args.nms_iou is None else args.nms_iou
+
+def load_models(args, model_paths):
+    return [load_model(path, batch=args.onnx_batch) for path in model_paths]
+
+def open_cache(args, ckpt_paths):
+    """--cache_dir가 있으면 (PredictionCache, 체크포인트 해시 목록), 없으면 (None, None)"""
+    if not args.cache_dir:
+        return None, None
+    cache = PredictionCache(args.cache_dir, args.cache_max_mb)
+    return cache, [cache.checkpoint_hash(ckpt) for ckpt in ckpt_paths]
+
+def load_calibrators(args, ckpt_paths):
+    """--calibrate면 체크포인트마다 <ckpt>_calib.json (scripts/fit_calibration.py로 생성), 아니면 None"""
+    if not args.calibrate:
+        return None
+    paths = [calibration_artifact_path(ckpt) for ckpt in ckpt_paths]
+    missing = [path for path in paths if not os.path.exists(path)]
+    if missing:
+        raise SystemExit(f"보정 매핑이 없습니다: {', '.join(missing)} (python -m scripts.fit_calibration 으로 먼저 생성)")
+    return [ScoreCalibrator.load(path) for path in paths]
+
+def calibrate_detections(dets_per_model, calibrators, conf):
+    """모델별 raw 검출 점수를 보정 매핑으로 바꾸고 보정 점수가 conf 미만인 박스는 WBF 전에 버림 (캐시 배열은 수정하지 않음)"""
+    out = []
+    for data, calibrator in zip(dets_per_model, calibrators):
+        if data.shape[0] == 0:
+            out.append(data)
+            continue
+        scores = calibrator.apply(data[:, 4], data[:, 5].astype(int))
+        keep = scores >= conf
+        data = data[keep]
+        data[:, 4] = scores[keep]
+        out.append(data)
+    return out
+
+def fuse_detections(dets_per_model, w, h, iou_thr, skip_box_thr, method="wbf", conf_type="avg"):
+    """모델별 검출 결과를 정규화 좌표로 바꿔 WBF(또는 NMS) 수행 (검출이 없으면 None)"""
+    dets_per_model = [data for data in dets_per_model if data.shape[0] > 0]
+    if not dets_per_model:
+        return None
+
+    scale = np.array([w, h, w, h], dtype=dets_per_model[0].dtype)
+    all_boxes = [data[:, :4] / scale for data in dets_per_model]
+    all_scores = [data[:, 4] for data in dets_per_model]
+    all_labels = [data[:, 5].astype(int) for data in dets_per_model]
+
+    if method == "nms":
+        return nms(all_boxes, all_scores, all_labels, iou_thr=iou_thr, skip_box_thr=skip_box_thr)
+    return weighted_boxes_fusion(
+        all_boxes, all_scores, all_labels,
+        iou_thr=iou_thr,
+        skip_box_thr=skip_box_thr,
+        conf_type=conf_type
+    )
+
+def open_image_writer(args):
+    """--render none이면 None (CSV만 생성하고 시각화 비용은 전혀 없음)"""
+    if args.render == "none":
+        return None
+    return AsyncImageWriter(
+        args.output_folder,
+        num_workers=args.render_workers,
+        queue_depth=args.render_queue,
+        fmt=args.render_format,
+        jpeg_quality=args.jpeg_quality
+    )
+
+def store_decoder(store, imgsz):
+    """저장소에 있는 이미지는 memmap view (디코딩·축소 없음), 없는 이미지는 cv2 디코딩"""
+    size = store.pick_size(imgsz)
+
+    def decode(path):
+        img = store.get(path, size)
+        return decode_image(path) if img is None else img
+    return decode
+
+def run_inference(models, args, img_files, cat_id_map, sink, ann_id=1, cache=None, ckpt_hashes=None, image_writer=None,
+                  client=None, calibrators=None):
+    """
+    img_files 순서대로 추론해서 sink(src.sinks)에 행을 기록하고 다음 annotation_id 반환
+    image_writer가 있으면 렌더링 대상 이미지를 백그라운드에서 그려서 저장
+    client(src.server.InferenceClient)를 주면 로컬 모델 대신 서버에 파일 bytes를 보내 fused 결과를 받음
+    calibrators(모델별 ScoreCalibrator)를 주면 conf_thresh는 보정 점수 기준이고,
+    모델 predict에는 보정 후 conf_thresh에 닿을 수 있는 최소 raw 점수를 넘김
+    """
+    predict_conf = args.conf_thresh
+    if calibrators is not None:
+        predict_conf = min(cal.raw_threshold(args.conf_thresh) for cal in calibrators)
+    store = ImageStore(args.image_store) if getattr(args, 'image_store', None) else None
+    if client is not None:
+        decode_fn = read_bytes
+    elif store is not None:
+        decode_fn = store_decoder(store, args.imgsz or 640)
+    else:
+        decode_fn = decode_image if cache is None else decode_with_hash
+    loader = PrefetchLoader(
+        [os.path.join(args.img_folder, fn) for fn in img_files],
+        batch_size=args.batch_size,
+        num_workers=args.num_workers,
+        queue_depth=args.queue_depth,
+        decode_fn=decode_fn
+    )
+    for paths, items in loader:
+        names = [os.path.basename(p) for p in paths]
+        for img_name, item in zip(names, items):
+            if item is None:
+                print(f"[WARN] 이미지를 못 읽음: {img_name}")
+        names = [n for n, item in zip(names, items) if item is not None]
+        items = [item for item in items if item is not None]
+
+        # 이미지별 (원본 이미지 또는 파일 bytes, w, h, fused)
+        if client is not None:
+            resps = client.predict_many(
+                items, conf=args.conf_thresh, iou=args.iou_thresh, augment=args.tta, fuse=args.fusion,
+                imgsz=args.imgsz
+            )
+            results = [(buf, r['width'], r['height'], r['fused']) for buf, r in zip(items, resps)]
+        else:
+            if cache is None:
+                imgs, img_hashes = items, None
+            else:
+                imgs = [img for img, _ in items]
+                img_hashes = [img_hash for _, img_hash in items]
 
-    with open(args.csv_file, "w", newline="", encoding="utf-8-sig") as f:
-        writer = csv.writer(f)
-        writer.writerow(["annotation_id", "image_id", "category_id", "bbox_x", "bbox_y", "bbox_w", "bbox_h", "score"])
-        ann_id = 1
+            batch_dets = predict_batch(
+                models, imgs, predict_conf, nms_iou(args), args.tta,
+                cache=cache, ckpt_hashes=ckpt_hashes, img_hashes=img_hashes,
+                **predict_kwargs(args)
+            )
+            if calibrators is not None:
+                batch_dets = [calibrate_detections(dets, calibrators, args.conf_thresh) for dets in batch_dets]
+            results = []
+            for img_name, img, dets in zip(names, imgs, batch_dets):
+                h, w = img.shape[:2]
+                fused = fuse_detections(dets, w, h, args.iou_thresh, args.conf_thresh, args.fusion)
+                # 저장소 이미지는 줄인 크기라서 정규화 좌표를 원본 크기로 되돌림
+                k = store.index(os.path.join(args.img_folder, img_name)) if store is not None else None
+                if k is not None:
+                    w, h = store.orig_wh[k].tolist()
+                results.append((img, w, h, fused))
 
-        for img_name in img_files:
+        for img_name, (img, w, h, fused) in zip(names, results):
             base = os.path.splitext(img_name)[0]
             image_id = int(base) if base.isdigit() else base
-            img_path = os.path.join(args.img_folder, img_name)
-            img = cv2.imread(img_path)
-            h, w = img.shape[:2]
-
-            all_boxes, all_scores, all_labels = [], [], []
-            for model in models:
-                pred = model.predict(
-                    source=img_path,
-                    conf=args.conf_thresh,
-                    iou=args.iou_thresh,
-                    augment=args.tta,
-                    save=False
-                )[0]
-                data = pred.boxes.data.cpu().numpy()
-                if data.shape[0] == 0:
-                    continue
-                boxes = data[:, :4]
-                scores = data[:, 4]
-                labels = data[:, 5].astype(int)
-
-                norm_boxes = [[x1 / w, y1 / h, x2 / w, y2 / h] for x1, y1, x2, y2 in boxes]
-                all_boxes.append(norm_boxes)
-                all_scores.append(scores.tolist())
-                all_labels.append(labels.tolist())
-
-            if not all_boxes:
-                continue
 
-            fused_boxes, fused_scores, fused_labels = weighted_boxes_fusion(
-                all_boxes, all_scores, all_labels,
-                iou_thr=args.iou_thresh,
-                skip_box_thr=args.conf_thresh
-            )
+            if fused is None:
+                continue
+            fused_boxes, fused_scores, fused_labels = fused
 
-            annotated = img.copy()
+            drawn = []
             for (x1n, y1n, x2n, y2n), score, cls_idx in zip(fused_boxes, fused_scores, fused_labels):
                 x1, y1 = int(x1n * w), int(y1n * h)
                 x2, y2 = int(x2n * w), int(y2n * h)
-                cv2.rectangle(annotated, (x1, y1), (x2, y2), (0,255,0), 2)
-                cv2.putText(annotated, f"{cls_idx}:{score:.2f}", (x1, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0,255,0), 1)
+                drawn.append((x1, y1, x2, y2, cls_idx, score))
 
                 category_id = cat_id_map.get(cls_idx, cls_idx)
-                writer.writerow([ann_id, image_id, category_id, x1, y1, x2 - x1, y2 - y1, float(score)])
+                sink.write((ann_id, image_id, category_id, x1, y1, x2 - x1, y2 - y1, float(score)))
                 ann_id += 1
 
-            cv2.imwrite(os.path.join(args.output_folder, img_name), annotated)
+            if image_writer is not None and should_render(img_name, args.render, args.render_fraction):
+                if client is not None:
+                    img = decode_bytes(img)
+                image_writer.submit(img_name, img, drawn)
+    return ann_id
+
+def shard_files(img_files, n_shards):
+    """정렬된 파일 목록을 연속 구간으로 나눔 (shard 순서대로 이어 붙이면 원래 순서)"""
+    n_shards = max(1, min(n_shards, len(img_files)))
+    size, rest = divmod(len(img_files), n_shards)
+    shards, start = [], 0
+    for k in range(n_shards):
+        end = start + size + (1 if k < rest else 0)
+        shards.append(img_files[start:end])
+        start = end
+    return shards
+
+def _run_shard(args, model_paths, img_files, part_path, n_threads):
+    """워커 프로세스: 앙상블 체크포인트를 한 번만 로드하고 shard 결과를 part 파일(JSONL, 타입 보존)로 저장"""
+    import torch
+    torch.set_num_threads(n_threads)
+
+    cat_id_map = load_cat_id_map(args.data_yaml)
+    models = load_models(args, model_paths)
+    cache, ckpt_hashes = open_cache(args, model_paths)
+    calibrators = load_calibrators(args, [args.checkpoint] + args.ensemble_ckpts)
+    image_writer = open_image_writer(args)
+    with JsonlSink(part_path) as sink:
+        run_inference(models, args, img_files, cat_id_map, sink,
+                      cache=cache, ckpt_hashes=ckpt_hashes, image_writer=image_writer, calibrators=calibrators)
+    if image_writer is not None:
+        image_writer.close()
+    return part_path
+
+def merge_parts(part_paths, sink, ann_id=1):
+    """shard 순서대로 part 파일을 이어 붙이면서 annotation_id를 다시 매김"""
+    for part in part_paths:
+        for row in read_jsonl_rows(part):
+            sink.write((ann_id,) + row[1:])
+            ann_id += 1
+        os.remove(part)
+    return ann_id
+
+def build_parser():
+    parser = argparse.ArgumentParser("YOLOv8 inference")
+    parser.add_argument("--checkpoint", type=str, required=True)
+    parser.add_argument("--img_folder", type=str, required=True)
+    parser.add_argument("--output_folder", type=str, default="output")
+    parser.add_argument("--csv_file", type=str, default="predictions.csv", help="예측 결과 파일 (확장자로 형식 결정: .csv/.jsonl/.parquet/.json=COCO result)")
+    parser.add_argument("--extra_outputs", nargs='+', default=[], help="같은 예측을 함께 쓸 추가 파일 (예: preds.json → COCO result, convert_csv2json 불필요)")
+    parser.add_argument("--chunk_size", type=int, default=10000, help="출력 파일에 한 번에 flush할 행 수")
+    parser.add_argument("--data_yaml", type=str, default="data.yaml")
+    parser.add_argument("--conf_thresh", type=float, default=0.25)
+    parser.add_argument("--calibrate", action="store_true", help="체크포인트 옆 <ckpt>_calib.json으로 WBF 전에 점수 보정 (conf_thresh는 보정 점수 기준)")
+    parser.add_argument("--iou_thresh", type=float, default=0.45, help="WBF(또는 NMS) iou_thr, --nms_iou가 없으면 모델 내부 NMS IoU로도 사용")
+    parser.add_argument("--nms_iou", type=float, default=None, help="모델 내부 NMS IoU만 따로 지정 (src.sweep 결과 행 재현용)")
+    parser.add_argument("--tta", action="store_true")
+    parser.add_argument("--ensemble_ckpts", nargs='+', default=[])
+    parser.add_argument("--fusion", choices=["wbf", "nms"], default="wbf", help="앙상블 박스 결합 방식")
+    parser.add_argument("--batch_size", type=int, default=16, help="한 번의 predict 호출에 넣을 이미지 수")
+    parser.add_argument("--num_workers", type=int, default=4, help="이미지 디코딩 스레드 수")
+    parser.add_argument("--queue_depth", type=int, default=4, help="미리 디코딩해 둘 최대 배치 수")
+    parser.add_argument("--workers", type=int, default=1, help="이미지 목록을 나눠 처리할 프로세스 수 (CPU 추론용)")
+    parser.add_argument("--cache_dir", type=str, default=None, help="모델별 raw 검출 결과 캐시 폴더 (지정 시 사용)")
+    parser.add_argument("--cache_max_mb", type=float, default=2048, help="캐시 최대 크기 (MB, 넘으면 LRU 삭제)")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch", help="onnx: .pt 옆에 캐시된 ONNX export를 onnxruntime(CPU)으로 실행, int8: 양자화 모델")
+    parser.add_argument("--imgsz", type=int, default=None, help="추론 입력 크기 (기본: torch는 ultralytics 기본값, onnx는 640)")
+    parser.add_argument("--onnx_batch", type=int, default=0, help="ONNX 고정 batch 크기 (0: dynamic batch/shape)")
+    parser.add_argument("--server", type=str, default=None, help="추론 서버 URL (예: http://127.0.0.1:8765, src.server로 실행, 지정 시 모델을 로드하지 않음)")
+    parser.add_argument("--image_store", type=str, default=None, help="src.image_store 저장소 폴더 (있는 이미지는 PNG 대신 memmap에서 읽음, 출력 좌표는 원본 크기 기준)")
+    parser.add_argument("--render", choices=RENDER_MODES, default="none", help="박스 그린 이미지 저장 (none: CSV만, sample: 일부, all: 전부)")
+    parser.add_argument("--render_fraction", type=float, default=0.05, help="--render sample일 때 저장할 이미지 비율")
+    parser.add_argument("--render_format", choices=["png", "jpg"], default="png")
+    parser.add_argument("--jpeg_quality", type=int, default=95)
+    parser.add_argument("--render_workers", type=int, default=2, help="렌더링·인코딩 스레드 수")
+    parser.add_argument("--render_queue", type=int, default=16, help="저장 대기 이미지 최대 수")
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+
+    cat_id_map = load_cat_id_map(args.data_yaml)
+    img_files = list_images(args.img_folder)
+    ckpt_paths = [args.checkpoint] + args.ensemble_ckpts
+
+    start = time.perf_counter()
+    out_paths = [args.csv_file] + args.extra_outputs
+    if args.image_store and (args.server or args.cache_dir or args.render != "none"):
+        raise SystemExit("--image_store는 --server / --cache_dir / --render와 함께 쓸 수 없습니다 (줄인 이미지라 원본 기준 결과와 다름)")
+    if args.server and args.calibrate:
+        raise SystemExit("--calibrate는 로컬 모델 추론에서만 지원합니다 (--server 결과는 서버에서 이미 WBF됨)")
+    if args.server and args.nms_iou is not None:
+        raise SystemExit("--nms_iou는 로컬 모델 추론에서만 지원합니다 (서버는 --iou_thresh를 NMS와 WBF에 같이 사용)")
+    calibrators = load_calibrators(args, ckpt_paths)
+    if calibrators is not None:
+        print(f"[INFO] score calibration: {', '.join(cal.method for cal in calibrators)}")
+
+    with MultiSink(open_sink(path, chunk_size=args.chunk_size) for path in out_paths) as sink:
+        if args.server:
+            from src.server import InferenceClient
+            client = InferenceClient(args.server, concurrency=args.batch_size)
+            client.check_checkpoints(ckpt_paths)
+            print(f"[INFO] using inference server {args.server}")
+            image_writer = open_image_writer(args)
+            run_inference(None, args, img_files, cat_id_map, sink, image_writer=image_writer, client=client)
+            if image_writer is not None:
+                image_writer.close()
+        elif args.workers > 1:
+            model_paths = resolve_model_paths(args, ckpt_paths)
+            shards = shard_files(img_files, args.workers)
+            part_paths = [f"{args.csv_file}.part{k}.jsonl" for k in range(len(shards))]
+            n_threads = max(1, (os.cpu_count() or 1) // len(shards))
+            print(f"[INFO] {len(ckpt_paths)} model(s) × {len(shards)} worker process(es), {n_threads} thread(s) each.")
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=len(shards), mp_context=ctx) as pool:
+                futures = [
+                    pool.submit(_run_shard, args, model_paths, shard, part, n_threads)
+                    for shard, part in zip(shards, part_paths)
+                ]
+                # 완료 순서와 상관없이 shard 순서대로 병합해야 직렬 실행과 같은 CSV가 나옴
+                part_paths = [fut.result() for fut in futures]
+            merge_parts(part_paths, sink)
+        else:
+            model_paths = resolve_model_paths(args, ckpt_paths)
+            models = load_models(args, model_paths)
+            print(f"[INFO] {len(models)} model(s) loaded ({args.backend}).")
+            cache, ckpt_hashes = open_cache(args, model_paths)
+            image_writer = open_image_writer(args)
+            run_inference(models, args, img_files, cat_id_map, sink,
+                          cache=cache, ckpt_hashes=ckpt_hashes, image_writer=image_writer, calibrators=calibrators)
+            if image_writer is not None:
+                image_writer.close()
+            if cache is not None:
+                print(f"[INFO] prediction cache: {cache.hits} hit / {cache.misses} miss")
 
+    elapsed = time.perf_counter() - start
     print("\nInference 완료")
-    print(f"Annotated images → {args.output_folder}/")
-    print(f"Predictions CSV  → {args.csv_file}")
+    print(f"처리 속도: {len(img_files)} images / {elapsed:.1f}s ({len(img_files) / max(elapsed, 1e-9):.2f} images/sec)")
+    if args.render != "none":
+        print(f"Annotated images → {args.output_folder}/")
+    print(f"Predictions ({sink.count} rows) → {', '.join(out_paths)}")
 
 if __name__ == "__main__":
     main()
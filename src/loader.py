@@ -0,0 +1,103 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+_END = object()
+
+def decode_image(path):
+    """cv2.imread 래퍼 (읽기 실패 시 None)"""
+    return cv2.imread(str(path))
+
+def read_bytes(path):
+    """인코딩된 파일 내용 그대로 (읽기 실패 시 None), 서버로 보낼 때 디코딩 생략용"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+def decode_bytes(buf):
+    """인코딩된 이미지 bytes → BGR 이미지 (cv2.imread와 같은 결과)"""
+    return cv2.imdecode(np.frombuffer(buf, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+def group_by_shape(imgs):
+    """
+    이미지 크기별 인덱스 묶음 반환
+    크기가 섞인 배치는 letterbox 패딩이 달라지므로 같은 크기끼리 predict 해야 단건 예측과 결과가 같음
+    """
+    groups = {}
+    for i, img in enumerate(imgs):
+        groups.setdefault(img.shape, []).append(i)
+    return list(groups.values())
+
+class PrefetchLoader:
+    """
+    bounded queue 기반 producer/consumer 이미지 로더
+
+    - producer 스레드가 배치 단위로 경로를 잘라 스레드 풀(num_workers)에서 디코딩
+    - 디코딩된 배치는 최대 queue_depth 개까지 큐에 쌓이므로 모델이 이전 배치를 예측하는 동안 다음 배치를 미리 준비
+    - 워커는 디코딩(decode_fn)만 담당하고, letterbox·정규화는 model.predict 안에서 그대로 진행
+    - 순서는 입력 paths 순서 그대로 유지, 디코딩 실패 이미지는 None
+    """
+
+    def __init__(self, paths, batch_size=16, num_workers=4, queue_depth=4, decode_fn=decode_image):
+        self.paths = list(paths)
+        self.batch_size = max(1, batch_size)
+        self.num_workers = max(1, num_workers)
+        self.queue_depth = max(1, queue_depth)
+        self.decode_fn = decode_fn
+        self._queue = None
+        self._stop = None
+        self._thread = None
+
+    def __len__(self):
+        return (len(self.paths) + self.batch_size - 1) // self.batch_size
+
+    def _put(self, item):
+        # consumer가 중간에 빠져나가도 producer가 put에서 영원히 막히지 않도록 stop 이벤트 확인
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self):
+        try:
+            with ThreadPoolExecutor(max_workers=self.num_workers) as pool:
+                for start in range(0, len(self.paths), self.batch_size):
+                    batch = self.paths[start:start + self.batch_size]
+                    imgs = list(pool.map(self.decode_fn, batch))
+                    if not self._put((batch, imgs)):
+                        return
+        except Exception as e:  # 예외는 consumer 쪽에서 다시 raise
+            self._put(e)
+            return
+        self._put(_END)
+
+    def __iter__(self):
+        self.close()
+        self._queue = queue.Queue(maxsize=self.queue_depth)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            self.close()
+
+    def close(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,111 @@
+import numpy as np
+
+from src.wbf import iou_matrix
+
+METHODS = ('greedy', 'hungarian')
+
+def xywh_to_xyxy(boxes):
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    return np.concatenate([boxes[:, :2], boxes[:, :2] + boxes[:, 2:]], axis=1)
+
+def _group_ids(*key_lists):
+    """여러 (이미지 id, 클래스) 목록 → 공통 정수 그룹 번호 배열들"""
+    codes = {}
+    return [np.fromiter((codes.setdefault(k, len(codes)) for k in keys), dtype=np.int64, count=len(keys))
+            for keys in key_lists]
+
+def _greedy(iou, thr):
+    """COCOeval 방식: 점수 높은 예측부터 아직 안 쓴 GT 중 IoU가 가장 큰 것 (thr 이상)과 매칭"""
+    pairs = []
+    used = np.zeros(iou.shape[1], dtype=bool)
+    for d in range(iou.shape[0]):
+        row = np.where(used, -1.0, iou[d])
+        g = int(row.argmax())
+        if row[g] >= thr:
+            used[g] = True
+            pairs.append((d, g))
+    return pairs
+
+def _hungarian(iou, thr):
+    """IoU 합이 최대가 되는 1:1 매칭 (thr 미만 쌍은 버림)"""
+    try:
+        from scipy.optimize import linear_sum_assignment
+    except ImportError as e:
+        raise ImportError("hungarian 매칭에는 scipy가 필요합니다: pip install scipy") from e
+    cost = np.where(iou >= thr, -iou, 0.0)
+    rows, cols = linear_sum_assignment(cost)
+    return [(d, g) for d, g in zip(rows.tolist(), cols.tolist()) if iou[d, g] >= thr]
+
+def match_boxes(gt_group, gt_xyxy, dt_group, dt_xyxy, dt_score, iou_thr=0.5, method='greedy'):
+    """
+    같은 그룹(이미지 × 클래스) 안에서만 GT와 예측을 1:1 매칭
+
+    - gt_group / dt_group: 그룹 번호 (G,) / (P,), 박스는 xyxy, dt_score는 greedy 순서용
+    - 그룹별로 IoU 행렬을 NumPy로 한 번에 계산하고 greedy(COCOeval과 같은 규칙) 또는 hungarian으로 매칭
+    반환 dict (인덱스는 입력 순서 기준, 매칭 없으면 -1):
+      dt_match, dt_iou (매칭된 IoU), dt_best_iou (같은 그룹 GT와의 최대 IoU), tp (P,)
+      gt_match, gt_iou, gt_best_iou, fn (G,)
+    """
+    if method not in METHODS:
+        raise ValueError(f"지원하지 않는 매칭 방식: {method}")
+    gt_group = np.asarray(gt_group, dtype=np.int64)
+    dt_group = np.asarray(dt_group, dtype=np.int64)
+    gt_xyxy = np.asarray(gt_xyxy, dtype=np.float64).reshape(-1, 4)
+    dt_xyxy = np.asarray(dt_xyxy, dtype=np.float64).reshape(-1, 4)
+    dt_score = np.asarray(dt_score, dtype=np.float64).reshape(-1)
+    n_gt, n_dt = len(gt_group), len(dt_group)
+
+    out = {
+        'dt_match': np.full(n_dt, -1, dtype=np.int64), 'dt_iou': np.zeros(n_dt), 'dt_best_iou': np.zeros(n_dt),
+        'gt_match': np.full(n_gt, -1, dtype=np.int64), 'gt_iou': np.zeros(n_gt), 'gt_best_iou': np.zeros(n_gt),
+    }
+    # 그룹 → 점수 내림차순 (동점이면 입력 순서)으로 정렬한 뒤 그룹 경계로 자름
+    gt_order = np.argsort(gt_group, kind='stable')
+    dt_order = np.lexsort((np.arange(n_dt), -dt_score, dt_group))
+    gt_sorted, dt_sorted = gt_group[gt_order], dt_group[dt_order]
+    common = np.intersect1d(gt_sorted, dt_sorted)
+    gt_lo, gt_hi = np.searchsorted(gt_sorted, common, 'left'), np.searchsorted(gt_sorted, common, 'right')
+    dt_lo, dt_hi = np.searchsorted(dt_sorted, common, 'left'), np.searchsorted(dt_sorted, common, 'right')
+
+    # GT 1개 × 예측 1개 그룹 (이미지당 클래스별 알약 하나인 흔한 경우)은 IoU를 한꺼번에 계산해서 바로 판정
+    single = (gt_hi - gt_lo == 1) & (dt_hi - dt_lo == 1)
+    gi, di = gt_order[gt_lo[single]], dt_order[dt_lo[single]]
+    a, b = dt_xyxy[di], gt_xyxy[gi]
+    inter = (np.maximum(np.minimum(a[:, 2], b[:, 2]) - np.maximum(a[:, 0], b[:, 0]), 0)
+             * np.maximum(np.minimum(a[:, 3], b[:, 3]) - np.maximum(a[:, 1], b[:, 1]), 0))
+    union = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1]) + (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1]) - inter
+    with np.errstate(divide='ignore', invalid='ignore'):
+        iou = np.where(union > 0, inter / union, 0.0)
+    out['dt_best_iou'][di] = out['gt_best_iou'][gi] = iou
+    hit = iou >= iou_thr
+    out['dt_match'][di[hit]] = gi[hit]
+    out['gt_match'][gi[hit]] = di[hit]
+    out['dt_iou'][di[hit]] = out['gt_iou'][gi[hit]] = iou[hit]
+
+    match = _greedy if method == 'greedy' else _hungarian
+    multi = ~single
+    for g0, g1, d0, d1 in zip(gt_lo[multi].tolist(), gt_hi[multi].tolist(), dt_lo[multi].tolist(), dt_hi[multi].tolist()):
+        gi, di = gt_order[g0:g1], dt_order[d0:d1]
+        iou = iou_matrix(dt_xyxy[di], gt_xyxy[gi])
+        out['dt_best_iou'][di] = iou.max(axis=1)
+        out['gt_best_iou'][gi] = iou.max(axis=0)
+        for d, g in match(iou, iou_thr):
+            out['dt_match'][di[d]] = gi[g]
+            out['gt_match'][gi[g]] = di[d]
+            out['dt_iou'][di[d]] = out['gt_iou'][gi[g]] = iou[d, g]
+
+    out['tp'] = out['dt_match'] >= 0
+    out['fn'] = out['gt_match'] < 0
+    return out
+
+def match_coco(gt_anns, dt_anns, iou_thr=0.5, method='greedy'):
+    """COCO annotation / 결과 목록 (bbox xywh, 결과는 score 포함) → match_boxes 결과"""
+    gt_group, dt_group = _group_ids(
+        [(a['image_id'], a['category_id']) for a in gt_anns],
+        [(d['image_id'], d['category_id']) for d in dt_anns],
+    )
+    return match_boxes(
+        gt_group, xywh_to_xyxy([a['bbox'] for a in gt_anns]),
+        dt_group, xywh_to_xyxy([d['bbox'] for d in dt_anns]),
+        [d['score'] for d in dt_anns], iou_thr, method
+    )
@@ -0,0 +1,66 @@
+import os
+import sys
+import shutil
+
+MODES = ('copy', 'hardlink', 'symlink', 'reflink', 'manifest')
+
+# Linux FICLONE ioctl (btrfs / xfs / bcachefs 등에서 블록을 공유하는 복사)
+_FICLONE = 0x40049409
+
+_warned = set()
+
+def _warn_once(mode, err):
+    if mode not in _warned:
+        _warned.add(mode)
+        print(f"[WARN] {mode} 실패 ({err}) → copy로 대체")
+
+def _reflink(src, dst):
+    if sys.platform == 'darwin':
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        return
+    import fcntl
+    with open(src, 'rb') as fs, open(dst, 'wb') as fd:
+        try:
+            fcntl.ioctl(fd.fileno(), _FICLONE, fs.fileno())
+        except OSError:
+            fd.close()
+            os.remove(dst)
+            raise
+
+def materialize(src, dst, mode='copy'):
+    """
+    src 파일을 dst 위치에 mode 방식으로 배치
+    - copy:     전체 복사
+    - hardlink: 같은 inode를 가리키는 링크 (추가 용량 없음, 같은 파일시스템일 때만)
+    - symlink:  src 절대경로를 가리키는 심볼릭 링크
+    - reflink:  copy-on-write 복사 (APFS / btrfs / xfs), 수정 전까지 용량을 공유
+    hardlink / reflink / symlink를 파일시스템이 지원하지 않으면 copy로 대체 (경고는 한 번만)
+    hardlink·symlink 결과를 직접 수정하면 원본도 바뀌므로 증강 등으로 덮어쓸 폴더에는 copy / reflink 사용
+    'manifest'는 파일을 만들지 않으므로 호출하는 쪽에서 이미지 목록 파일로 처리
+    """
+    if mode not in MODES or mode == 'manifest':
+        raise ValueError(f"지원하지 않는 materialize 방식: {mode}")
+    if os.path.lexists(dst):
+        os.remove(dst)
+    if mode == 'copy':
+        shutil.copy(src, dst)
+        return
+    try:
+        if mode == 'hardlink':
+            os.link(src, dst)
+        elif mode == 'symlink':
+            os.symlink(os.path.abspath(src), dst)
+        else:
+            _reflink(src, dst)
+    except (OSError, NotImplementedError, AttributeError) as e:
+        _warn_once(mode, e)
+        shutil.copy(src, dst)
+
+def image_list_text(paths):
+    """YOLO 이미지 목록 파일 내용 (data.yaml의 train/val에 .txt 경로를 지정하면 한 줄에 하나씩 읽음)"""
+    return ''.join(f"{os.path.abspath(p)}\n" for p in paths)
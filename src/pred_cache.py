@@ -0,0 +1,141 @@
+import os
+import json
+import hashlib
+import tempfile
+
+import numpy as np
+
+from src.loader import decode_bytes
+
+def hash_bytes(buf):
+    return hashlib.sha1(buf).hexdigest()
+
+def hash_file(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def decode_with_hash(path):
+    """
+    파일을 한 번만 읽어서 (이미지, 내용 해시) 반환 (읽기 실패 시 None)
+    PrefetchLoader의 decode_fn으로 쓰면 캐시 키 계산용 해시를 디코딩 워커에서 같이 구함
+    """
+    try:
+        with open(path, 'rb') as f:
+            buf = f.read()
+    except OSError:
+        return None
+    img = decode_bytes(buf)
+    if img is None:
+        return None
+    return img, hash_bytes(buf)
+
+class PredictionCache:
+    """
+    모델별 raw 검출 결과(WBF 이전) 디스크 캐시
+
+    - 키: 체크포인트 내용 해시 + 이미지 내용 해시 + 예측 파라미터(imgsz/conf/iou/augment 등)
+    - 값: (N, 6) float32 배열 (x1, y1, x2, y2, score, cls) 을 헤더 없이 그대로 저장 (박스당 24 bytes)
+    - 전체 크기가 max_mb를 넘으면 가장 오래 안 쓴 항목부터 삭제 (조회 시 mtime 갱신 → LRU)
+    - 쓰기는 임시 파일 → os.replace 라서 여러 프로세스가 같은 캐시를 써도 안전
+    """
+
+    def __init__(self, cache_dir, max_mb=2048):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        os.makedirs(cache_dir, exist_ok=True)
+        self._ckpt_index_path = os.path.join(cache_dir, 'checkpoints.json')
+        self._size = sum(size for _, size, _ in self._entries())
+        self.hits = 0
+        self.misses = 0
+
+    def _entries(self):
+        """(경로, 크기, mtime) 목록"""
+        for root, _, files in os.walk(self.cache_dir):
+            for fn in files:
+                if fn.endswith('.bin'):
+                    path = os.path.join(root, fn)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield path, st.st_size, st.st_mtime_ns
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.bin')
+
+    def checkpoint_hash(self, ckpt_path):
+        """체크포인트 내용 해시 (경로·크기·mtime이 같으면 checkpoints.json에 저장된 값 재사용)"""
+        st = os.stat(ckpt_path)
+        ident = f"{os.path.abspath(ckpt_path)}|{st.st_size}|{st.st_mtime_ns}"
+        index = {}
+        if os.path.exists(self._ckpt_index_path):
+            with open(self._ckpt_index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        if ident not in index:
+            index[ident] = hash_file(ckpt_path)
+            self._atomic_write(self._ckpt_index_path, json.dumps(index, indent=2).encode('utf-8'))
+        return index[ident]
+
+    @staticmethod
+    def make_key(ckpt_hash, img_hash, **params):
+        param_str = json.dumps(params, sort_keys=True)
+        return hash_bytes(f"{ckpt_hash}|{img_hash}|{param_str}".encode('utf-8'))
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                buf = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return np.frombuffer(buf, dtype=np.float32).reshape(-1, 6).copy()
+
+    def put(self, key, dets):
+        data = np.ascontiguousarray(dets, dtype=np.float32).reshape(-1, 6).tobytes()
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 같은 키를 덮어쓰면 이전 파일 크기를 빼고 더함 (중복 집계로 eviction이 일찍 시작되지 않도록)
+        try:
+            old = os.path.getsize(path)
+        except OSError:
+            old = 0
+        self._atomic_write(path, data)
+        self._size += len(data) - old
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self, target_ratio=0.9):
+        """오래 안 쓴 항목부터 지워서 max_bytes * target_ratio 이하로 줄임"""
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * target_ratio
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                continue
+        self._size = total
+
+    @staticmethod
+    def _atomic_write(path, data):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
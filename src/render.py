@@ -0,0 +1,81 @@
+import os
+import zlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+RENDER_MODES = ("none", "sample", "all")
+
+def should_render(img_name, mode, fraction=0.05):
+    """
+    이미지별 렌더링 여부
+    sample은 파일명 crc32로 고르므로 실행·shard 분할과 상관없이 항상 같은 이미지가 선택됨
+    """
+    if mode == "all":
+        return True
+    if mode == "sample":
+        return zlib.crc32(img_name.encode("utf-8")) / 0xFFFFFFFF < fraction
+    return False
+
+def draw_detections(img, dets):
+    """dets: [(x1, y1, x2, y2, cls_idx, score)] 픽셀 좌표, img에 직접 그림"""
+    for x1, y1, x2, y2, cls_idx, score in dets:
+        cv2.rectangle(img, (x1, y1), (x2, y2), (0,255,0), 2)
+        cv2.putText(img, f"{cls_idx}:{score:.2f}", (x1, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0,255,0), 1)
+    return img
+
+class AsyncImageWriter:
+    """
+    박스 그리기 + 이미지 인코딩/저장을 백그라운드 스레드 풀에서 처리
+
+    - 대기 작업이 queue_depth 개를 넘으면 submit이 막혀서 메모리가 무한정 늘지 않음
+    - fmt='jpg'면 확장자를 .jpg로 바꿔 JPEG(jpeg_quality)로 저장 (PNG보다 인코딩이 훨씬 빠름)
+    - 워커에서 난 예외는 close()에서 다시 raise
+    """
+
+    def __init__(self, out_dir, num_workers=2, queue_depth=16, fmt="png", jpeg_quality=95):
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.jpeg_quality = jpeg_quality
+        self._slots = threading.BoundedSemaphore(max(1, queue_depth))
+        self._pool = ThreadPoolExecutor(max_workers=max(1, num_workers))
+        self._error = None
+        os.makedirs(out_dir, exist_ok=True)
+
+    def _out_path(self, img_name):
+        if self.fmt == "jpg":
+            img_name = os.path.splitext(img_name)[0] + ".jpg"
+        return os.path.join(self.out_dir, img_name)
+
+    def _write(self, img_name, img, dets):
+        try:
+            draw_detections(img, dets)
+            params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality] if self.fmt == "jpg" else []
+            if not cv2.imwrite(self._out_path(img_name), img, params):
+                raise IOError(f"이미지 저장 실패: {img_name}")
+        except Exception as e:
+            if self._error is None:
+                self._error = e
+        finally:
+            self._slots.release()
+
+    def submit(self, img_name, img, dets):
+        """img는 워커가 그대로 그려서 저장하므로 호출 후에는 수정하지 말 것"""
+        if self._error is not None:
+            raise self._error
+        self._slots.acquire()
+        self._pool.submit(self._write, img_name, img, dets)
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._pool.shutdown(wait=True)
+        if exc_type is None and self._error is not None:
+            raise self._error
@@ -0,0 +1,270 @@
+import os
+import json
+import time
+import queue
+import argparse
+import threading
+import urllib.parse
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from src.loader import decode_bytes
+
+# 클라이언트(InferenceClient)만 쓰는 스크립트가 torch/ultralytics를 import하지 않도록
+# 모델 관련 import는 서버 쪽 함수 안에서만 수행
+
+DEFAULT_URL = "http://127.0.0.1:8765"
+
+class MicroBatcher:
+    """
+    여러 요청 스레드에서 들어온 이미지를 모아 한 번의 predict_batch로 처리
+
+    - 첫 요청이 들어온 뒤 max_wait_ms 안에 들어온 요청을 최대 max_batch 개까지 묶음
+    - 예측 파라미터(conf/iou/augment/imgsz)가 같은 요청끼리만 같은 배치로 예측
+    - 모델은 이 스레드에서만 사용하므로 요청 스레드끼리 모델을 공유해도 안전
+    """
+
+    def __init__(self, models, max_batch=16, max_wait_ms=10, cache=None, ckpt_hashes=None):
+        self.models = models
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self.cache = cache
+        self.ckpt_hashes = ckpt_hashes
+        self.n_batches = 0
+        self.n_images = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, img, img_hash, params):
+        fut = Future()
+        self._queue.put((img, img_hash, params, fut))
+        return fut
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        from src.inference import predict_batch
+
+        while True:
+            batch = self._collect()
+            groups = {}
+            for item in batch:
+                groups.setdefault(tuple(sorted(item[2].items())), []).append(item)
+            for key, items in groups.items():
+                params = dict(key)
+                predict_kwargs = {'imgsz': params['imgsz']} if params['imgsz'] else {}
+                try:
+                    results = predict_batch(
+                        self.models, [img for img, _, _, _ in items],
+                        params['conf'], params['iou'], params['augment'],
+                        cache=self.cache, ckpt_hashes=self.ckpt_hashes,
+                        img_hashes=[h for _, h, _, _ in items] if self.cache is not None else None,
+                        **predict_kwargs
+                    )
+                except Exception as e:
+                    for _, _, _, fut in items:
+                        fut.set_exception(e)
+                    continue
+                for (_, _, _, fut), dets in zip(items, results):
+                    fut.set_result(dets)
+                self.n_batches += 1
+                self.n_images += len(items)
+
+def _parse_params(query):
+    q = urllib.parse.parse_qs(query)
+    get = lambda k, d: q[k][0] if k in q else d
+    return {
+        'conf': float(get('conf', 0.25)),
+        'iou': float(get('iou', 0.45)),
+        'augment': get('augment', '0') in ('1', 'true', 'True'),
+        'imgsz': int(get('imgsz', 0)) or None,
+    }, get('fuse', None)
+
+class _Handler(BaseHTTPRequestHandler):
+    def _send_json(self, obj, status=200):
+        body = json.dumps(obj).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urllib.parse.urlparse(self.path).path == '/info':
+            info = dict(self.server.info)
+            info['batches'] = self.server.batcher.n_batches
+            info['images'] = self.server.batcher.n_images
+            self._send_json(info)
+        else:
+            self._send_json({'error': 'not found'}, 404)
+
+    def do_POST(self):
+        from src.inference import fuse_detections
+        from src.pred_cache import hash_bytes
+
+        url = urllib.parse.urlparse(self.path)
+        if url.path != '/predict':
+            self._send_json({'error': 'not found'}, 404)
+            return
+        buf = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        img = decode_bytes(buf)
+        if img is None:
+            self._send_json({'error': '이미지를 디코딩할 수 없음'}, 400)
+            return
+        params, fuse = _parse_params(url.query)
+        img_hash = hash_bytes(buf) if self.server.batcher.cache is not None else None
+        try:
+            dets = self.server.batcher.submit(img, img_hash, params).result()
+        except Exception as e:
+            self._send_json({'error': str(e)}, 500)
+            return
+
+        h, w = img.shape[:2]
+        resp = {'width': w, 'height': h, 'dets': [d.tolist() for d in dets]}
+        if fuse:
+            # inference.py와 같은 방식 (WBF iou_thr=iou, skip_box_thr=conf)
+            fused = fuse_detections(dets, w, h, params['iou'], params['conf'], fuse)
+            if fused is not None:
+                boxes, scores, labels = fused
+                resp['fused'] = {'boxes': boxes.tolist(), 'scores': scores.tolist(), 'labels': labels.tolist()}
+            else:
+                resp['fused'] = None
+        self._send_json(resp)
+
+    def log_message(self, fmt, *args):
+        pass
+
+def serve(args):
+    from src.inference import open_cache, predict_batch, resolve_model_paths, load_models
+
+    ckpt_paths = [args.checkpoint] + args.ensemble_ckpts
+    model_paths = resolve_model_paths(args, ckpt_paths)
+    models = load_models(args, model_paths)
+    cache, ckpt_hashes = open_cache(args, model_paths)
+
+    # 첫 요청이 느리지 않도록 미리 한 번 예측 (CUDA 커널·letterbox 초기화 등)
+    predict_batch(models, [np.zeros((args.warmup_size, args.warmup_size, 3), dtype=np.uint8)], 0.25, 0.45, False)
+
+    server = ThreadingHTTPServer((args.host, args.port), _Handler)
+    server.daemon_threads = True
+    server.batcher = MicroBatcher(models, args.max_batch, args.max_wait_ms, cache, ckpt_hashes)
+    server.info = {
+        'checkpoints': [os.path.abspath(p) for p in ckpt_paths],
+        'names': {int(k): v for k, v in models[0].names.items()},
+        'max_batch': args.max_batch,
+        'max_wait_ms': args.max_wait_ms,
+    }
+    print(f"[INFO] {len(models)} model(s) loaded ({args.backend}), serving on http://{args.host}:{args.port} "
+          f"(max_batch={args.max_batch}, max_wait_ms={args.max_wait_ms})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+class InferenceClient:
+    """
+    추론 서버 클라이언트
+    predict_many는 이미지를 동시에 보내서 서버가 micro-batch로 묶을 수 있게 함
+    """
+
+    def __init__(self, url=DEFAULT_URL, timeout=300, concurrency=16):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+
+    def info(self):
+        with urllib.request.urlopen(self.url + '/info', timeout=self.timeout) as r:
+            info = json.loads(r.read())
+        info['names'] = {int(k): v for k, v in info['names'].items()}
+        return info
+
+    def model_info(self):
+        """YOLO 객체 대신 쓸 수 있도록 .names 속성만 가진 객체"""
+        return argparse.Namespace(names=self.info()['names'])
+
+    def check_checkpoints(self, ckpt_paths, first_only=False):
+        """
+        서버에 올라간 체크포인트가 기대한 것과 다르면 경고 (서버 모델 기준으로 예측됨)
+        first_only: 단일 모델 도구는 서버의 첫 번째 모델(--checkpoint) 결과만 쓰므로 그것만 비교
+        """
+        served = self.info()['checkpoints']
+        expected = [os.path.abspath(p) for p in ckpt_paths]
+        if first_only:
+            served = served[:1]
+        if served != expected:
+            print(f"[WARN] 서버 체크포인트가 요청과 다릅니다: {served} (요청: {expected})")
+
+    def predict_raw(self, buf, conf=0.25, iou=0.45, augment=False, imgsz=None, fuse=None):
+        """
+        인코딩된 이미지 bytes 하나 예측 → 응답 dict
+        'dets': 모델별 (N, 6) float32 배열 (x1, y1, x2, y2, score, cls)
+        'fused': fuse='wbf'|'nms'면 (boxes, scores, labels) 또는 None (검출 없음)
+        """
+        query = {'conf': conf, 'iou': iou, 'augment': int(bool(augment))}
+        if imgsz:
+            query['imgsz'] = imgsz
+        if fuse:
+            query['fuse'] = fuse
+        req = urllib.request.Request(
+            f"{self.url}/predict?{urllib.parse.urlencode(query)}",
+            data=buf, headers={'Content-Type': 'application/octet-stream'}
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout) as r:
+            resp = json.loads(r.read())
+        resp['dets'] = [np.array(d, dtype=np.float32).reshape(-1, 6) for d in resp['dets']]
+        if resp.get('fused'):
+            f = resp['fused']
+            resp['fused'] = (np.array(f['boxes'], dtype=np.float64).reshape(-1, 4),
+                             np.array(f['scores'], dtype=np.float64), np.array(f['labels'], dtype=np.float64))
+        return resp
+
+    def predict_many(self, bufs, **kwargs):
+        """여러 이미지를 동시에 요청, 입력 순서대로 응답 리스트 반환"""
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, max(1, len(bufs)))) as pool:
+            return list(pool.map(lambda b: self.predict_raw(b, **kwargs), bufs))
+
+    def predict_files(self, paths, **kwargs):
+        bufs = []
+        for path in paths:
+            with open(path, 'rb') as f:
+                bufs.append(f.read())
+        return self.predict_many(bufs, **kwargs)
+
+def main():
+    from models.model import BACKENDS
+
+    parser = argparse.ArgumentParser("Resident YOLO ensemble inference server")
+    parser.add_argument("--checkpoint", type=str, required=True)
+    parser.add_argument("--ensemble_ckpts", nargs='+', default=[])
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max_batch", type=int, default=16, help="한 번에 묶어서 예측할 최대 이미지 수")
+    parser.add_argument("--max_wait_ms", type=float, default=10, help="배치를 채우려고 기다리는 최대 시간 (latency budget)")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch")
+    parser.add_argument("--imgsz", type=int, default=None, help="--backend onnx export 크기 (기본 640)")
+    parser.add_argument("--onnx_batch", type=int, default=0, help="ONNX 고정 batch 크기 (0: dynamic)")
+    parser.add_argument("--warmup_size", type=int, default=640)
+    parser.add_argument("--cache_dir", type=str, default=None, help="raw 예측 캐시 폴더 (지정 시 사용)")
+    parser.add_argument("--cache_max_mb", type=float, default=2048)
+    args = parser.parse_args()
+    serve(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import os
+import csv
+import json
+
+COLUMNS = ["annotation_id", "image_id", "category_id", "bbox_x", "bbox_y", "bbox_w", "bbox_h", "score"]
+
+class PredictionSink:
+    """
+    예측 행을 chunk_size 개씩 모아서 파일에 흘려 쓰는 스트리밍 writer (메모리는 chunk 크기만큼만 사용)
+    행 형식: (annotation_id, image_id, category_id, bbox_x, bbox_y, bbox_w, bbox_h, score)
+    with 블록 안에서 예외가 나면 close 대신 abort: 파일을 마무리하지 않고 지워서 완성된 것처럼 보이는 결과를 남기지 않음
+    """
+
+    def __init__(self, path, chunk_size=10000):
+        self.path = path
+        self.chunk_size = max(1, chunk_size)
+        self.count = 0
+        self._buffer = []
+        out_dir = os.path.dirname(path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+
+    def write(self, row):
+        self._buffer.append(row)
+        self.count += 1
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._write_chunk(self._buffer)
+            self._buffer = []
+
+    def _write_chunk(self, rows):
+        raise NotImplementedError
+
+    def _finish(self):
+        pass
+
+    def _release(self):
+        """마무리(닫는 괄호·footer 등) 없이 파일 핸들만 닫음"""
+        pass
+
+    def close(self):
+        self.flush()
+        self._finish()
+
+    def abort(self):
+        """쓰다 만 출력 파일을 닫고 삭제"""
+        self._buffer = []
+        self._release()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+class CsvSink(PredictionSink):
+    """제출 CSV (헤더 포함)"""
+
+    def __init__(self, path, chunk_size=10000, encoding="utf-8-sig", header=True, lineterminator="\r\n"):
+        super().__init__(path, chunk_size)
+        self._f = open(path, "w", newline="", encoding=encoding)
+        self._writer = csv.writer(self._f, lineterminator=lineterminator)
+        if header:
+            self._writer.writerow(COLUMNS)
+
+    def _write_chunk(self, rows):
+        self._writer.writerows(rows)
+
+    def _finish(self):
+        self._f.close()
+
+    def _release(self):
+        self._f.close()
+
+class JsonlSink(PredictionSink):
+    """한 줄에 한 행씩 {컬럼: 값} JSON (타입이 그대로 보존되므로 shard part 파일로도 사용)"""
+
+    def __init__(self, path, chunk_size=10000):
+        super().__init__(path, chunk_size)
+        self._f = open(path, "w", encoding="utf-8")
+
+    def _write_chunk(self, rows):
+        self._f.write("".join(json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + "\n" for row in rows))
+
+    def _finish(self):
+        self._f.close()
+
+    def _release(self):
+        self._f.close()
+
+class ParquetSink(PredictionSink):
+    """청크마다 row group 하나씩 쓰는 Parquet (pyarrow 필요, 사용할 때만 import)"""
+
+    def __init__(self, path, chunk_size=100000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet 출력에는 pyarrow가 필요합니다: pip install pyarrow") from e
+        super().__init__(path, chunk_size)
+        self._pa = pa
+        self._pq = pq
+        self._writer = None
+
+    def _write_chunk(self, rows):
+        columns = list(zip(*rows))
+        table = self._pa.table({name: list(col) for name, col in zip(COLUMNS, columns)})
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.path, table.schema)
+        else:
+            table = table.cast(self._writer.schema)
+        self._writer.write_table(table)
+
+    def _empty_table(self):
+        """행이 하나도 없을 때 쓰는 고정 schema (id·bbox는 int64, score는 float64)"""
+        pa = self._pa
+        schema = pa.schema([(name, pa.float64() if name == "score" else pa.int64()) for name in COLUMNS])
+        return schema.empty_table()
+
+    def _finish(self):
+        # 검출이 없어도 다른 형식처럼 출력 파일은 만듦
+        if self._writer is None:
+            self._pq.write_table(self._empty_table(), self.path)
+        else:
+            self._writer.close()
+
+    def _release(self):
+        if self._writer is not None:
+            self._writer.close()
+
+class CocoResultsSink(PredictionSink):
+    """
+    COCO result JSON 배열 ([{image_id, category_id, bbox, score}, ...])
+    전체 리스트를 만들지 않고 '[' ... ']' 사이에 레코드를 한 줄씩 이어 씀
+    """
+
+    def __init__(self, path, chunk_size=10000):
+        super().__init__(path, chunk_size)
+        self._f = open(path, "w", encoding="utf-8")
+        self._f.write("[")
+        self._first = True
+
+    def _write_chunk(self, rows):
+        parts = []
+        for _, image_id, category_id, x, y, w, h, score in rows:
+            parts.append(json.dumps({
+                "image_id":    image_id,
+                "category_id": category_id,
+                "bbox":        [float(x), float(y), float(w), float(h)],
+                "score":       float(score)
+            }, ensure_ascii=False))
+        sep = "\n" if self._first else ",\n"
+        self._f.write(sep + ",\n".join(parts))
+        self._first = False
+
+    def _finish(self):
+        self._f.write("\n]\n")
+        self._f.close()
+
+    def _release(self):
+        self._f.close()
+
+class MultiSink:
+    """
+    같은 행을 여러 sink에 동시에 기록
+    sinks는 하나씩 열리므로(생성기 가능) 중간에 하나가 열리지 않으면 이미 연 sink를 abort하고 예외를 다시 던짐
+    """
+
+    def __init__(self, sinks):
+        self.sinks = []
+        try:
+            for sink in sinks:
+                self.sinks.append(sink)
+        except BaseException:
+            self.abort()
+            raise
+
+    @property
+    def count(self):
+        return self.sinks[0].count if self.sinks else 0
+
+    def write(self, row):
+        for sink in self.sinks:
+            sink.write(row)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def abort(self):
+        for sink in self.sinks:
+            sink.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+SINK_FORMATS = {
+    "csv": CsvSink,
+    "jsonl": JsonlSink,
+    "parquet": ParquetSink,
+    "coco": CocoResultsSink,
+}
+
+_EXT_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".parquet": "parquet", ".json": "coco"}
+
+def open_sink(path, fmt=None, **kwargs):
+    """fmt가 없으면 확장자로 결정 (.csv / .jsonl / .parquet / .json=COCO result)"""
+    if fmt is None:
+        fmt = _EXT_FORMATS.get(os.path.splitext(path)[1].lower(), "csv")
+    if fmt not in SINK_FORMATS:
+        raise ValueError(f"지원하지 않는 출력 형식: {fmt} (가능: {', '.join(SINK_FORMATS)})")
+    return SINK_FORMATS[fmt](path, **kwargs)
+
+def read_jsonl_rows(path):
+    """JsonlSink 파일을 행 튜플로 다시 읽음"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                rec = json.loads(line)
+                yield tuple(rec[name] for name in COLUMNS)
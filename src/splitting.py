@@ -0,0 +1,142 @@
+import os
+import json
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from src.ann_index import ANN_ROOT, load_index
+from src.materialize import image_list_text
+
+def class_counts(images, annotations, category_ids=None):
+    """
+    COCO images / annotations → (file_name 목록, (이미지 수, 클래스 수) 박스 개수 행렬, category id 목록)
+    category_ids를 주지 않으면 annotation에 나온 id 오름차순
+    """
+    names = [img['file_name'] for img in images]
+    pos = {img['id']: i for i, img in enumerate(images)}
+    anns = [a for a in annotations if a['image_id'] in pos]
+    if category_ids is None:
+        category_ids = sorted({a['category_id'] for a in anns})
+    cat_pos = {cid: j for j, cid in enumerate(category_ids)}
+    counts = np.zeros((len(images), len(category_ids)), dtype=np.int64)
+    if anns:
+        rows = np.fromiter((pos[a['image_id']] for a in anns), dtype=np.int64, count=len(anns))
+        cols = np.fromiter((cat_pos[a['category_id']] for a in anns), dtype=np.int64, count=len(anns))
+        np.add.at(counts, (rows, cols), 1)
+    return names, counts, list(category_ids)
+
+def iterative_stratify(counts, ratios, seed=42):
+    """
+    multi-label 반복 층화 분할 (Sechidis et al., 2011) → 이미지별 fold 번호 배열
+
+    - counts: (이미지 수, 클래스 수) 클래스별 박스 개수, ratios: fold별 비율
+    - 남은 이미지가 가장 적은(가장 희귀한) 클래스부터, 그 클래스를 가진 이미지를
+      해당 클래스 박스가 가장 많이 모자란 fold에 배정 (동률이면 이미지 수가 더 모자란 fold, 그래도 같으면 랜덤)
+    - 배정할 때마다 그 이미지의 모든 클래스 박스 개수만큼 fold의 필요량을 줄여서 한 이미지의 여러 알약을 같이 반영
+    - 박스가 없는 이미지는 마지막에 이미지 수가 가장 모자란 fold로
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    n_img, n_cls = counts.shape
+    ratios = np.asarray(ratios, dtype=np.float64)
+    ratios = ratios / ratios.sum()
+    rng = np.random.default_rng(seed)
+
+    need = ratios[:, None] * counts.sum(axis=0)[None, :]  # fold별 클래스별 남은 목표 박스 수
+    need_img = ratios * n_img                              # fold별 남은 목표 이미지 수
+    has = counts > 0
+    remaining = has.sum(axis=0)                            # 클래스별 아직 배정 안 된 이미지 수
+    folds = np.full(n_img, -1, dtype=np.int64)
+    order = rng.permutation(n_img)
+    members = [order[has[order, c]] for c in range(n_cls)]
+
+    def pick(score, tie=None):
+        cand = np.flatnonzero(score == score.max())
+        if tie is not None and len(cand) > 1:
+            cand = cand[tie[cand] == tie[cand].max()]
+        return cand[0] if len(cand) == 1 else cand[rng.integers(len(cand))]
+
+    while remaining.any():
+        c = np.flatnonzero(remaining == remaining[remaining > 0].min())[0]
+        for i in members[c]:
+            if folds[i] >= 0:
+                continue
+            f = pick(need[:, c], need_img)
+            folds[i] = f
+            need[f] -= counts[i]
+            need_img[f] -= 1
+            remaining -= has[i]
+
+    for i in order[folds[order] < 0]:
+        f = pick(need_img)
+        folds[i] = f
+        need_img[f] -= 1
+    return folds
+
+def stratified_split(names, counts, ratio=0.8, seed=42):
+    """이름 → 'train' | 'val' (클래스별 박스 수가 train:val = ratio:1-ratio에 가깝게)"""
+    folds = iterative_stratify(counts, [ratio, 1 - ratio], seed)
+    return {name: 'train' if f == 0 else 'val' for name, f in zip(names, folds.tolist())}
+
+def kfold(counts, k=5, seed=42):
+    """k-fold용 이미지별 fold 번호 (fold i가 i번째 학습의 val)"""
+    return iterative_stratify(counts, [1.0] * k, seed)
+
+def fold_class_counts(counts, folds, n_folds):
+    """(fold 수, 클래스 수) fold별 클래스 박스 개수"""
+    out = np.zeros((n_folds, counts.shape[1]), dtype=np.int64)
+    np.add.at(out, folds, counts)
+    return out
+
+def write_fold_manifests(names, folds, k, out_dir, img_dir, class_names=None):
+    """
+    out_dir/folds.json ({file_name: fold}) 과 fold_{i}/train.txt, val.txt (이미지 절대경로 목록) 저장
+    class_names를 주면 fold_{i}/data.yaml도 저장 (train/val에 목록 파일 지정)
+    img_dir는 YOLO 라벨이 옆의 labels/에 있는 이미지 폴더 (예: split_and_convert manifest 모드의 pool/images)
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with open(out_dir / 'folds.json', 'w', encoding='utf-8') as f:
+        json.dump({'k': k, 'folds': dict(zip(names, folds.tolist()))}, f, ensure_ascii=False)
+    for i in range(k):
+        fold_dir = out_dir / f'fold_{i}'
+        fold_dir.mkdir(exist_ok=True)
+        for subset, mask in (('train', folds != i), ('val', folds == i)):
+            paths = [os.path.join(img_dir, name) for name, m in zip(names, mask) if m]
+            (fold_dir / f'{subset}.txt').write_text(image_list_text(paths), encoding='utf-8')
+        if class_names is not None:
+            with open(fold_dir / 'data.yaml', 'w', encoding='utf-8') as f:
+                f.write(f"train: {(fold_dir / 'train.txt').resolve()}\n")
+                f.write(f"val:   {(fold_dir / 'val.txt').resolve()}\n")
+                f.write(f"nc: {len(class_names)}\n")
+                f.write("names:\n")
+                for name in class_names:
+                    f.write(f"  - '{name}'\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="어노테이션 인덱스 기반 반복 층화 k-fold 생성")
+    parser.add_argument('--ann_root', default=ANN_ROOT)
+    parser.add_argument('--img_dir',  default='data/processed/pool/images',
+                        help='목록 파일에 쓸 이미지 폴더 (split_and_convert --materialize manifest의 pool/images)')
+    parser.add_argument('--out_dir',  default='data/folds')
+    parser.add_argument('--k',        type=int, default=5)
+    parser.add_argument('--seed',     type=int, default=42)
+    args = parser.parse_args()
+
+    index = load_index(args.ann_root)
+    coco = index.coco()
+    cat_ids = sorted(c['id'] for c in coco['categories'])  # split_and_convert의 YOLO class 순서
+    names, counts, cat_ids = class_counts(coco['images'], coco['annotations'], cat_ids)
+    folds = kfold(counts, args.k, args.seed)
+
+    cat_map = index.category_map()
+    write_fold_manifests(names, folds, args.k, args.out_dir, os.path.abspath(args.img_dir),
+                         [cat_map.get(cid, str(cid)) for cid in cat_ids])
+
+    per_fold = fold_class_counts(counts, folds, args.k)
+    missing = int(((per_fold == 0) & (counts.sum(axis=0) >= args.k)).any(axis=0).sum())
+    print(f"[INFO] {args.k}-fold: 이미지 {np.bincount(folds, minlength=args.k).tolist()}, "
+          f"박스 {per_fold.sum(axis=1).tolist()}, 박스가 k개 이상인데 빠진 fold가 있는 클래스 {missing}개 → {args.out_dir}")
+
+if __name__ == '__main__':
+    main()
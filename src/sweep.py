@@ -0,0 +1,183 @@
+import os
+import csv
+import time
+import argparse
+import itertools
+from models.model import BACKENDS
+from src.coco_metrics import coco_evaluate, load_coco_gt
+from src.loader import PrefetchLoader, decode_image
+from src.pred_cache import decode_with_hash
+from src.inference import (load_cat_id_map, list_images, predict_batch, predict_kwargs, open_cache, fuse_detections,
+                           resolve_model_paths, load_models)
+
+def collect_raw(models, args, img_files, cache=None, ckpt_hashes=None):
+    """
+    낮은 conf_floor로 한 번만 예측해서 이미지별 raw 검출을 메모리에 보관 (모델 내부 NMS IoU는 args.nms_iou)
+    반환: [(파일명, w, h, [모델별 (N, 6) 배열])]
+    """
+    loader = PrefetchLoader(
+        [os.path.join(args.img_folder, fn) for fn in img_files],
+        batch_size=args.batch_size,
+        num_workers=args.num_workers,
+        queue_depth=args.queue_depth,
+        decode_fn=decode_image if cache is None else decode_with_hash
+    )
+    raw = []
+    for paths, items in loader:
+        names = [os.path.basename(p) for p in paths]
+        for img_name, item in zip(names, items):
+            if item is None:
+                print(f"[WARN] 이미지를 못 읽음: {img_name}")
+        names = [n for n, item in zip(names, items) if item is not None]
+        items = [item for item in items if item is not None]
+        if cache is None:
+            imgs, img_hashes = items, None
+        else:
+            imgs = [img for img, _ in items]
+            img_hashes = [img_hash for _, img_hash in items]
+
+        batch_dets = predict_batch(
+            models, imgs, args.conf_floor, args.nms_iou, args.tta,
+            cache=cache, ckpt_hashes=ckpt_hashes, img_hashes=img_hashes,
+            **predict_kwargs(args)
+        )
+        for img_name, img, dets in zip(names, imgs, batch_dets):
+            h, w = img.shape[:2]
+            raw.append((img_name, w, h, dets))
+    return raw
+
+def to_coco_results(raw, conf, iou_thr, skip_box_thr, conf_type, fusion, cat_id_map, file_to_id):
+    """
+    raw 검출에 conf 필터 + WBF를 적용해서 COCO result 리스트로 변환
+    박스 좌표는 inference.py가 CSV에 쓰는 값과 같게 정수로 자름
+    """
+    results = []
+    for img_name, w, h, dets in raw:
+        image_id = file_to_id.get(img_name)
+        if image_id is None:
+            continue
+        # predict(conf=c)는 score > c 인 박스만 남기므로 같은 조건으로 자름
+        dets = [data[data[:, 4] > conf] for data in dets]
+        fused = fuse_detections(dets, w, h, iou_thr, skip_box_thr, fusion, conf_type)
+        if fused is None:
+            continue
+        for (x1n, y1n, x2n, y2n), score, cls_idx in zip(*fused):
+            x1, y1 = int(x1n * w), int(y1n * h)
+            x2, y2 = int(x2n * w), int(y2n * h)
+            results.append({
+                "image_id":    image_id,
+                "category_id": cat_id_map.get(cls_idx, cls_idx),
+                "bbox":        [float(x1), float(y1), float(x2 - x1), float(y2 - y1)],
+                "score":       float(score)
+            })
+    return results
+
+def evaluate(coco_gt, results):
+    """(mAP50, mAP50-95) 반환, 검출이 없으면 (0, 0) (src.coco_metrics, pycocotools COCOeval과 같은 값)"""
+    if not results:
+        return 0.0, 0.0
+    res = coco_evaluate(coco_gt, results)
+    return res["mAP50"], res["mAP50-95"]
+
+def map_file_to_id(coco_gt, img_files):
+    """GT의 file_name → image_id (GT에 없는 파일은 inference.py처럼 숫자 파일명을 id로 사용)"""
+    by_name = {os.path.basename(img["file_name"]): img["id"] for img in coco_gt["images"]}
+    gt_ids = {img["id"] for img in coco_gt["images"]}
+    file_to_id = {}
+    for fn in img_files:
+        if fn in by_name:
+            file_to_id[fn] = by_name[fn]
+        else:
+            base = os.path.splitext(fn)[0]
+            if base.isdigit() and int(base) in gt_ids:
+                file_to_id[fn] = int(base)
+    return file_to_id
+
+def reproduce_command(args, conf, iou_thr, skip, conf_type):
+    """sweep 한 행과 같은 결과를 내는 inference.py 명령 (inference.py 옵션으로 표현할 수 없는 조합이면 None)"""
+    # inference.py는 skip_box_thr = conf_thresh, conf_type = avg 고정
+    if skip != conf or conf_type != "avg":
+        return None
+    cmd = ["python -m src.inference", f"--checkpoint {args.checkpoint}", f"--img_folder {args.img_folder}"]
+    if args.ensemble_ckpts:
+        cmd.append("--ensemble_ckpts " + " ".join(args.ensemble_ckpts))
+    cmd += [f"--conf_thresh {conf}", f"--iou_thresh {iou_thr}", f"--nms_iou {args.nms_iou}", f"--fusion {args.fusion}"]
+    if args.tta:
+        cmd.append("--tta")
+    if args.backend != "torch":
+        cmd.append(f"--backend {args.backend}")
+    if args.imgsz:
+        cmd.append(f"--imgsz {args.imgsz}")
+    return " ".join(cmd)
+
+def main():
+    parser = argparse.ArgumentParser("conf / IoU / WBF parameter sweep with one inference pass")
+    parser.add_argument("--checkpoint", type=str, required=True)
+    parser.add_argument("--ensemble_ckpts", nargs='+', default=[])
+    parser.add_argument("--img_folder", type=str, required=True)
+    parser.add_argument("--ann_json", type=str, required=True, help="COCO GT json")
+    parser.add_argument("--data_yaml", type=str, default="data.yaml")
+    parser.add_argument("--tta", action="store_true")
+    parser.add_argument("--conf_floor", type=float, default=0.001, help="한 번의 예측에 쓰는 최저 conf (conf_list 최솟값 이하)")
+    parser.add_argument("--nms_iou", type=float, default=0.45, help="모델 내부 NMS IoU (sweep 동안 고정, 재현 시 inference.py --nms_iou)")
+    parser.add_argument("--conf_list", type=float, nargs='+', default=[0.05, 0.1, 0.15, 0.25, 0.35])
+    parser.add_argument("--iou_list", type=float, nargs='+', default=[0.45, 0.55, 0.65], help="WBF(또는 NMS) iou_thr 후보")
+    parser.add_argument("--skip_list", type=float, nargs='+', default=None, help="WBF skip_box_thr 후보 (기본: conf와 같게, inference.py 동작)")
+    parser.add_argument("--conf_types", nargs='+', choices=["avg", "max"], default=["avg"])
+    parser.add_argument("--fusion", choices=["wbf", "nms"], default="wbf")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch", help="inference.py --backend와 같음 (onnx / int8 모델 sweep)")
+    parser.add_argument("--imgsz", type=int, default=None)
+    parser.add_argument("--onnx_batch", type=int, default=0)
+    parser.add_argument("--batch_size", type=int, default=16)
+    parser.add_argument("--num_workers", type=int, default=4)
+    parser.add_argument("--queue_depth", type=int, default=4)
+    parser.add_argument("--cache_dir", type=str, default=None, help="raw 예측 캐시 폴더 (지정 시 재실행에서 예측 생략)")
+    parser.add_argument("--cache_max_mb", type=float, default=2048)
+    parser.add_argument("--out_csv", type=str, default="sweep_results.csv")
+    args = parser.parse_args()
+
+    if args.conf_floor > min(args.conf_list):
+        parser.error("--conf_floor는 --conf_list 최솟값 이하여야 합니다.")
+
+    cat_id_map = load_cat_id_map(args.data_yaml)
+    coco_gt = load_coco_gt(args.ann_json, args.data_yaml)
+    img_files = list_images(args.img_folder)
+    file_to_id = map_file_to_id(coco_gt, img_files)
+    print(f"[INFO] {len(file_to_id)}/{len(img_files)} images matched to GT.")
+
+    # 1) 한 번만 예측
+    start = time.perf_counter()
+    ckpt_paths = [args.checkpoint] + args.ensemble_ckpts
+    model_paths = resolve_model_paths(args, ckpt_paths)
+    models = load_models(args, model_paths)
+    cache, ckpt_hashes = open_cache(args, model_paths)
+    raw = collect_raw(models, args, [fn for fn in img_files if fn in file_to_id], cache, ckpt_hashes)
+    print(f"[INFO] raw detections collected in {time.perf_counter() - start:.1f}s "
+          f"({len(models)} model(s), {args.backend}, conf_floor={args.conf_floor}, nms_iou={args.nms_iou})")
+
+    # 2) 후처리 조합마다 평가
+    grid = list(itertools.product(args.conf_list, args.iou_list, args.skip_list or [None], args.conf_types))
+    header = ["conf", "iou", "skip_box_thr", "conf_type", "nms_iou", "n_dets", "mAP50", "mAP50-95"]
+    rows = []
+    print(f"\n{'conf':>6} {'iou':>6} {'skip':>6} {'type':>5} {'n_dets':>8} {'mAP50':>8} {'mAP50-95':>9}")
+    for conf, iou_thr, skip, conf_type in grid:
+        skip = conf if skip is None else skip
+        results = to_coco_results(raw, conf, iou_thr, skip, conf_type, args.fusion, cat_id_map, file_to_id)
+        map50, map5095 = evaluate(coco_gt, results)
+        rows.append([conf, iou_thr, skip, conf_type, args.nms_iou, len(results), map50, map5095])
+        print(f"{conf:6.3f} {iou_thr:6.2f} {skip:6.3f} {conf_type:>5} {len(results):8d} {map50:8.4f} {map5095:9.4f}")
+
+    with open(args.out_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+    best = max(rows, key=lambda r: r[7])
+    print(f"\n[BEST mAP50-95] conf={best[0]} iou={best[1]} skip_box_thr={best[2]} conf_type={best[3]} nms_iou={best[4]} "
+          f"→ mAP50={best[6]:.4f}, mAP50-95={best[7]:.4f}")
+    cmd = reproduce_command(args, *best[:4])
+    print(f"재현: {cmd}" if cmd else "(skip_box_thr ≠ conf 또는 conf_type=max 조합은 inference.py 옵션으로 재현할 수 없음)")
+    print(f"Sweep 완료 ({len(grid)} settings, {time.perf_counter() - start:.1f}s) → {args.out_csv}")
+
+if __name__ == "__main__":
+    main()
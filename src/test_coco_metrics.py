@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pycocotools")
+
+from scripts.bench_coco_eval import make_dataset, pycocotools_eval, check_parity
+from src.coco_metrics import coco_evaluate
+
+@pytest.mark.parametrize("seed,n_images,n_classes", [(0, 40, 5), (1, 80, 12)])
+def test_matches_pycocotools(seed, n_images, n_classes):
+    gt, results = make_dataset(np.random.default_rng(seed), n_images, n_classes)
+    ours = coco_evaluate(gt, results)
+    ok, diff = check_parity(ours, pycocotools_eval(gt, results))
+    assert ok, f"max diff {diff:.2e}"
+
+def test_per_class_ap_matches_pycocotools():
+    gt, results = make_dataset(np.random.default_rng(2), 40, 5)
+    ours = coco_evaluate(gt, results)
+    ref = pycocotools_eval(gt, results)
+    # pycocotools precision (T, R, K, A, M)에서 area=all, maxDets=100, -1(빈 값) 제외 평균
+    for k, cat_id in enumerate(ref.params.catIds):
+        p = ref.eval["precision"][:, :, k, 0, -1]
+        expected = float(np.mean(p[p > -1])) if (p > -1).any() else -1.0
+        assert ours["per_class"][cat_id]["AP"] == pytest.approx(expected, abs=1e-12)
@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from src.sinks import CocoResultsSink, MultiSink, open_sink
+
+ROW = (1, 1, 3, 10, 20, 30, 40, 0.9)
+
+def test_error_removes_partial_outputs(tmp_path):
+    paths = [tmp_path / "p.csv", tmp_path / "p.json", tmp_path / "p.jsonl"]
+    with pytest.raises(RuntimeError):
+        with MultiSink(open_sink(str(p), chunk_size=1) for p in paths) as sink:
+            sink.write(ROW)
+            raise RuntimeError("중간 실패")
+    assert not any(p.exists() for p in paths)
+
+def test_failed_open_aborts_opened_sinks(tmp_path):
+    def sinks():
+        yield open_sink(str(tmp_path / "p.csv"))
+        raise ImportError("pyarrow 없음")
+    with pytest.raises(ImportError):
+        MultiSink(sinks())
+    assert list(tmp_path.iterdir()) == []
+
+def test_coco_results_complete_on_success(tmp_path):
+    path = tmp_path / "p.json"
+    with CocoResultsSink(str(path), chunk_size=1) as sink:
+        sink.write(ROW)
+        sink.write(ROW)
+    assert len(json.loads(path.read_text(encoding="utf-8"))) == 2
+
+def test_parquet_without_rows_writes_schema(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "p.parquet"
+    with open_sink(str(path)):
+        pass
+    table = pq.read_table(str(path))
+    assert table.num_rows == 0 and table.column_names[-1] == "score"
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+ensemble_boxes = pytest.importorskip("ensemble_boxes")
+
+from scripts.bench_wbf import make_ensemble, check_parity
+from src.wbf import weighted_boxes_fusion, nms, _SMALL_INPUT
+
+# (모델 수, 이미지당 객체 수): 1~2개 모델·몇 개 박스는 _cluster_small, 나머지는 벡터화 경로
+CASES = [(1, 5), (2, 3), (1, 20), (3, 40), (5, 40)]
+
+def _cases(seed, n_models, n_objects, n=30):
+    rng = np.random.default_rng(seed)
+    return [make_ensemble(rng, n_models, n_objects, 73) for _ in range(n)]
+
+@pytest.mark.parametrize("n_models,n_objects", CASES)
+@pytest.mark.parametrize("conf_type", ["avg", "max"])
+def test_wbf_matches_ensemble_boxes(n_models, n_objects, conf_type):
+    for boxes, scores, labels in _cases(n_models * 100 + n_objects, n_models, n_objects):
+        ours = weighted_boxes_fusion(boxes, scores, labels, iou_thr=0.55, skip_box_thr=0.1, conf_type=conf_type)
+        ref = ensemble_boxes.weighted_boxes_fusion(boxes, scores, labels, iou_thr=0.55, skip_box_thr=0.1,
+                                                   conf_type=conf_type)
+        assert check_parity(ours, ref)
+
+def test_wbf_weights_and_both_paths():
+    weights = [2, 1, 1]
+    for boxes, scores, labels in _cases(7, 3, 40, n=10):
+        # 같은 입력을 잘라서 작은 입력 경로도 같이 확인
+        small = [b[:3] for b in boxes], [s[:3] for s in scores], [l[:3] for l in labels]
+        assert sum(len(b) for b in small[0]) <= _SMALL_INPUT < sum(len(b) for b in boxes)
+        for inputs in ((boxes, scores, labels), small):
+            ours = weighted_boxes_fusion(*inputs, weights=weights, iou_thr=0.5, skip_box_thr=0.0)
+            ref = ensemble_boxes.weighted_boxes_fusion(*inputs, weights=weights, iou_thr=0.5, skip_box_thr=0.0)
+            assert check_parity(ours, ref)
+
+@pytest.mark.parametrize("n_models,n_objects", CASES)
+def test_nms_matches_ensemble_boxes(n_models, n_objects):
+    for boxes, scores, labels in _cases(n_models * 10 + n_objects, n_models, n_objects):
+        assert check_parity(nms(boxes, scores, labels, iou_thr=0.5), ensemble_boxes.nms(boxes, scores, labels, iou_thr=0.5))
+
+def test_wbf_empty():
+    boxes, scores, labels = weighted_boxes_fusion([np.zeros((0, 4))], [np.zeros(0)], [np.zeros(0)])
+    assert boxes.shape == (0, 4) and len(scores) == 0 and len(labels) == 0
@@ -0,0 +1,142 @@
+import os
+import math
+import shutil
+import tempfile
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import yaml
+
+from src.imgsize import CACHE_NAME, image_sizes
+
+CACHE_MODES = ('auto', 'ram', 'disk', 'none')
+IMG_EXTS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+def dataset_images(data_yaml, splits=('train', 'val')):
+    """
+    data.yaml의 train / val 항목 → 이미지 경로 목록 (폴더, 이미지 목록 .txt, 리스트 모두 지원)
+    상대 경로는 ultralytics처럼 path(없으면 data.yaml 폴더) 기준, 없으면 현재 폴더 기준
+    """
+    with open(data_yaml, 'r', encoding='utf-8') as f:
+        cfg = yaml.safe_load(f)
+    root = Path(cfg.get('path') or Path(data_yaml).parent)
+    paths = []
+    for split in splits:
+        entries = cfg.get(split) or []
+        for entry in entries if isinstance(entries, list) else [entries]:
+            p = root / entry if (root / entry).exists() else Path(entry)
+            if p.is_dir():
+                paths += sorted(str(q) for q in p.rglob('*') if q.suffix.lower() in IMG_EXTS)
+            elif p.suffix == '.txt' and p.exists():
+                lines = [line.strip() for line in p.read_text(encoding='utf-8').splitlines() if line.strip()]
+                paths += [line if os.path.isabs(line) else str(p.parent / line) for line in lines]
+    return list(dict.fromkeys(paths))
+
+def resized_shape(w, h, imgsz):
+    """ultralytics load_image와 같은 규칙으로 긴 변을 imgsz에 맞춘 (h, w)"""
+    r = imgsz / max(h, w)
+    if r == 1:
+        return h, w
+    return min(math.ceil(h * r), imgsz), min(math.ceil(w * r), imgsz)
+
+def cache_footprint(sizes, imgsz):
+    """{경로: (w, h)} → imgsz로 줄인 uint8 BGR 배열 전체 바이트 수"""
+    return sum(rh * rw * 3 for rh, rw in (resized_shape(w, h, imgsz) for w, h in sizes.values()))
+
+def available_memory():
+    """사용 가능한 메모리 (바이트, /proc/meminfo의 MemAvailable, 못 읽으면 빈 물리 페이지 기준)"""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def _gb(n):
+    return n / 1024 ** 3
+
+def resolve_cache(data_yaml, imgsz, cache='auto', budget_gb=None, workers=16):
+    """
+    학습 이미지 캐시 방식 결정 → (ultralytics train의 cache 값 'ram' | 'disk' | False, 이미지 크기 dict)
+    - 이미지 헤더만 읽어서(src.imgsize, 폴더별 .imgsize_cache.json) imgsz로 줄였을 때의 크기를 추정해서 출력
+    - auto: 추정치가 메모리 예산(budget_gb, 기본 사용 가능 메모리의 절반) 이하면 ram,
+            아니면 이미지 폴더 디스크 여유 공간에 들어가면 disk, 둘 다 안 되면 캐시 안 함
+    """
+    if cache not in CACHE_MODES:
+        raise ValueError(f"지원하지 않는 캐시 방식: {cache} (가능: {', '.join(CACHE_MODES)})")
+    if cache == 'none':
+        return False, {}
+
+    paths = dataset_images(data_yaml)
+    sizes = {}
+    by_dir = {}
+    for path in paths:
+        by_dir.setdefault(os.path.dirname(path), []).append(path)
+    for img_dir, dir_paths in by_dir.items():
+        sizes.update(image_sizes(dir_paths, cache_path=os.path.join(img_dir, CACHE_NAME), workers=workers))
+    need = cache_footprint(sizes, imgsz)
+
+    mem = available_memory()
+    budget = budget_gb * 1024 ** 3 if budget_gb is not None else (mem or 0) * 0.5
+    img_dirs = list(by_dir) or [os.path.dirname(os.path.abspath(data_yaml))]
+    disk_free = min(shutil.disk_usage(d).free for d in img_dirs)
+    print(f"[CACHE] {len(sizes)}/{len(paths)} images @ imgsz={imgsz}: 예상 {_gb(need):.2f} GB "
+          f"(메모리 예산 {_gb(budget):.2f} GB" + (f" / 사용 가능 {_gb(mem):.2f} GB" if mem else '') +
+          f", 디스크 여유 {_gb(disk_free):.2f} GB)")
+
+    if cache == 'auto':
+        if need <= budget:
+            cache = 'ram'
+        elif need * 1.1 <= disk_free:
+            cache = 'disk'
+        else:
+            cache = 'none'
+    print(f"[CACHE] mode: {cache}")
+    return (False if cache == 'none' else cache), sizes
+
+def _npy_shape(npy_path):
+    """저장된 .npy의 shape (헤더만 읽음, 없거나 깨졌으면 None)"""
+    try:
+        return np.load(npy_path, mmap_mode='r').shape
+    except (OSError, ValueError):
+        return None
+
+def prepare_disk_cache(sizes, imgsz, workers=8):
+    """
+    ultralytics disk 캐시(<이미지>.npy)를 imgsz로 줄인 배열로 미리 만듦
+    ultralytics는 .npy가 있으면 다시 만들지 않고, 긴 변이 이미 imgsz면 resize도 하지 않으므로
+    epoch마다 PNG 디코딩·축소 없이 작은 배열만 읽음 (모양이 다르거나 이미지보다 오래된 .npy는 다시 만듦)
+    반환: (새로 만든 수, 재사용 수)
+    """
+    def build(item):
+        path, (w, h) = item
+        npy = Path(path).with_suffix('.npy')
+        rh, rw = resized_shape(w, h, imgsz)
+        if npy.exists() and npy.stat().st_mtime_ns >= os.stat(path).st_mtime_ns and _npy_shape(npy) == (rh, rw, 3):
+            return False
+        img = cv2.imread(path)
+        if img is None:
+            return False
+        if img.shape[:2] != (rh, rw):
+            img = cv2.resize(img, (rw, rh), interpolation=cv2.INTER_LINEAR)
+        fd, tmp = tempfile.mkstemp(dir=npy.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, np.ascontiguousarray(img), allow_pickle=False)
+            os.replace(tmp, npy)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return True
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        built = sum(pool.map(build, sizes.items()))
+    print(f"[CACHE] resized .npy: 새로 만듦 {built}, 재사용 {len(sizes) - built}")
+    return built, len(sizes) - built
@@ -1,14 +1,15 @@
 import argparse
-import json
-import random
-import shutil
 import sqlite3
 from datetime import datetime
 from pathlib import Path
-import cv2
 import pandas as pd
 from models.model import get_yolov8_model
-from ultralytics import YOLO  # if 필요할 경우
+from src.ann_index import load_index
+from src.build_manifest import BuildManifest
+from src.materialize import image_list_text
+from src.train_cache import CACHE_MODES
+from src.coco_yolo import coco_to_yolo_texts, write_labels
+from src.splitting import class_counts
 
 def save_model_record(
     db_path: str,
@@ -58,59 +59,56 @@ def save_model_record(
     conn.close()
 
 
-def split_and_convert(raw_img_dir, raw_ann_dir, out_root, split_ratio=0.8, seed=42):
-    cat_ids = {}
-    for jp in Path(raw_ann_dir).rglob("*.json"):
-        part = json.load(open(jp, 'r', encoding='utf-8'))
-        for c in part.get('categories', []):
-            cat_ids[c['id']] = c
+def split_and_convert(raw_img_dir, raw_ann_dir, out_root, split_ratio=0.8, seed=42, incremental=False,
+                      materialize='copy', stratify=False):
+    """
+    incremental=True면 out_root/.build_manifest.json 기준으로 원본이 바뀐 이미지·라벨만 다시 씀 (기존 이미지의 train/val 배정은 유지)
+    incremental과 관계없이 이전 빌드가 만들었지만 이번에는 만들지 않는 결과는 삭제
 
-    category_ids = sorted(cat_ids.keys())
+    materialize: train/val 이미지 배치 방식 (src.materialize.MODES)
+    'manifest'면 split과 무관한 out_root/pool/{images,labels}를 한 번만 만들고 (이미지는 symlink)
+    out_root/train.txt, val.txt 이미지 목록만 split마다 새로 씀 → data.yaml의 train/val에 목록 파일 지정
+    (YOLO는 이미지 경로의 /images/를 /labels/로 바꿔서 라벨을 찾으므로 목록이 pool/images를 가리킴)
+
+    stratify=True면 클래스별 박스 수가 train/val에 split_ratio 비율로 나뉘도록 반복 층화 분할 (src.splitting)
+    """
+    # 어노테이션 트리는 src.ann_index 인덱스에서 한 번에 로드 (바뀐 JSON만 다시 파싱)
+    coco = load_index(raw_ann_dir).coco()
+
+    category_ids = sorted(c['id'] for c in coco['categories'])
     id_to_index   = {cid: idx for idx, cid in enumerate(category_ids)}
-    coco = {
-            'images': [],
-            'annotations': [],
-            'categories': list(cat_ids.values())
-        }
-    
-    img_ids, ann_ids = set(), set()
-    for jp in Path(raw_ann_dir).rglob("*.json"):
-        part = json.load(open(jp, encoding='utf-8'))
-        for c in part.get('categories', []):
-            if c['id'] not in cat_ids:
-                cat_ids[c['id']] = c
-        for img in part.get('images', []):
-            if img['id'] not in img_ids:
-                coco['images'].append(img); img_ids.add(img['id'])
-        for ann in part.get('annotations', []):
-            if ann['id'] not in ann_ids:
-                coco['annotations'].append(ann); ann_ids.add(ann['id'])
-    coco['categories'] = list(cat_ids.values())
-
-    imgs = coco['images']
-    random.seed(seed)
-    random.shuffle(imgs)
-    n = int(len(imgs) * split_ratio)
-    splits = {'train': imgs[:n], 'val': imgs[n:]}
-
-    for subset, img_list in splits.items():
-        img_out = Path(out_root) / subset / 'images'
-        lbl_out = Path(out_root) / subset / 'labels'
-        img_out.mkdir(parents=True, exist_ok=True)
-        lbl_out.mkdir(parents=True, exist_ok=True)
-        for img in img_list:
-            fn = img['file_name']
-            shutil.copy(Path(raw_img_dir) / fn, img_out / fn)
-            rel = [a for a in coco['annotations'] if a['image_id'] == img['id']]
-            lines = []
-            for a in rel:
-                x, y, w, h = a['bbox']
-                xc = (x + w/2) / img['width']
-                yc = (y + h/2) / img['height']
-                nw, nh = w / img['width'], h / img['height']
-                cls = id_to_index[a['category_id']]
-                lines.append(f"{cls} {xc:.6f} {yc:.6f} {nw:.6f} {nh:.6f}\n")
-            (lbl_out / f"{Path(fn).stem}.txt").write_text(''.join(lines))
+    label_texts   = coco_to_yolo_texts(coco['images'], coco['annotations'], id_to_index)
+
+    params = {'tool': 'split_and_convert', 'split_ratio': split_ratio, 'seed': seed}
+    if stratify:
+        params['stratify'] = 'iterative'
+    manifest = BuildManifest(out_root, params, incremental=incremental)
+    names, counts, _ = class_counts(coco['images'], coco['annotations'], category_ids)
+    split = manifest.assign_split(names, split_ratio, seed, counts if stratify else None)
+
+    lists = {'train': [], 'val': []}
+    labels = {}
+    for img in coco['images']:
+        fn = img['file_name']
+        subset = split[fn]
+        base = 'pool' if materialize == 'manifest' else subset
+        manifest.place_file(Path(raw_img_dir) / fn, f"{base}/images/{fn}",
+                            'symlink' if materialize == 'manifest' else materialize)
+        lists[subset].append(Path(out_root) / base / 'images' / fn)
+        labels[f"{base}/labels/{Path(fn).stem}.txt"] = label_texts[img['id']]
+    write_labels(labels, write_fn=manifest.write_text)
+
+    if materialize == 'manifest':
+        for subset, paths in lists.items():
+            manifest.write_text(f"{subset}.txt", image_list_text(paths))
+    else:
+        for subset in lists:
+            (Path(out_root) / subset / 'images').mkdir(parents=True, exist_ok=True)
+            (Path(out_root) / subset / 'labels').mkdir(parents=True, exist_ok=True)
+
+    removed = manifest.prune()
+    manifest.save()
+    print(f"[INFO] split_and_convert ({materialize}): {manifest.summary(removed)}")
 
 
 def find_latest_experiment(runs_dir: Path) -> Path:
@@ -131,6 +129,9 @@ def main():
     parser.add_argument('--batch',     type=int,   default=8)
     parser.add_argument('--imgsz',     type=int,   default=640)
     parser.add_argument('--lr0',       type=float, default=0.001)
+    parser.add_argument('--cache',     choices=CACHE_MODES, default='auto', help='학습 이미지 캐시 (auto: 메모리 예산에 맞춰 ram / disk / none)')
+    parser.add_argument('--cache_budget_gb', type=float, default=None, help='ram 캐시 메모리 예산 (기본: 사용 가능 메모리의 절반)')
+    parser.add_argument('--image_store', default=None, help='src.image_store 저장소 폴더 (지정 시 이미지를 memmap에서 읽음, --cache 무시)')
     parser.add_argument('--exist_ok',  action='store_true')
     parser.add_argument('--name',  choices=['new','resume'], default='new')
     parser.add_argument('--conf_thresh', type=float, default=0.25)
@@ -168,14 +169,7 @@ def main():
     # print("train/val split & YOLO txt 생성 완료")
 
     # 3) data.yaml 생성 (멀티클래스)
-    cat_ids = {}
-    for jp in Path(args.raw_ann_dir).rglob("*.json"):
-        jd = json.load(open(jp, 'r', encoding='utf-8'))
-        for c in jd.get('categories', []):
-            cid = str(c['id'])  # 실제 알약 코드
-            cname = c.get('name', cid)
-            cat_ids[cid] = cname
-
+    cat_ids = load_index(args.raw_ann_dir).category_map()  # {실제 알약 코드: 약이름}
     sorted_ids = sorted(cat_ids.items(), key=lambda x: int(x[0]))  # [(23, '약이름'), ...]
     data_yaml = Path(__file__).parent.parent / 'data.yaml'
 
@@ -206,7 +200,10 @@ def main():
         project='runs/train',
         name=exp_name,
         exist_ok=args.exist_ok,
-        patience=3
+        patience=3,
+        cache=args.cache,
+        cache_budget_gb=args.cache_budget_gb,
+        image_store=args.image_store
     )
     train_fn(resume=resume)
     print(f"학습 완료 ({exp_name})")
@@ -0,0 +1,283 @@
+import numpy as np
+
+# 열 구성: label, score*weight, weight, model index, x1, y1, x2, y2 (ensemble_boxes와 동일)
+_LABEL, _SCORE, _WEIGHT, _MODEL = 0, 1, 2, 3
+
+def _prefilter(boxes_list, scores_list, labels_list, weights, thr):
+    """
+    모델별 입력을 하나의 (N, 8) 배열로 합침 (ensemble_boxes.prefilter_boxes와 같은 규칙)
+    - score < thr 제거, 좌표 뒤집힘 보정, [0, 1] 클리핑, 넓이 0 박스 제거
+    """
+    boxes, scores, labels, model = [], [], [], []
+    for t, (b, s, l) in enumerate(zip(boxes_list, scores_list, labels_list)):
+        b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+        s = np.asarray(s, dtype=np.float64).reshape(-1)
+        l = np.asarray(l).reshape(-1)
+        if len(b) != len(s) or len(b) != len(l):
+            raise ValueError(f"{t}번째 모델의 boxes/scores/labels 길이가 다릅니다.")
+        boxes.append(b)
+        scores.append(s)
+        labels.append(l)
+        model.append(np.full(len(b), t))
+    if not boxes:
+        return np.empty((0, 8), dtype=np.float64)
+
+    boxes = np.concatenate(boxes)
+    scores = np.concatenate(scores)
+    labels = np.concatenate(labels).astype(int)
+    model = np.concatenate(model)
+
+    lo = np.minimum(np.maximum(np.minimum(boxes[:, :2], boxes[:, 2:]), 0), 1)
+    hi = np.minimum(np.maximum(np.maximum(boxes[:, :2], boxes[:, 2:]), 0), 1)
+    keep = (scores >= thr) & ((hi[:, 0] - lo[:, 0]) * (hi[:, 1] - lo[:, 1]) != 0.0)
+
+    out = np.empty((int(keep.sum()), 8), dtype=np.float64)
+    out[:, _LABEL] = labels[keep]
+    out[:, _SCORE] = scores[keep] * weights[model[keep]]
+    out[:, _WEIGHT] = weights[model[keep]]
+    out[:, _MODEL] = model[keep]
+    out[:, 4:6] = lo[keep]
+    out[:, 6:] = hi[keep]
+    return out
+
+def iou_matrix(a, b):
+    """(N, 4) × (M, 4) xyxy 박스의 IoU 행렬"""
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    xa = np.maximum(a[:, None, 0], b[None, :, 0])
+    ya = np.maximum(a[:, None, 1], b[None, :, 1])
+    xb = np.minimum(a[:, None, 2], b[None, :, 2])
+    yb = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.maximum(xb - xa, 0) * np.maximum(yb - ya, 0)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(union > 0, inter / union, 0.0)
+
+def _sort_by_class(filtered):
+    """
+    클래스 처음 등장 순서 → score 내림차순으로 정렬하는 인덱스와 클래스 번호(등장 순서 기준) 반환
+    score 동점이면 뒤쪽 박스가 먼저 (ensemble_boxes의 argsort()[::-1]와 같은 순서)
+    """
+    uniq, first, inverse = np.unique(filtered[:, _LABEL], return_index=True, return_inverse=True)
+    label_rank = np.argsort(np.argsort(first))[inverse]
+    pos = np.arange(len(filtered))
+    order = np.lexsort((-pos, -filtered[:, _SCORE], label_rank))
+    return order, label_rank[order], len(uniq)
+
+# _cluster 상태 배열 열 구성: fused 박스 8열 + 아래 누적값
+_AREA, _BOX_SUM, _CONF_SUM, _CONF_MAX, _WEIGHT_SUM, _COUNT = 8, slice(9, 13), 13, 14, 15, 16
+
+def _cluster(boxes, cls, n_cls, iou_thr, conf_type):
+    """
+    클래스별 greedy 클러스터링을 모든 클래스에 대해 동시에 수행
+    - boxes: 클래스 → score 내림차순으로 정렬된 (N, 8), cls: 각 박스의 클래스 번호 (N,)
+    - t번째 단계에서 각 클래스의 t번째 박스를 한꺼번에 처리: (클래스 × 클러스터) IoU 행렬,
+      argmax로 클러스터 할당, 가중 평균 갱신까지 모두 배열 연산
+    - 클래스 안에서는 ensemble_boxes와 같은 순서로 처리하므로 결과 동일
+      (ensemble_boxes.get_weighted_box처럼 박스 가중합은 float32로 누적)
+    반환: 클래스 순서 → 생성 순서로 이어 붙인 (K, 8) fused 박스와 클러스터 크기 (K,)
+    """
+    sizes = np.bincount(cls, minlength=n_cls)
+    depth = int(sizes.max())
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    padded = np.zeros((n_cls, depth, 8), dtype=np.float64)
+    padded[cls, np.arange(len(boxes)) - starts[cls]] = boxes
+
+    state = np.zeros((n_cls, depth, 17), dtype=np.float64)
+    n_clusters = np.zeros(n_cls, dtype=np.int64)
+    rows = np.arange(n_cls)
+
+    for t in range(depth):
+        active = sizes > t
+        b = padded[:, t]
+        b_area = (b[:, 6] - b[:, 4]) * (b[:, 7] - b[:, 5])
+
+        join = np.zeros(n_cls, dtype=bool)
+        best = np.zeros(n_cls, dtype=np.int64)
+        if t:
+            c = state[:, :t]
+            inter = (
+                np.maximum(np.minimum(c[:, :, 6], b[:, None, 6]) - np.maximum(c[:, :, 4], b[:, None, 4]), 0)
+                * np.maximum(np.minimum(c[:, :, 7], b[:, None, 7]) - np.maximum(c[:, :, 5], b[:, None, 5]), 0)
+            )
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ious = inter / (c[:, :, _AREA] + b_area[:, None] - inter)
+            ious[np.arange(t)[None, :] >= n_clusters[:, None]] = -1
+            best = np.argmax(ious, axis=1)
+            join = active & (ious[rows, best] > iou_thr)
+
+        # 1) 새 클러스터 생성: 박스 그대로 대표 박스가 됨
+        ci = np.nonzero(active & ~join)[0]
+        if len(ci):
+            bn = b[ci]
+            st = np.zeros((len(ci), 17), dtype=np.float64)
+            st[:, :8] = bn
+            st[:, _AREA] = b_area[ci]
+            st[:, _BOX_SUM] = (bn[:, _SCORE, None] * bn[:, 4:]).astype(np.float32)
+            st[:, _CONF_SUM] = bn[:, _SCORE]
+            st[:, _CONF_MAX] = bn[:, _SCORE]
+            st[:, _WEIGHT_SUM] = bn[:, _WEIGHT]
+            st[:, _COUNT] = 1
+            state[ci, n_clusters[ci]] = st
+            n_clusters[ci] += 1
+
+        # 2) 기존 클러스터에 합류: 누적값 갱신 후 가중 평균 박스 재계산
+        ci = np.nonzero(join)[0]
+        if len(ci):
+            bj, ki = b[ci], best[ci]
+            st = state[ci, ki]
+            st[:, _BOX_SUM] = (st[:, _BOX_SUM] + bj[:, _SCORE, None] * bj[:, 4:]).astype(np.float32)
+            st[:, _CONF_SUM] += bj[:, _SCORE]
+            st[:, _CONF_MAX] = np.maximum(st[:, _CONF_MAX], bj[:, _SCORE])
+            st[:, _WEIGHT_SUM] += bj[:, _WEIGHT]
+            st[:, _COUNT] += 1
+            st[:, 4:8] = (st[:, _BOX_SUM] / st[:, _CONF_SUM, None]).astype(np.float32)
+            st[:, _AREA] = (st[:, 6] - st[:, 4]) * (st[:, 7] - st[:, 5])
+            if conf_type == 'max':
+                st[:, _SCORE] = st[:, _CONF_MAX].astype(np.float32)
+            else:
+                st[:, _SCORE] = (st[:, _CONF_SUM] / st[:, _COUNT]).astype(np.float32)
+            st[:, _WEIGHT] = st[:, _WEIGHT_SUM].astype(np.float32)
+            st[:, _MODEL] = -1
+            state[ci, ki] = st
+
+    valid = np.arange(depth)[None, :] < n_clusters[:, None]
+    clusters = state[valid]
+    return clusters[:, :8], clusters[:, _COUNT]
+
+def _f32(v):
+    return float(np.float32(v))
+
+def _cluster_small(filtered, iou_thr, conf_type):
+    """
+    박스가 적을 때(_SMALL_INPUT 이하) 쓰는 순수 Python 버전 (_sort_by_class + _cluster와 같은 순서·반올림)
+    이미지당 박스가 몇 개뿐이면 배열 연산을 만드는 비용이 계산보다 커서 더 느려짐
+    """
+    rows = filtered.tolist()
+    rank = {}
+    for r in rows:
+        rank.setdefault(r[_LABEL], len(rank))
+    order = sorted(range(len(rows)), key=lambda k: (rank[rows[k][_LABEL]], -rows[k][_SCORE], -k))
+
+    fused, stats, label = [], [], None
+    for k in order:
+        b = rows[k]
+        x1, y1, x2, y2 = b[4:]
+        area = (x2 - x1) * (y2 - y1)
+        if b[_LABEL] != label:
+            label, start = b[_LABEL], len(fused)
+        # 같은 클래스 클러스터 중 IoU 최대 (동점이면 먼저 생긴 것), iou_thr 이하면 새 클러스터
+        best, top = -1, -1.0
+        for ci in range(start, len(fused)):
+            c = fused[ci]
+            inter = max(min(c[6], x2) - max(c[4], x1), 0) * max(min(c[7], y2) - max(c[5], y1), 0)
+            iou = inter / (stats[ci][0] + area - inter)
+            if iou > top:
+                best, top = ci, iou
+        if top <= iou_thr:
+            best = -1
+
+        s = b[_SCORE]
+        if best < 0:
+            fused.append(list(b))
+            stats.append([area, [_f32(s * v) for v in b[4:]], s, s, b[_WEIGHT], 1])
+            continue
+        st, c = stats[best], fused[best]
+        st[1] = [_f32(acc + s * v) for acc, v in zip(st[1], b[4:])]
+        st[2] += s
+        st[3] = max(st[3], s)
+        st[4] += b[_WEIGHT]
+        st[5] += 1
+        c[4:] = [_f32(acc / st[2]) for acc in st[1]]
+        st[0] = (c[6] - c[4]) * (c[7] - c[5])
+        c[_SCORE] = _f32(st[3] if conf_type == 'max' else st[2] / st[5])
+        c[_WEIGHT] = _f32(st[4])
+        c[_MODEL] = -1
+    return np.array(fused, dtype=np.float64).reshape(-1, 8), np.array([st[5] for st in stats], dtype=np.float64)
+
+# 입력 박스가 이 개수 이하면 _cluster_small 사용 (scripts/bench_wbf.py 기준 교차점)
+_SMALL_INPUT = 32
+
+def weighted_boxes_fusion(boxes_list, scores_list, labels_list, weights=None,
+                          iou_thr=0.55, skip_box_thr=0.0, conf_type='avg', allows_overflow=False):
+    """
+    ensemble_boxes.weighted_boxes_fusion과 같은 입력/출력 형식의 NumPy 구현
+    - boxes_list: 모델별 (N, 4) 정규화 xyxy 박스, scores_list / labels_list: 모델별 (N,)
+    - iou_thr 초과 IoU면 같은 클러스터, skip_box_thr 미만 score는 제거
+    - conf_type: 'avg' | 'max'
+    반환: (boxes (K, 4), scores (K,), labels (K,)) score 내림차순
+    """
+    if conf_type not in ('avg', 'max'):
+        raise ValueError(f"지원하지 않는 conf_type: {conf_type}")
+    if weights is None or len(weights) != len(boxes_list):
+        weights = np.ones(len(boxes_list))
+    weights = np.asarray(weights, dtype=np.float64)
+
+    filtered = _prefilter(boxes_list, scores_list, labels_list, weights, skip_box_thr)
+    if len(filtered) == 0:
+        return np.zeros((0, 4)), np.zeros((0,)), np.zeros((0,))
+
+    if len(filtered) <= _SMALL_INPUT:
+        fused, count = _cluster_small(filtered, iou_thr, conf_type)
+    else:
+        order, cls, n_cls = _sort_by_class(filtered)
+        fused, count = _cluster(filtered[order], cls, n_cls, iou_thr, conf_type)
+
+    if conf_type == 'max':
+        fused[:, _SCORE] = fused[:, _SCORE] / weights.max()
+    elif not allows_overflow:
+        fused[:, _SCORE] = fused[:, _SCORE] * np.minimum(len(weights), count) / weights.sum()
+    else:
+        fused[:, _SCORE] = fused[:, _SCORE] * count / weights.sum()
+
+    fused = fused[fused[:, _SCORE].argsort()[::-1]]
+    return fused[:, 4:], fused[:, _SCORE], fused[:, _LABEL]
+
+def _same_class_pairs(labels):
+    """클래스별로 정렬된 labels에서 같은 클래스 안의 (i, j), i < j 쌍을 모두 생성"""
+    n = len(labels)
+    seg_end = np.searchsorted(labels, labels, side='right')
+    counts = seg_end - np.arange(n) - 1
+    i = np.repeat(np.arange(n), counts)
+    offsets = np.arange(len(i)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return i, i + 1 + offsets
+
+def nms(boxes_list, scores_list, labels_list, weights=None, iou_thr=0.5, skip_box_thr=0.0):
+    """
+    클래스별 greedy NMS (ensemble_boxes.nms와 같은 입력/출력 형식)
+    - 같은 클래스 박스 쌍의 IoU를 한 번에 계산해서 "i가 j를 억제" 목록을 만든 뒤
+      score 순서대로 살아남은 박스의 억제 목록만 적용
+    - weights를 주면 score * weight / sum(weights)
+    반환: 클래스 오름차순, 클래스 내 score 내림차순
+    """
+    if weights is not None and len(weights) == len(boxes_list):
+        weights = np.asarray(weights, dtype=np.float64)
+        scores_list = [np.asarray(s, dtype=np.float64) * w / weights.sum() for s, w in zip(scores_list, weights)]
+
+    filtered = _prefilter(boxes_list, scores_list, labels_list, np.ones(len(boxes_list)), skip_box_thr)
+    if len(filtered) == 0:
+        return np.zeros((0, 4)), np.zeros((0,)), np.zeros((0,))
+
+    pos = np.arange(len(filtered))
+    rows = filtered[np.lexsort((-pos, -filtered[:, _SCORE], filtered[:, _LABEL]))]
+
+    i, j = _same_class_pairs(rows[:, _LABEL])
+    a, b = rows[i, 4:], rows[j, 4:]
+    inter = (
+        np.maximum(np.minimum(a[:, 2], b[:, 2]) - np.maximum(a[:, 0], b[:, 0]), 0)
+        * np.maximum(np.minimum(a[:, 3], b[:, 3]) - np.maximum(a[:, 1], b[:, 1]), 0)
+    )
+    area = (rows[:, 6] - rows[:, 4]) * (rows[:, 7] - rows[:, 5])
+    over = inter / (area[i] + area[j] - inter) > iou_thr
+    i, j = i[over], j[over]
+    bounds = np.searchsorted(i, np.arange(len(rows) + 1))
+
+    keep = np.ones(len(rows), dtype=bool)
+    for k in np.nonzero(bounds[1:] > bounds[:-1])[0]:
+        if keep[k]:
+            keep[j[bounds[k]:bounds[k + 1]]] = False
+
+    rows = rows[keep]
+    return rows[:, 4:], rows[:, _SCORE], rows[:, _LABEL]
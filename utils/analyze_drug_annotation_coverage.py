@@ -1,7 +1,7 @@
-import os
-import json
 from collections import defaultdict
 
+from src.ann_index import load_index
+
 def analyze_drug_annotation_coverage():
     """약품코드별 어노테이션 커버리지 분석"""
     
@@ -12,19 +12,14 @@ def analyze_drug_annotation_coverage():
     drug_annotations = defaultdict(list)  # 약품코드별 실제 어노테이션 폴더들
     folder_drug_mapping = {}  # 폴더별 약품코드 매핑
     
-    # 모든 어노테이션 폴더 찾기
-    annotation_folders = []
-    for item in os.listdir(TRAIN_ANNOTATIONS_PATH):
-        item_path = os.path.join(TRAIN_ANNOTATIONS_PATH, item)
-        if os.path.isdir(item_path) and item.endswith('_json'):
-            annotation_folders.append(item)
+    # 모든 어노테이션 폴더 찾기 (src.ann_index 인덱스의 폴더/약품코드 매핑 사용)
+    folder_drugs = load_index(TRAIN_ANNOTATIONS_PATH).folder_drugs()
+    annotation_folders = list(folder_drugs)
     
     print(f"총 {len(annotation_folders)}개의 어노테이션 폴더 발견")
     
     # 각 어노테이션 폴더 분석
     for folder in annotation_folders:
-        folder_path = os.path.join(TRAIN_ANNOTATIONS_PATH, folder)
-        
         # 폴더명에서 약품 코드들 추출
         folder_name = folder.replace('_json', '')
         parts = folder_name.split('-')
@@ -41,13 +36,7 @@ def analyze_drug_annotation_coverage():
                     folder_drug_codes.append(parts[i])
         
         # 실제 하위 폴더의 약품 코드들
-        actual_drug_codes = []
-        for subitem in os.listdir(folder_path):
-            subitem_path = os.path.join(folder_path, subitem)
-            if os.path.isdir(subitem_path) and subitem.startswith('K-'):
-                # K- 접두사 제거하여 약품 코드 추출
-                drug_code = subitem[2:]  # K-001900 -> 001900
-                actual_drug_codes.append(drug_code)
+        actual_drug_codes = folder_drugs[folder]  # K-001900 -> 001900
         
         # 각 약품코드별 정보 저장
         for drug_code in folder_drug_codes:
@@ -1,5 +1,4 @@
 import os
-import json
 import cv2
 import numpy as np
 import matplotlib.pyplot as plt
@@ -7,6 +6,8 @@ import matplotlib.patches as patches
 from collections import defaultdict
 import pandas as pd
 
+from src.ann_index import load_index
+
 import matplotlib.font_manager as fm
 
 def korean_font_setting():
@@ -48,52 +49,43 @@ def load_all_annotations(annotations_path):
     drug_annotations = defaultdict(list)
     image_drug_mapping = defaultdict(list)
     
-    # 모든 JSON 파일 찾기
-    json_files = []
-    for root, dirs, files in os.walk(annotations_path):
-        for file in files:
-            if file.endswith('.json'):
-                json_files.append(os.path.join(root, file))
-    
-    print(f"총 {len(json_files)}개의 어노테이션 파일 발견")
+    # 어노테이션 인덱스에서 로드 (src.ann_index, 바뀐 JSON만 다시 파싱)
+    index = load_index(annotations_path)
+    print(f"총 {len(index.files)}개의 어노테이션 파일 발견")
+    for rel, err in index.errors.items():
+        print(f"Error loading {index.abspath(rel)}: {err}")
     
-    for json_file in json_files:
-        try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            if 'images' in data and 'annotations' in data and 'categories' in data:
-                image_info = data['images'][0]
-                annotation = data['annotations'][0]
-                category = data['categories'][0]
-                
-                # 약품 정보 추출
-                drug_code = category['id']
-                drug_name = category['name']
-                image_name = image_info['file_name']
-                bbox = annotation['bbox']
-                
-                # 약품별 어노테이션 저장
-                drug_annotations[drug_code].append({
-                    'drug_name': drug_name,
-                    'image_name': image_name,
-                    'bbox': bbox,
-                    'area': annotation['area'],
-                    'camera_la': image_info.get('camera_la', 'N/A'),
-                    'drug_N': image_info.get('drug_N', 'N/A'),
-                    'file_path': json_file
-                })
-                
-                # 이미지별 약품 매핑
-                image_drug_mapping[image_name].append({
-                    'drug_code': drug_code,
-                    'drug_name': drug_name,
-                    'bbox': bbox,
-                    'area': annotation['area']
-                })
-                
-        except Exception as e:
-            print(f"Error loading {json_file}: {e}")
+    for rec in index.records():
+        if rec['category'] is None:
+            continue
+        image_info = rec['image_info']
+        annotation = rec['annotation']
+        category = rec['category']
+        
+        # 약품 정보 추출
+        drug_code = category['id']
+        drug_name = category['name']
+        image_name = image_info['file_name']
+        bbox = annotation['bbox']
+        
+        # 약품별 어노테이션 저장
+        drug_annotations[drug_code].append({
+            'drug_name': drug_name,
+            'image_name': image_name,
+            'bbox': bbox,
+            'area': annotation['area'],
+            'camera_la': image_info.get('camera_la', 'N/A'),
+            'drug_N': image_info.get('drug_N', 'N/A'),
+            'file_path': rec['json_file']
+        })
+        
+        # 이미지별 약품 매핑
+        image_drug_mapping[image_name].append({
+            'drug_code': drug_code,
+            'drug_name': drug_name,
+            'bbox': bbox,
+            'area': annotation['area']
+        })
     
     return drug_annotations, image_drug_mapping
 
@@ -1,12 +1,11 @@
 import os
 import json
 import cv2
-import numpy as np
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+from tkinter import ttk, messagebox
 from PIL import Image, ImageTk
-import glob
-from collections import defaultdict
+
+from src.ann_index import load_index
 
 class BBoxEditor:
     def __init__(self, root):
@@ -168,27 +167,21 @@ class BBoxEditor:
             messagebox.showerror("오류", f"어노테이션 폴더를 찾을 수 없습니다: {TRAIN_ANNOTATIONS_PATH}")
             return
         
-        # 폴더 구조 분석
-        for item in os.listdir(TRAIN_ANNOTATIONS_PATH):
-            item_path = os.path.join(TRAIN_ANNOTATIONS_PATH, item)
-            if os.path.isdir(item_path) and item.endswith('_json'):
-                
-                folder_name = item.replace('_json', '')
-                self.folder_structure[folder_name] = {}
-                
-                # 각 약품 코드 폴더 분석
-                for subitem in os.listdir(item_path):
-                    subitem_path = os.path.join(item_path, subitem)
-                    if os.path.isdir(subitem_path) and subitem.startswith('K-'):
-                        drug_code = subitem[2:]  # K- 제거
-                        
-                        json_files = glob.glob(os.path.join(subitem_path, "*.json"))
-                        if json_files:
-                            self.folder_structure[folder_name][drug_code] = {
-                                'path': subitem_path,
-                                'json_files': json_files,
-                                'count': len(json_files)
-                            }
+        # 폴더 구조 분석 (src.ann_index 인덱스에서 로드, 바뀐 JSON만 다시 파싱)
+        index = self.ann_index = load_index(TRAIN_ANNOTATIONS_PATH)
+        for folder in index.folder_drugs():
+            self.folder_structure[folder.replace('_json', '')] = {}
+        
+        # 각 약품 코드 폴더 분석
+        files = index.files[index.files['folder'].str.endswith('_json') & index.files['drug_dir'].str.startswith('K-')]
+        for (folder, drug_dir), group in files.groupby(['folder', 'drug_dir'], sort=False):
+            drug_code = drug_dir[2:]  # K- 제거
+            json_files = [index.abspath(rel) for rel in group['json']]
+            self.folder_structure[folder.replace('_json', '')][drug_code] = {
+                'path': os.path.join(TRAIN_ANNOTATIONS_PATH, folder, drug_dir),
+                'json_files': json_files,
+                'count': len(json_files)
+            }
         
         # 폴더 콤보박스 업데이트
         folder_names = list(self.folder_structure.keys())
@@ -240,36 +233,29 @@ class BBoxEditor:
             return
         
         IMAGES_PATH = 'data/raw_data/train_images'
-        drug_info = self.folder_structure[self.current_folder][self.current_drug_code]
+        # 저장된 수정 사항이 보이도록 바뀐 JSON만 다시 읽어서 인덱스 갱신
+        self.ann_index = self.ann_index.refresh()
         
         self.annotations = []
         
-        for json_file in drug_info['json_files']:
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                if 'images' in data and 'annotations' in data:
-                    image_info = data['images'][0]
-                    annotation = data['annotations'][0]
-                    
-                    image_name = image_info['file_name']
-                    image_path = os.path.join(IMAGES_PATH, image_name)
-                    
-                    if os.path.exists(image_path):
-                        self.annotations.append({
-                            'folder_name': self.current_folder,
-                            'drug_code': self.current_drug_code,
-                            'json_file': json_file,
-                            'image_path': image_path,
-                            'image_info': image_info,
-                            'annotation': annotation,
-                            'bbox': annotation['bbox'].copy(),
-                            'category_id': annotation['category_id']
-                        })
-                        
-            except Exception as e:
-                print(f"❌ 오류: {json_file} - {e}")
+        for rec in self.ann_index.records(folder=f"{self.current_folder}_json", drug_code=self.current_drug_code):
+            image_info = rec['image_info']
+            annotation = rec['annotation']
+            
+            image_name = image_info['file_name']
+            image_path = os.path.join(IMAGES_PATH, image_name)
+            
+            if os.path.exists(image_path):
+                self.annotations.append({
+                    'folder_name': self.current_folder,
+                    'drug_code': self.current_drug_code,
+                    'json_file': rec['json_file'],
+                    'image_path': image_path,
+                    'image_info': image_info,
+                    'annotation': annotation,
+                    'bbox': annotation['bbox'].copy(),
+                    'category_id': annotation['category_id']
+                })
         
         # 어노테이션 목록 업데이트
         self.update_annotation_list()
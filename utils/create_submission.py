@@ -1,11 +1,13 @@
 import os
-import json
 import glob
-import pandas as pd
-from collections import defaultdict
+from collections import Counter
+from src.loader import PrefetchLoader, decode_image, read_bytes
+from src.pred_cache import PredictionCache, decode_with_hash
+from src.sinks import CsvSink, COLUMNS
+from src.ann_index import load_index
 
-def check_yolo_category_mapping(model_path):
-    """YOLO 모델의 클래스 ID와 실제 카테고리 ID 매핑 확인"""
+def check_yolo_category_mapping(model_path, server_url=None):
+    """YOLO 모델의 클래스 ID와 실제 카테고리 ID 매핑 확인 (server_url이 있으면 서버 모델의 클래스 정보 사용)"""
     
     print("=== YOLO 카테고리 ID 매핑 확인 ===")
     
@@ -14,29 +16,13 @@ def check_yolo_category_mapping(model_path):
     
     print("1. 실제 어노테이션에서 카테고리 ID 수집 중...")
     
-    real_category_ids = set()
-    category_name_to_id = {}
+    # 어노테이션 인덱스(src.ann_index)에서 *_json 폴더의 JSON별 첫 번째 카테고리 사용
+    index = load_index(TRAIN_ANNOTATIONS_PATH)
+    json_files = index.files.loc[index.files['folder'].str.endswith('_json'), 'json']
+    categories = index.categories[index.categories['json'].isin(json_files)].drop_duplicates('json')
     
-    for item in os.listdir(TRAIN_ANNOTATIONS_PATH):
-        item_path = os.path.join(TRAIN_ANNOTATIONS_PATH, item)
-        if os.path.isdir(item_path) and item.endswith('_json'):
-            for root, dirs, files in os.walk(item_path):
-                for file in files:
-                    if file.endswith('.json'):
-                        try:
-                            with open(os.path.join(root, file), 'r', encoding='utf-8') as f:
-                                data = json.load(f)
-                            
-                            if 'categories' in data and data['categories']:
-                                category = data['categories'][0]
-                                category_id = category['id']
-                                category_name = category['name']
-                                
-                                real_category_ids.add(category_id)
-                                category_name_to_id[category_name] = category_id
-                                
-                        except Exception as e:
-                            continue
+    real_category_ids = set(categories['id'].tolist())
+    category_name_to_id = dict(zip(categories['name'].tolist(), categories['id'].tolist()))
     
     print(f"실제 카테고리 ID 수: {len(real_category_ids)}개")
     print(f"실제 카테고리 ID 목록: {sorted(real_category_ids)}")
@@ -44,10 +30,14 @@ def check_yolo_category_mapping(model_path):
     # 2. YOLO 모델의 클래스 정보 확인
     print("\n2. YOLO 모델 클래스 정보 확인 중...")
     
-    if os.path.exists(model_path):
+    if server_url or os.path.exists(model_path):
         try:
-            from ultralytics import YOLO
-            model = YOLO(model_path)
+            if server_url:
+                from src.server import InferenceClient
+                model = InferenceClient(server_url).model_info()
+            else:
+                from ultralytics import YOLO
+                model = YOLO(model_path)
             
             # 모델의 클래스 정보 확인
             if hasattr(model, 'names'):
@@ -76,129 +66,187 @@ def check_yolo_category_mapping(model_path):
     
     return real_category_ids, category_name_to_id
 
-def create_corrected_submission_file(model_path, test_dir):
-    """올바른 카테고리 ID 매핑으로 제출 파일 생성"""
+def create_corrected_submission_file(model_path, test_dir, batch_size=8, num_workers=4, queue_depth=4,
+                                     cache_dir=None, cache_max_mb=2048, server_url=None):
+    """올바른 카테고리 ID 매핑으로 제출 파일 생성
+
+    이미지 디코딩은 PrefetchLoader 워커 스레드에서 미리 진행되어 모델 예측과 겹쳐서 실행됨
+    cache_dir를 주면 모델 raw 예측을 디스크에 캐시해서 같은 모델·이미지 재실행 시 예측을 건너뜀
+    server_url을 주면 모델을 로드하지 않고 추론 서버(src.server)의 첫 번째 모델 결과를 사용
+    반환: 저장한 CSV 경로 (예측이 없거나 오류가 나면 None)
+          예측 행을 메모리에 모으지 않고 CSV로 바로 흘려 쓰므로 예전처럼 DataFrame을 반환하지 않음
+          (DataFrame이 필요하면 pd.read_csv(반환값))
+    """
     
     print("\n=== 올바른 카테고리 ID 매핑으로 제출 파일 생성 ===")
     
     # 실제 카테고리 ID 수집
-    real_category_ids, category_name_to_id = check_yolo_category_mapping(model_path)
+    real_category_ids, category_name_to_id = check_yolo_category_mapping(model_path, server_url)
     
     try:
-        from ultralytics import YOLO
-        import torch
-        
-        print("모델 로딩 중...")
-        model = YOLO(model_path)
-        
-        # 디바이스 설정
-        device = torch.device("mps" if torch.backends.mps.is_available() else "cpu")
-        print(f"사용 디바이스: {device}")
+        cache, ckpt_hashes, client = None, None, None
+        if server_url:
+            from src.server import InferenceClient
+            client = InferenceClient(server_url, concurrency=batch_size)
+            client.check_checkpoints([model_path], first_only=True)
+            model = client.model_info()
+            print(f"추론 서버 사용: {server_url}")
+        else:
+            from ultralytics import YOLO
+            import torch
+            from src.inference import predict_batch
+            
+            print("모델 로딩 중...")
+            model = YOLO(model_path)
+            
+            if cache_dir:
+                cache = PredictionCache(cache_dir, cache_max_mb)
+                ckpt_hashes = [cache.checkpoint_hash(model_path)]
+            
+            # 디바이스 설정
+            device = torch.device("mps" if torch.backends.mps.is_available() else "cpu")
+            print(f"사용 디바이스: {device}")
         
         # 테스트 이미지 경로 리스트
         image_paths = sorted(glob.glob(os.path.join(test_dir, '*.png')))
         print(f"발견된 테스트 이미지: {len(image_paths)}개")
         
-        # 결과를 담아둘 리스트
-        rows = []
-        annotation_id = 1
-        
-        # 각 이미지에 대해 추론
-        for i, img_path in enumerate(image_paths):
-            # 이미지 파일명에서 숫자 추출
-            img_filename = os.path.basename(img_path)
-            img_name_without_ext = os.path.splitext(img_filename)[0]
-            
-            try:
-                import re
-                numbers = re.findall(r'\d+', img_name_without_ext)
-                if numbers:
-                    image_id = int(numbers[-1])
+        # 결과는 청크 단위로 바로 CSV에 기록 (전체 행을 메모리에 모으지 않음)
+        output_path = 'submission_corrected.csv'
+        sink = CsvSink(output_path, encoding='utf-8', lineterminator='\n')
+        try:
+            annotation_id = 1
+
+            # 미리보기·통계용 (행 전체 대신 집계 값만 유지)
+            preview = []
+            image_ids = set()
+            category_counts = Counter()
+            score_sum = 0.0
+
+            # 이미지 디코딩은 워커 스레드가 미리 처리하고, 메인 스레드는 예측만 수행
+            loader = PrefetchLoader(
+                image_paths,
+                batch_size=batch_size,
+                num_workers=num_workers,
+                queue_depth=queue_depth,
+                decode_fn=read_bytes if client else (decode_image if cache is None else decode_with_hash)
+            )
+
+            i = 0
+            for paths, items in loader:
+                valid = [j for j, item in enumerate(items) if item is not None]
+                batch_results = [None] * len(items)
+
+                # iou=0.7은 ultralytics 기본값 (캐시 키에 명시적으로 포함시키기 위해 지정)
+                if client:
+                    resps = client.predict_many([items[j] for j in valid], conf=0.25, iou=0.7)
+                    for j, resp in zip(valid, resps):
+                        batch_results[j] = resp['dets'][0]
                 else:
-                    image_id = int(img_name_without_ext)
-            except ValueError:
-                image_id = i + 1
-            
-            print(f"처리 중: {img_filename} (image_id: {image_id})")
-            
-            # YOLO 예측 수행
-            results = model.predict(source=img_path, conf=0.25, device=device)
-            
-            # 각 예측 결과를 행으로 추가
-            for res in results:
-                for box in res.boxes:
-                    # YOLO 클래스 ID (0부터 시작)
-                    yolo_class_id = int(box.cls[0].cpu().numpy())
-                    
-                    # YOLO 클래스 이름
-                    yolo_class_name = model.names[yolo_class_id]
-                    
-                    # 실제 카테고리 ID로 매핑
-                    if yolo_class_name in category_name_to_id:
-                        category_id = category_name_to_id[yolo_class_name]
+                    if cache is None:
+                        imgs, img_hashes = [items[j] for j in valid], None
                     else:
-                        print(f"⚠️  매핑되지 않은 클래스: {yolo_class_name}")
-                        continue  # 매핑되지 않은 클래스는 건너뛰기
-                    
-                    # 신뢰도 점수
-                    score = float(box.conf[0].cpu().numpy())
-                    
-                    # 바운딩 박스 좌표 (x1, y1, x2, y2)
-                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                    
-                    # 바운딩 박스를 (x, y, w, h) 형식으로 변환
-                    bbox_x = int(x1)
-                    bbox_y = int(y1)
-                    bbox_w = int(x2 - x1)
-                    bbox_h = int(y2 - y1)
-                    
-                    # 행 추가
-                    rows.append({
-                        'annotation_id': annotation_id,
-                        'image_id': image_id,
-                        'category_id': category_id,
-                        'bbox_x': bbox_x,
-                        'bbox_y': bbox_y,
-                        'bbox_w': bbox_w,
-                        'bbox_h': bbox_h,
-                        'score': score
-                    })
-                    
-                    annotation_id += 1
+                        imgs = [items[j][0] for j in valid]
+                        img_hashes = [items[j][1] for j in valid]
+
+                    preds = predict_batch(
+                        [model], imgs, conf=0.25, iou=0.7, augment=False,
+                        cache=cache, ckpt_hashes=ckpt_hashes, img_hashes=img_hashes,
+                        device=device
+                    )
+                    for j, dets in zip(valid, preds):
+                        batch_results[j] = dets[0]
+
+                for img_path, dets in zip(paths, batch_results):
+                    # 이미지 파일명에서 숫자 추출
+                    img_filename = os.path.basename(img_path)
+                    img_name_without_ext = os.path.splitext(img_filename)[0]
+
+                    try:
+                        import re
+                        numbers = re.findall(r'\d+', img_name_without_ext)
+                        if numbers:
+                            image_id = int(numbers[-1])
+                        else:
+                            image_id = int(img_name_without_ext)
+                    except ValueError:
+                        image_id = i + 1
+                    i += 1
+
+                    if dets is None:
+                        print(f"⚠️  이미지를 읽을 수 없습니다: {img_filename}")
+                        continue
+
+                    print(f"처리 중: {img_filename} (image_id: {image_id})")
+
+                    # 각 예측 결과를 행으로 추가 (x1, y1, x2, y2, score, cls)
+                    for x1, y1, x2, y2, conf, cls in dets:
+                        # YOLO 클래스 ID (0부터 시작)
+                        yolo_class_id = int(cls)
+
+                        # YOLO 클래스 이름
+                        yolo_class_name = model.names[yolo_class_id]
+
+                        # 실제 카테고리 ID로 매핑
+                        if yolo_class_name in category_name_to_id:
+                            category_id = category_name_to_id[yolo_class_name]
+                        else:
+                            print(f"⚠️  매핑되지 않은 클래스: {yolo_class_name}")
+                            continue  # 매핑되지 않은 클래스는 건너뛰기
+
+                        # 신뢰도 점수
+                        score = float(conf)
+
+                        # 바운딩 박스를 (x, y, w, h) 형식으로 변환
+                        bbox_x = int(x1)
+                        bbox_y = int(y1)
+                        bbox_w = int(x2 - x1)
+                        bbox_h = int(y2 - y1)
+
+                        # 행 추가
+                        row = (annotation_id, image_id, category_id, bbox_x, bbox_y, bbox_w, bbox_h, score)
+                        sink.write(row)
+                        if len(preview) < 10:
+                            preview.append(row)
+                        image_ids.add(image_id)
+                        category_counts[category_id] += 1
+                        score_sum += score
+
+                        annotation_id += 1
+        except BaseException:
+            # 중간에 실패하면 파일 핸들을 닫고 반쯤 쓴 CSV를 남기지 않음
+            sink.abort()
+            raise
         
-        # DataFrame 생성 및 CSV 저장
-        print(f"총 {len(rows)}개의 예측 결과 생성")
+        sink.close()
+        n_rows = sink.count
+        print(f"총 {n_rows}개의 예측 결과 생성")
         
-        if rows:
-            submission = pd.DataFrame(rows, columns=[
-                'annotation_id', 'image_id', 'category_id', 
-                'bbox_x', 'bbox_y', 'bbox_w', 'bbox_h', 'score'
-            ])
-            
-            # CSV 저장
-            output_path = 'submission_corrected.csv'
-            submission.to_csv(output_path, index=False)
+        if n_rows:
             print(f"수정된 제출 파일 저장 완료: {output_path}")
             
             # 결과 미리보기
             print("\n=== 수정된 제출 파일 미리보기 ===")
-            print(submission.head(10))
+            print(",".join(COLUMNS))
+            for row in preview:
+                print(",".join(str(v) for v in row))
             
             # 통계 정보
             print(f"\n=== 통계 정보 ===")
-            print(f"총 예측 수: {len(submission)}개")
-            print(f"고유 이미지 수: {submission['image_id'].nunique()}개")
-            print(f"고유 카테고리 수: {submission['category_id'].nunique()}개")
-            print(f"평균 신뢰도: {submission['score'].mean():.3f}")
+            print(f"총 예측 수: {n_rows}개")
+            print(f"고유 이미지 수: {len(image_ids)}개")
+            print(f"고유 카테고리 수: {len(category_counts)}개")
+            print(f"평균 신뢰도: {score_sum / n_rows:.3f}")
             
             # 카테고리 ID 분포 확인
             print(f"\n=== 카테고리 ID 분포 ===")
-            category_counts = submission['category_id'].value_counts().head(10)
-            for cat_id, count in category_counts.items():
+            for cat_id, count in category_counts.most_common(10):
                 print(f"카테고리 ID {cat_id}: {count}개")
             
-            return submission
+            return output_path
         else:
+            # 예측이 없으면 헤더만 있는 파일을 남기지 않음 (기존 동작과 동일)
+            os.remove(output_path)
             print("⚠️  예측 결과가 없습니다!")
             return None
             
@@ -207,13 +255,17 @@ def create_corrected_submission_file(model_path, test_dir):
         return None
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--server', type=str, default=None, help='추론 서버 URL (지정 시 모델을 로드하지 않음)')
+    args = parser.parse_args()
             
     # YOLO 모델 로드
     model_path = './models/drug_detection_model_YOLOv5x_b8_e100(88)_20250728_3.pt'
     test_dir = './data/raw_data/test_images'
 
     # 카테고리 매핑 확인
-    real_category_ids, category_name_to_id = check_yolo_category_mapping(model_path)
+    real_category_ids, category_name_to_id = check_yolo_category_mapping(model_path, args.server)
 
     # 수정된 제출 파일 생성
-    submission = create_corrected_submission_file(model_path, test_dir) 
\ No newline at end of file
+    submission_path = create_corrected_submission_file(model_path, test_dir, server_url=args.server) 
\ No newline at end of file
@@ -1,54 +1,27 @@
 import cv2
-import numpy as np
 import os
-import json
-from PIL import Image
-import matplotlib.pyplot as plt
-    
+
+from src.augment import DEFAULT_ANGLES, rotate_with_boxes
+
+# 학습 데이터 전체 증강(이미지당 한 번 디코딩, 모든 박스, 병렬 저장, 이어서 실행)은 python -m src.augment
+
 def rotate_image_with_bbox(image_path, angle, bbox_info):
-    """이미지를 회전시키고 바운딩 박스도 함께 변환"""
+    """이미지를 회전시키고 바운딩 박스도 함께 변환 (image_path 대신 디코딩된 이미지 배열도 가능)"""
     
     # 이미지 로드
-    image = cv2.imread(image_path)
+    image = cv2.imread(image_path) if isinstance(image_path, str) else image_path
     if image is None:
         print(f"이미지를 로드할 수 없습니다: {image_path}")
         return None, None
     
-    height, width = image.shape[:2]
-    
-    # 회전 중심점 (이미지 중앙)
-    center = (width // 2, height // 2)
-    
-    # 회전 행렬 생성
-    rotation_matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
-    
-    # 이미지 회전
-    rotated_image = cv2.warpAffine(image, rotation_matrix, (width, height))
-    
-    # 바운딩 박스 회전 변환
-    x, y, w, h = bbox_info
-    bbox_points = np.array([
-        [x, y],
-        [x + w, y],
-        [x + w, y + h],
-        [x, y + h]
-    ], dtype=np.float32)
-    
-    # 바운딩 박스 점들을 회전
-    rotated_bbox_points = cv2.transform(bbox_points.reshape(-1, 1, 2), rotation_matrix)
-    
-    # 새로운 바운딩 박스 계산
-    min_x = max(0, np.min(rotated_bbox_points[:, 0, 0]))
-    max_x = min(width, np.max(rotated_bbox_points[:, 0, 0]))
-    min_y = max(0, np.min(rotated_bbox_points[:, 0, 1]))
-    max_y = min(height, np.max(rotated_bbox_points[:, 0, 1]))
-    
-    new_bbox = [min_x, min_y, max_x - min_x, max_y - min_y]
+    # 이미지 중앙 기준 회전 + 바운딩 박스 네 꼭짓점 변환 (src.augment)
+    rotated_image, new_boxes = rotate_with_boxes(image, angle, [bbox_info])
+    new_bbox = new_boxes[0].tolist()
     
     return rotated_image, new_bbox
 
 def generate_angle_variations(image_path, bbox_info, output_dir, base_filename):
-    """70°, 75°, 90° 각도별 이미지 생성"""
+    """70°, 75°, 90° 각도별 이미지 생성 (원본은 한 번만 디코딩)"""
     
     variations = []
     
@@ -63,9 +36,9 @@ def generate_angle_variations(image_path, bbox_info, output_dir, base_filename):
         })
     
     # 각도별 회전
-    angles = [70, 75, 90]
+    angles = list(DEFAULT_ANGLES) if original_image is not None else []
     for angle in angles:
-        rotated_image, new_bbox = rotate_image_with_bbox(image_path, angle, bbox_info)
+        rotated_image, new_bbox = rotate_image_with_bbox(original_image, angle, bbox_info)
         if rotated_image is not None and new_bbox is not None:
             variations.append({
                 'image': rotated_image,
@@ -84,15 +57,16 @@ def generate_angle_variations(image_path, bbox_info, output_dir, base_filename):
 
 def visualize_augmentation(image_path, bbox_info):
     """데이터 증강 결과 시각화"""
+    import matplotlib.pyplot as plt
     
     # 원본 이미지
     original_image = cv2.imread(image_path)
     original_image_rgb = cv2.cvtColor(original_image, cv2.COLOR_BGR2RGB)
     
     # 회전된 이미지들
-    rotated_70, bbox_70 = rotate_image_with_bbox(image_path, 70, bbox_info)
-    rotated_75, bbox_75 = rotate_image_with_bbox(image_path, 75, bbox_info)
-    rotated_90, bbox_90 = rotate_image_with_bbox(image_path, 90, bbox_info)
+    rotated_70, bbox_70 = rotate_image_with_bbox(original_image, 70, bbox_info)
+    rotated_75, bbox_75 = rotate_image_with_bbox(original_image, 75, bbox_info)
+    rotated_90, bbox_90 = rotate_image_with_bbox(original_image, 90, bbox_info)
     
     if rotated_70 is not None:
         rotated_70_rgb = cv2.cvtColor(rotated_70, cv2.COLOR_BGR2RGB)
@@ -1,12 +1,11 @@
 import os
 import json
 import cv2
-import numpy as np
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+from tkinter import ttk, messagebox
 from PIL import Image, ImageTk
-import glob
-from collections import defaultdict
+
+from src.ann_index import load_index
 
 class DrugCodeViewer:
     def __init__(self, root):
@@ -162,19 +161,11 @@ class DrugCodeViewer:
             messagebox.showerror("오류", f"어노테이션 폴더를 찾을 수 없습니다: {TRAIN_ANNOTATIONS_PATH}")
             return
         
-        # 모든 약품코드 수집
+        # 모든 약품코드 수집 (src.ann_index 인덱스에서 로드, 바뀐 JSON만 다시 파싱)
+        self.ann_index = load_index(TRAIN_ANNOTATIONS_PATH)
         drug_codes_set = set()
-        
-        for item in os.listdir(TRAIN_ANNOTATIONS_PATH):
-            item_path = os.path.join(TRAIN_ANNOTATIONS_PATH, item)
-            if os.path.isdir(item_path) and item.endswith('_json'):
-                
-                # 각 약품 코드 폴더 분석
-                for subitem in os.listdir(item_path):
-                    subitem_path = os.path.join(item_path, subitem)
-                    if os.path.isdir(subitem_path) and subitem.startswith('K-'):
-                        drug_code = subitem[2:]  # K- 제거
-                        drug_codes_set.add(drug_code)
+        for codes in self.ann_index.folder_drugs().values():
+            drug_codes_set.update(codes)
         
         # 약품코드 정렬
         self.drug_codes = sorted(list(drug_codes_set))
@@ -209,42 +200,28 @@ class DrugCodeViewer:
         
         self.images_data = []
         
-        # 모든 어노테이션 폴더에서 해당 약품코드 찾기
-        for item in os.listdir(TRAIN_ANNOTATIONS_PATH):
-            item_path = os.path.join(TRAIN_ANNOTATIONS_PATH, item)
-            if os.path.isdir(item_path) and item.endswith('_json'):
-                
-                drug_folder = os.path.join(item_path, f"K-{self.current_drug_code}")
-                if os.path.exists(drug_folder):
-                    
-                    # 해당 약품의 모든 JSON 파일 처리
-                    json_files = glob.glob(os.path.join(drug_folder, "*.json"))
-                    for json_file in json_files:
-                        try:
-                            with open(json_file, 'r', encoding='utf-8') as f:
-                                data = json.load(f)
-                            
-                            if 'images' in data and 'annotations' in data:
-                                image_info = data['images'][0]
-                                annotation = data['annotations'][0]
-                                
-                                image_name = image_info['file_name']
-                                image_path = os.path.join(IMAGES_PATH, image_name)
-                                
-                                if os.path.exists(image_path):
-                                    self.images_data.append({
-                                        'folder_name': item.replace('_json', ''),
-                                        'json_file': json_file,
-                                        'image_path': image_path,
-                                        'image_name': image_name,
-                                        'image_info': image_info,
-                                        'annotation': annotation,
-                                        'bbox': annotation['bbox'].copy(),
-                                        'category_id': annotation['category_id']
-                                    })
-                                    
-                        except Exception as e:
-                            print(f"❌ 오류: {json_file} - {e}")
+        # 모든 어노테이션 폴더에서 해당 약품코드 찾기 (저장된 수정 사항이 보이도록 바뀐 JSON만 다시 읽어서 갱신)
+        self.ann_index = self.ann_index.refresh()
+        for rec in self.ann_index.records(drug_code=self.current_drug_code):
+            if not rec['folder'].endswith('_json'):
+                continue
+            image_info = rec['image_info']
+            annotation = rec['annotation']
+            
+            image_name = image_info['file_name']
+            image_path = os.path.join(IMAGES_PATH, image_name)
+            
+            if os.path.exists(image_path):
+                self.images_data.append({
+                    'folder_name': rec['folder'].replace('_json', ''),
+                    'json_file': rec['json_file'],
+                    'image_path': image_path,
+                    'image_name': image_name,
+                    'image_info': image_info,
+                    'annotation': annotation,
+                    'bbox': annotation['bbox'].copy(),
+                    'category_id': annotation['category_id']
+                })
         
         # 이미지 목록 업데이트
         self.update_image_list()